@@ -0,0 +1,136 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import abc
+
+import six
+
+
+@six.add_metaclass(abc.ABCMeta)
+class AmphoraLoadBalancerDriver(object):
+
+    @abc.abstractmethod
+    def update(self, listener, vip):
+        """Update the amphora with a new configuration.
+
+        :param listener: octavia.common.data_models.Listener
+        :param vip: octavia.common.data_models.Vip
+        :returns: None
+
+        Builds a new configuration, pushes it to the amphora and reloads
+        the listener on one amphora.
+        """
+        pass
+
+    @abc.abstractmethod
+    def suspend(self, listener, vip):
+        """Suspend a running listener.
+
+        :param listener: octavia.common.data_models.Listener
+        :param vip: octavia.common.data_models.Vip
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def enable(self, listener, vip):
+        """Start/enable the listener.
+
+        :param listener: octavia.common.data_models.Listener
+        :param vip: octavia.common.data_models.Vip
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete(self, listener, vip):
+        """Delete the listener on the amphora.
+
+        :param listener: octavia.common.data_models.Listener
+        :param vip: octavia.common.data_models.Vip
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def info(self, amphora):
+        """Returns information about the amphora.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :returns: a dict, e.g. {"Rest Interface": "1.0", "Amphorae": "1.0",
+                  "packages": {"ha proxy": "1.5"}}
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_metrics(self, amphora):
+        """Return ceilometer ready metrics for the amphora.
+
+        :param amphora: octavia.common.data_models.Amphora
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_health(self, amphora):
+        """Return the health of the amphora and its load balancers.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :returns: a health map, see HealthMixIn.update_health
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_diagnostics(self, amphora):
+        """Run expensive self tests on the amphora.
+
+        :param amphora: octavia.common.data_models.Amphora
+
+        These tests are meant to run less often than health gathering.
+        """
+        pass
+
+
+@six.add_metaclass(abc.ABCMeta)
+class HealthMixIn(object):
+
+    @abc.abstractmethod
+    def update_health(self, health):
+        """Consume a health map reported by amphorae.
+
+        :param health: {"amphora-status": HEALTHY,
+                        "loadbalancers": {"<lb id>": {
+                            "loadbalancer-status": HEALTHY,
+                            "listeners": {"<listener id>": {
+                                "listener-status": HEALTHY,
+                                "nodes": {"<member id>": HEALTHY, ...}},
+                                ...}}, ...}}
+
+        Only items whose health has changed need to be submitted.
+        """
+        pass
+
+
+@six.add_metaclass(abc.ABCMeta)
+class StatsMixIn(object):
+
+    @abc.abstractmethod
+    def update_stats(self, stats):
+        """Consume a statistics map reported by amphorae.
+
+        :param stats: {"<lb id>": {"<listener id>": {
+                          "bytes_in": 123, "bytes_out": 123,
+                          "active_connections": 123,
+                          "total_connections": 123}, ...}, ...}
+        """
+        pass
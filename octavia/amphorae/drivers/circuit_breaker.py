@@ -0,0 +1,292 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import math
+import time
+
+import eventlet
+from oslo.config import cfg
+
+from octavia.amphorae.drivers import base as driver_base
+from octavia.amphorae.drivers import exceptions as driver_exceptions
+from octavia.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+CLOSED = 'CLOSED'
+OPEN = 'OPEN'
+HALF_OPEN = 'HALF_OPEN'
+
+# Number of recent latencies the adaptive timeout is computed from, and how
+# many are needed before it is trusted over the configured maximum.
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 10
+
+
+class CircuitBreaker(object):
+    """Closed/open/half-open circuit breaker of a single amphora.
+
+    failure_threshold consecutive failures open the breaker and calls are
+    rejected.  After reset_timeout seconds it is half-open and lets a
+    single probe call through: if the probe succeeds the breaker closes,
+    otherwise it opens again.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.time):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def allow(self):
+        """Returns whether a call may be made now."""
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def release(self):
+        """Gives back a probe allowed but not made."""
+        self._probing = False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if (self.state == HALF_OPEN or
+                self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = self.clock()
+
+
+class LatencyTracker(object):
+    """Derives a call timeout from the recent latencies of an amphora.
+
+    The timeout is the given percentile of the last LATENCY_WINDOW
+    successful calls times multiplier, kept between min_timeout and
+    max_timeout.  Until MIN_LATENCY_SAMPLES latencies are known it is
+    max_timeout.
+    """
+
+    def __init__(self, percentile, multiplier, min_timeout, max_timeout):
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency):
+        self._latencies.append(latency)
+
+    def latency_percentile(self):
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        index = int(math.ceil(self.percentile / 100.0 * len(latencies))) - 1
+        return latencies[max(index, 0)]
+
+    def timeout(self):
+        if len(self._latencies) < MIN_LATENCY_SAMPLES:
+            return self.max_timeout
+        return min(self.max_timeout,
+                   max(self.min_timeout,
+                       self.latency_percentile() * self.multiplier))
+
+
+class CircuitBreakerDriver(driver_base.AmphoraLoadBalancerDriver):
+    """Wraps an amphora driver with per-amphora breakers and timeouts.
+
+    Every call is checked against the circuit breakers of the amphorae it
+    touches: the amphora itself, or all amphorae of the listener's load
+    balancer.  If one of them is open, UnavailableException is raised
+    without calling the driver.  Otherwise the call runs under the largest
+    adaptive timeout of those amphorae and raises TimeOutException when it
+    runs out, so a hung amphora can only hold a green thread for about
+    its usual latency.  The outcome is recorded on every amphora touched.
+    """
+
+    def __init__(self, driver, failure_threshold=None, reset_timeout=None,
+                 percentile=None, multiplier=None, min_timeout=None,
+                 max_timeout=None, clock=time.time):
+        if failure_threshold is None:
+            failure_threshold = (
+                cfg.CONF.controller_worker.amp_breaker_failure_threshold)
+        if reset_timeout is None:
+            reset_timeout = (
+                cfg.CONF.controller_worker.amp_breaker_reset_timeout)
+        if percentile is None:
+            percentile = cfg.CONF.controller_worker.amp_timeout_percentile
+        if multiplier is None:
+            multiplier = cfg.CONF.controller_worker.amp_timeout_multiplier
+        if min_timeout is None:
+            min_timeout = cfg.CONF.controller_worker.amp_timeout_min
+        if max_timeout is None:
+            max_timeout = cfg.CONF.controller_worker.amp_call_timeout
+        self.driver = driver
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.clock = clock
+        self._breakers = {}
+        self._latencies = {}
+        self.calls = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def _breaker(self, amphora_id):
+        breaker = self._breakers.get(amphora_id)
+        if breaker is None:
+            breaker = self._breakers[amphora_id] = CircuitBreaker(
+                self.failure_threshold, self.reset_timeout, self.clock)
+            self._latencies[amphora_id] = LatencyTracker(
+                self.percentile, self.multiplier, self.min_timeout,
+                self.max_timeout)
+        return breaker
+
+    def forget(self, amphora_id):
+        """Drops the breaker and latencies of a deleted amphora."""
+        self._breakers.pop(amphora_id, None)
+        self._latencies.pop(amphora_id, None)
+
+    def _call(self, amphora_ids, name, *args):
+        method = getattr(self.driver, name)
+        allowed = []
+        for amphora_id in amphora_ids:
+            breaker = self._breaker(amphora_id)
+            if not breaker.allow():
+                for other in allowed:
+                    other.release()
+                self.rejected += 1
+                raise driver_exceptions.UnavailableException(
+                    amphora_id=amphora_id)
+            allowed.append(breaker)
+        self.calls += 1
+        timeout = max([self._latencies[amphora_id].timeout()
+                       for amphora_id in amphora_ids] or [self.max_timeout])
+        start = self.clock()
+        timer = eventlet.Timeout(timeout)
+        recorded = False
+        try:
+            result = method(*args)
+        except eventlet.Timeout as e:
+            if e is not timer:
+                raise
+            recorded = True
+            self.timeouts += 1
+            self._record_failures(amphora_ids)
+            LOG.warn(_('Amphora call %(method)s timed out for %(ids)s'),
+                     {'method': name, 'ids': amphora_ids})
+            raise driver_exceptions.TimeOutException(
+                amphora_id=', '.join(amphora_ids), timeout=timeout)
+        except NotImplementedError:
+            raise
+        except Exception:
+            recorded = True
+            self.failures += 1
+            self._record_failures(amphora_ids)
+            raise
+        else:
+            recorded = True
+            latency = self.clock() - start
+            for amphora_id in amphora_ids:
+                self._breakers[amphora_id].record_success()
+                self._latencies[amphora_id].record(latency)
+        finally:
+            timer.cancel()
+            if not recorded:
+                # The call was not made or was interrupted from outside,
+                # e.g. by the timeout of a caller or a killed green thread:
+                # give back the half-open probes it was allowed.
+                for breaker in allowed:
+                    breaker.release()
+        return result
+
+    def _record_failures(self, amphora_ids):
+        for amphora_id in amphora_ids:
+            breaker = self._breakers[amphora_id]
+            breaker.record_failure()
+            if breaker.state == OPEN:
+                LOG.warn(_('Circuit breaker of amphora %s is open'),
+                         amphora_id)
+
+    @staticmethod
+    def _amphora_ids(listener):
+        load_balancer = listener.load_balancer
+        if not load_balancer:
+            return []
+        return [amphora.id for amphora in load_balancer.amphorae]
+
+    def update(self, listener, vip):
+        return self._call(self._amphora_ids(listener), 'update',
+                          listener, vip)
+
+    def suspend(self, listener, vip):
+        return self._call(self._amphora_ids(listener), 'suspend',
+                          listener, vip)
+
+    def enable(self, listener, vip):
+        return self._call(self._amphora_ids(listener), 'enable',
+                          listener, vip)
+
+    def delete(self, listener, vip):
+        return self._call(self._amphora_ids(listener), 'delete',
+                          listener, vip)
+
+    def info(self, amphora):
+        return self._call([amphora.id], 'info', amphora)
+
+    def get_metrics(self, amphora):
+        return self._call([amphora.id], 'get_metrics', amphora)
+
+    def get_health(self, amphora):
+        return self._call([amphora.id], 'get_health', amphora)
+
+    def get_diagnostics(self, amphora):
+        return self._call([amphora.id], 'get_diagnostics', amphora)
+
+    def get_breaker_metrics(self):
+        """Returns call counters and the breaker state of every amphora."""
+        states = dict((state, 0) for state in (CLOSED, OPEN, HALF_OPEN))
+        amphorae = {}
+        for amphora_id, breaker in self._breakers.items():
+            states[breaker.state] += 1
+            latencies = self._latencies[amphora_id]
+            amphorae[amphora_id] = {
+                'state': breaker.state,
+                'consecutive_failures': breaker.failures,
+                'timeout': latencies.timeout(),
+                'latency_percentile': latencies.latency_percentile()}
+        return {'calls': self.calls,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'states': states,
+                'amphorae': amphorae}
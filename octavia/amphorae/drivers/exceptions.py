@@ -0,0 +1,86 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Exceptions raised by amphora drivers, as listed in the driver interface spec.
+"""
+
+from octavia.common import exceptions
+
+
+class AmphoraDriverError(exceptions.OctaviaException):
+    message = _('An unknown amphora driver error occurred.')
+
+
+class NotFoundError(AmphoraDriverError):
+    message = _('The amphora %(amphora_id)s could not be found.')
+
+
+class InfoException(AmphoraDriverError):
+    message = _('Gathering information about amphora %(amphora_id)s '
+                'failed.')
+
+
+class MetricsException(AmphoraDriverError):
+    message = _('Gathering metrics of amphora %(amphora_id)s failed.')
+
+
+class UnauthorizedException(AmphoraDriverError):
+    message = _('The driver can not access amphora %(amphora_id)s.')
+
+
+class StatisticsException(AmphoraDriverError):
+    message = _('Gathering statistics of amphora %(amphora_id)s failed.')
+
+
+class TimeOutException(AmphoraDriverError):
+    message = _('Contacting amphora %(amphora_id)s timed out after '
+                '%(timeout).1f seconds.')
+
+
+class UnavailableException(AmphoraDriverError):
+    message = _('Amphora %(amphora_id)s is temporarily unavailable.')
+
+
+class DeleteFailed(AmphoraDriverError):
+    message = _('Load balancer %(load_balancer_id)s could not be deleted.')
+
+
+class SuspendFailed(AmphoraDriverError):
+    message = _('Load balancer %(load_balancer_id)s could not be '
+                'suspended.')
+
+
+class EnableFailed(AmphoraDriverError):
+    message = _('Load balancer %(load_balancer_id)s could not be enabled.')
+
+
+class ProvisioningErrors(AmphoraDriverError):
+    message = _('Provisioning %(resource)s %(id)s failed.')
+
+
+class ListenerProvisioningError(ProvisioningErrors):
+    message = _('Could not provision listener %(id)s.')
+
+
+class LoadBalancerProvisoningError(ProvisioningErrors):
+    message = _('Could not provision load balancer %(id)s.')
+
+
+class HealthMonitorProvisioningError(ProvisioningErrors):
+    message = _('Could not provision health monitor %(id)s.')
+
+
+class NodeProvisioningError(ProvisioningErrors):
+    message = _('Could not provision node %(id)s.')
@@ -0,0 +1,116 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import eventlet
+from oslo.config import cfg
+
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import threadgroup
+
+LOG = logging.getLogger(__name__)
+
+
+class FanoutResults(object):
+    """Aggregated outcome of a fan-out.
+
+    succeeded maps the key of every call that returned to its return
+    value, failed maps the key of every call that raised to the exception
+    and timed_out holds the keys of the calls that ran out of time.
+    """
+
+    def __init__(self):
+        self.succeeded = {}
+        self.failed = {}
+        self.timed_out = set()
+        self.elapsed = 0.0
+
+    def __len__(self):
+        return len(self.succeeded) + len(self.failed) + len(self.timed_out)
+
+    @property
+    def ok(self):
+        return not (self.failed or self.timed_out)
+
+
+class FanoutExecutor(object):
+    """Runs many driver calls concurrently with a bound on concurrency.
+
+    Calls run in a ThreadGroup of concurrency green threads; adding a call
+    to a full group waits for a free thread.  Each call gets its own
+    timeout, so one slow amphora only holds up its own thread.  The timeout
+    fires at the next point the call yields to eventlet, e.g. on network
+    I/O.
+    """
+
+    def __init__(self, concurrency=None, timeout=None):
+        if concurrency is None:
+            concurrency = cfg.CONF.controller_worker.amp_fanout_concurrency
+        if timeout is None:
+            timeout = cfg.CONF.controller_worker.amp_call_timeout
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def _call(self, results, key, func, args):
+        timeout = eventlet.Timeout(self.timeout)
+        try:
+            results.succeeded[key] = func(*args)
+        except eventlet.Timeout as e:
+            if e is not timeout:
+                raise
+            results.timed_out.add(key)
+            LOG.warn(_('Amphora call for %(key)s timed out after %(timeout)s '
+                       'seconds'), {'key': key, 'timeout': self.timeout})
+        except Exception as e:
+            results.failed[key] = e
+            LOG.warn(_('Amphora call for %(key)s failed: %(error)s'),
+                     {'key': key, 'error': e})
+        finally:
+            timeout.cancel()
+
+    def execute(self, calls):
+        """Runs calls concurrently and waits for all of them.
+
+        :param calls: iterable of (key, callable, args) tuples; key
+                      identifies the call in the results and must be
+                      unique
+        :returns: FanoutResults
+        """
+        results = FanoutResults()
+        start = time.time()
+        group = threadgroup.ThreadGroup(self.concurrency)
+        for key, func, args in calls:
+            group.add_thread(self._call, results, key, func, args)
+        group.wait()
+        results.elapsed = time.time() - start
+        return results
+
+    def map(self, func, items, key=lambda item: item.id):
+        """Calls func(item) for every item concurrently.
+
+        :param key: returns the results key of an item, its id by default
+        :returns: FanoutResults
+        """
+        return self.execute((key(item), func, (item,)) for item in items)
+
+    def update(self, driver, listeners):
+        """Pushes many listeners with driver.update.
+
+        :param driver: an AmphoraLoadBalancerDriver
+        :param listeners: iterable of (listener, vip) pairs
+        :returns: FanoutResults keyed by listener id
+        """
+        return self.execute((listener.id, driver.update, (listener, vip))
+                            for listener, vip in listeners)
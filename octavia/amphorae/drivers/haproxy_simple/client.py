@@ -0,0 +1,83 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import abc
+
+import six
+
+
+@six.add_metaclass(abc.ABCMeta)
+class AmphoraClientBase(object):
+    """Transport used by the haproxy driver to reach the amphora agent."""
+
+    @abc.abstractmethod
+    def upload_config(self, amphora, listener_id, config):
+        """Store the haproxy configuration of a listener on the amphora.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :param listener_id: id of the listener the configuration is for
+        :param config: the haproxy configuration file contents
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def reload_listener(self, amphora, listener_id):
+        """Reload haproxy of a listener to apply its stored configuration.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :param listener_id: id of the listener
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def start_listener(self, amphora, listener_id):
+        """Start haproxy of a listener.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :param listener_id: id of the listener
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def stop_listener(self, amphora, listener_id):
+        """Stop haproxy of a listener.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :param listener_id: id of the listener
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete_listener(self, amphora, listener_id):
+        """Stop haproxy of a listener and remove its configuration.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :param listener_id: id of the listener
+        :returns: None
+        """
+        pass
+
+    @abc.abstractmethod
+    def get(self, amphora, path):
+        """Read a resource of the amphora agent, e.g. 'info' or 'health'.
+
+        :param amphora: octavia.common.data_models.Amphora
+        :param path: the resource to read
+        :returns: the decoded response
+        """
+        pass
@@ -0,0 +1,217 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import socket
+import ssl
+import time
+
+from eventlet import semaphore
+from oslo.config import cfg
+from six.moves import http_client
+
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import loopingcall
+from octavia.openstack.common import network_utils
+
+LOG = logging.getLogger(__name__)
+
+
+class AmphoraConnection(http_client.HTTPConnection):
+    """HTTP connection to an amphora agent, optionally over TLS.
+
+    The socket gets TCP keepalive so dead peers are noticed while the
+    connection sits idle in the pool.
+    """
+
+    def __init__(self, host, port, timeout, ssl_kwargs, on_handshake):
+        http_client.HTTPConnection.__init__(self, host, port,
+                                            timeout=timeout)
+        self.ssl_kwargs = ssl_kwargs
+        self.on_handshake = on_handshake
+        self.last_used = None
+
+    def connect(self):
+        sock = socket.create_connection((self.host, self.port),
+                                        self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        network_utils.set_tcp_keepalive(sock)
+        if self.ssl_kwargs is not None:
+            sock = ssl.wrap_socket(sock, **self.ssl_kwargs)
+            self.on_handshake()
+        self.sock = sock
+
+
+class ConnectionPool(object):
+    """Keep-alive connections to amphora agents.
+
+    Connections are returned to the pool after each request and reused,
+    most recently used first, so a busy amphora is reached without a new
+    TCP or TLS handshake.  At most max_idle_per_amphora idle connections
+    are kept per amphora and idle connections are closed after
+    idle_timeout seconds.  No more than max_connections sockets are open
+    at once; when the cap is reached the least recently used idle
+    connection is closed, or the caller waits for a connection to be
+    returned.
+
+    Python 2 can not resume TLS sessions, so reuse is what saves the
+    handshakes; the handshakes counter shows how many were made.
+    """
+
+    def __init__(self, max_connections=None, max_idle_per_amphora=None,
+                 idle_timeout=None, connect_timeout=None, use_ssl=None,
+                 clock=time.time):
+        if max_connections is None:
+            max_connections = cfg.CONF.haproxy_amphora.max_connections
+        if max_idle_per_amphora is None:
+            max_idle_per_amphora = (
+                cfg.CONF.haproxy_amphora.max_idle_per_amphora)
+        if idle_timeout is None:
+            idle_timeout = cfg.CONF.haproxy_amphora.connection_idle_timeout
+        if connect_timeout is None:
+            connect_timeout = cfg.CONF.haproxy_amphora.connect_timeout
+        if use_ssl is None:
+            use_ssl = cfg.CONF.haproxy_amphora.use_ssl
+        self.max_connections = max_connections
+        self.max_idle_per_amphora = max_idle_per_amphora
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.ssl_kwargs = self._ssl_kwargs() if use_ssl else None
+        self.clock = clock
+        self._slots = semaphore.Semaphore(max_connections)
+        self._idle = {}
+        self._timer = None
+        self.open_connections = 0
+        self.opened = 0
+        self.reused = 0
+        self.evicted = 0
+        self.handshakes = 0
+
+    @staticmethod
+    def _ssl_kwargs():
+        # Client side counterpart of sslutils.wrap.
+        conf = cfg.CONF.haproxy_amphora
+        ssl_kwargs = {'certfile': conf.client_cert,
+                      'cert_reqs': ssl.CERT_NONE}
+        if conf.server_ca:
+            ssl_kwargs['ca_certs'] = conf.server_ca
+            ssl_kwargs['cert_reqs'] = ssl.CERT_REQUIRED
+        else:
+            LOG.warning(_('No server_ca is configured in [haproxy_amphora], '
+                          'the certificates of amphora agents will not be '
+                          'verified'))
+        return ssl_kwargs
+
+    def _count_handshake(self):
+        self.handshakes += 1
+
+    def _close(self, conn):
+        conn.close()
+        self.open_connections -= 1
+        self._slots.release()
+
+    def _evict_least_recently_used(self):
+        oldest = None
+        for idle in self._idle.values():
+            if idle and (oldest is None or
+                         idle[0].last_used < oldest[0].last_used):
+                oldest = idle
+        if oldest is not None:
+            self.evicted += 1
+            self._close(oldest.pop(0))
+
+    def get(self, host, port):
+        """Returns an idle connection to host:port or a new one.
+
+        The connection must be handed back with put() or discard().
+        """
+        idle = self._idle.get((host, port))
+        now = self.clock()
+        while idle:
+            conn = idle.pop()
+            if now - conn.last_used < self.idle_timeout:
+                self.reused += 1
+                return conn
+            self.evicted += 1
+            self._close(conn)
+        if not self._slots.acquire(blocking=False):
+            self._evict_least_recently_used()
+            self._slots.acquire()
+        self.open_connections += 1
+        self.opened += 1
+        return AmphoraConnection(host, port, self.connect_timeout,
+                                 self.ssl_kwargs, self._count_handshake)
+
+    def put(self, conn):
+        """Hands a connection back after a complete request."""
+        conn.last_used = self.clock()
+        idle = self._idle.setdefault((conn.host, conn.port), [])
+        # A negative balance means callers are waiting for a socket.
+        if (conn.sock is None or self._slots.balance < 0 or
+                len(idle) >= self.max_idle_per_amphora):
+            self._close(conn)
+        else:
+            idle.append(conn)
+
+    def discard(self, conn):
+        """Closes a connection that failed or is in an unknown state."""
+        self._close(conn)
+
+    @contextlib.contextmanager
+    def connection(self, host, port):
+        conn = self.get(host, port)
+        done = False
+        try:
+            yield conn
+            done = True
+        finally:
+            if done:
+                self.put(conn)
+            else:
+                self.discard(conn)
+
+    def evict_idle(self):
+        """Closes the connections idle for longer than idle_timeout."""
+        now = self.clock()
+        for key, idle in list(self._idle.items()):
+            while idle and now - idle[0].last_used >= self.idle_timeout:
+                self.evicted += 1
+                self._close(idle.pop(0))
+            if not idle:
+                del self._idle[key]
+
+    def close_all(self):
+        for idle in self._idle.values():
+            while idle:
+                self._close(idle.pop())
+        self._idle.clear()
+
+    def get_metrics(self):
+        return {'open_connections': self.open_connections,
+                'idle_connections': sum(len(idle)
+                                        for idle in self._idle.values()),
+                'opened': self.opened,
+                'reused': self.reused,
+                'evicted': self.evicted,
+                'handshakes': self.handshakes}
+
+    def start(self):
+        self._timer = loopingcall.FixedIntervalLoopingCall(self.evict_idle)
+        self._timer.start(self.idle_timeout, initial_delay=self.idle_timeout)
+
+    def stop(self):
+        if self._timer:
+            self._timer.stop()
+            self._timer = None
+        self.close_all()
@@ -0,0 +1,130 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+
+import six
+
+from octavia.amphorae.drivers import base as driver_base
+from octavia.amphorae.drivers.haproxy_simple import jinja_cfg
+from octavia.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+def config_hash(config):
+    """Returns the content hash used to recognize a pushed configuration."""
+    if isinstance(config, six.text_type):
+        config = config.encode('utf-8')
+    return hashlib.sha1(config).hexdigest()
+
+
+class HaproxyAmphoraLoadBalancerDriver(
+        driver_base.AmphoraLoadBalancerDriver):
+    """Pushes haproxy configurations to the amphorae of a load balancer.
+
+    The hash of the last configuration pushed is kept per amphora and
+    listener.  When update() renders a configuration whose hash matches,
+    neither the upload nor the haproxy reload happen, so reconciling an
+    unchanged listener costs no amphora traffic.  The hash is forgotten
+    whenever the listener is stopped, started or deleted, or a push fails,
+    so the next update() always pushes again.
+
+    The hashes only record what this driver pushed; the amphora is not
+    asked what it runs.  Whoever fails over, rebuilds or restarts an
+    amphora, reconciles it from scratch, or lets another controller push
+    to it must call invalidate() for it, or update() may skip a push the
+    amphora needs.  invalidate can be given as the on_stale callback of a
+    HeartbeatMonitor so an amphora that missed its heartbeats is always
+    pushed to again.
+    """
+
+    def __init__(self, client, templater=None):
+        """Creates the driver.
+
+        :param client: an AmphoraClientBase reaching the amphora agents
+        :param templater: renderer of haproxy configurations, defaults to a
+                          new jinja_cfg.JinjaTemplater
+        """
+        self.client = client
+        self.jinja = templater or jinja_cfg.JinjaTemplater()
+        self._pushed = {}
+        self.pushes = 0
+        self.pushes_skipped = 0
+
+    @staticmethod
+    def _amphorae(listener):
+        load_balancer = listener.load_balancer
+        return load_balancer.amphorae if load_balancer else []
+
+    def pushed_hash(self, amphora_id, listener_id):
+        """Returns the hash of the last configuration pushed, or None."""
+        return self._pushed.get((amphora_id, listener_id))
+
+    def invalidate(self, amphora_id=None, listener_id=None):
+        """Forgets pushed hashes so the next update() pushes again.
+
+        Without arguments every hash is forgotten, otherwise only the ones
+        of the given amphora and/or listener.  Must be called for an
+        amphora whose configuration may have changed without this driver,
+        e.g. after a failover, a restart or a reconcile.
+        """
+        for key in list(self._pushed):
+            if (amphora_id in (None, key[0]) and
+                    listener_id in (None, key[1])):
+                del self._pushed[key]
+
+    def update(self, listener, vip):
+        config = self.jinja.build_config(listener, vip)
+        digest = config_hash(config)
+        for amphora in self._amphorae(listener):
+            key = (amphora.id, listener.id)
+            if self._pushed.get(key) == digest:
+                self.pushes_skipped += 1
+                LOG.debug('Configuration of listener %(listener)s on '
+                          'amphora %(amphora)s is unchanged',
+                          {'listener': listener.id, 'amphora': amphora.id})
+                continue
+            self._pushed.pop(key, None)
+            self.client.upload_config(amphora, listener.id, config)
+            self.client.reload_listener(amphora, listener.id)
+            self._pushed[key] = digest
+            self.pushes += 1
+
+    def _apply(self, method, listener):
+        for amphora in self._amphorae(listener):
+            self._pushed.pop((amphora.id, listener.id), None)
+            method(amphora, listener.id)
+
+    def suspend(self, listener, vip):
+        self._apply(self.client.stop_listener, listener)
+
+    def enable(self, listener, vip):
+        self._apply(self.client.start_listener, listener)
+
+    def delete(self, listener, vip):
+        self._apply(self.client.delete_listener, listener)
+        self.jinja.forget(listener.id)
+
+    def info(self, amphora):
+        return self.client.get(amphora, 'info')
+
+    def get_metrics(self, amphora):
+        return self.client.get(amphora, 'metrics')
+
+    def get_health(self, amphora):
+        return self.client.get(amphora, 'health')
+
+    def get_diagnostics(self, amphora):
+        return self.client.get(amphora, 'diagnostics')
@@ -0,0 +1,156 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import jinja2
+from oslo.config import cfg
+
+from octavia.common import constants
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'templates')
+HAPROXY_TEMPLATE = 'haproxy_listener.template'
+
+MODE_MAP = {constants.PROTOCOL_HTTP: 'http',
+            # No TLS termination yet, HTTPS is passed through.
+            constants.PROTOCOL_HTTPS: 'tcp',
+            constants.PROTOCOL_TCP: 'tcp'}
+
+BALANCE_MAP = {constants.LB_ALGORITHM_ROUND_ROBIN: 'roundrobin',
+               constants.LB_ALGORITHM_LEAST_CONNECTIONS: 'leastconn',
+               constants.LB_ALGORITHM_SOURCE_IP: 'source'}
+
+
+def expand_expected_codes(codes):
+    """Turns expected codes like "200-202,404" into "200|201|202|404"."""
+    expanded = []
+    for part in (codes or '').replace(' ', '').split(','):
+        if '-' in part:
+            low, high = part.split('-', 1)
+            expanded.extend(str(code)
+                            for code in range(int(low), int(high) + 1))
+        elif part:
+            expanded.append(part)
+    return '|'.join(expanded)
+
+
+def _frontend_key(listener, vip, stats_socket):
+    return (listener.protocol, listener.protocol_port,
+            listener.connection_limit, listener.default_pool_id,
+            listener.enabled, vip.ip_address, stats_socket)
+
+
+def _monitor_key(monitor):
+    if not monitor:
+        return None
+    return (monitor.type, monitor.delay, monitor.timeout,
+            monitor.fall_threshold, monitor.rise_threshold,
+            monitor.http_method, monitor.url_path, monitor.expected_codes,
+            monitor.enabled)
+
+
+def _backend_key(pool, mode):
+    persistence = pool.session_persistence
+    return (pool.id, mode, pool.lb_algorithm, pool.enabled,
+            persistence and (persistence.type, persistence.cookie_name),
+            _monitor_key(pool.health_monitor))
+
+
+def _member_key(member, monitor_key, cookie):
+    return (member.ip_address, member.protocol_port, member.weight,
+            member.enabled, monitor_key, cookie)
+
+
+class JinjaTemplater(object):
+    """Renders haproxy configurations, re-rendering only what changed.
+
+    The template is compiled once.  A configuration is made of a frontend
+    fragment, a backend fragment and one fragment per member, each rendered
+    by its own template macro.  Every fragment is cached per listener along
+    with a key of the attributes it was rendered from; a fragment is only
+    rendered again when its key changed.  Changing one member of a large
+    pool therefore renders one fragment, the rest of the file is joined
+    from the cache.
+    """
+
+    def __init__(self, base_path=None, templates_dir=TEMPLATES_DIR,
+                 template=HAPROXY_TEMPLATE):
+        if base_path is None:
+            base_path = cfg.CONF.haproxy_amphora.base_path
+        self.base_path = base_path
+        env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(templates_dir),
+            trim_blocks=True, lstrip_blocks=True)
+        self._macros = env.get_template(template).module
+        self._cache = {}
+        self.fragments_rendered = 0
+        self.fragments_reused = 0
+
+    def _fragment(self, old, new, name, key, macro, *args):
+        cached = old.get(name)
+        if cached is not None and cached[0] == key:
+            self.fragments_reused += 1
+            text = cached[1]
+        else:
+            self.fragments_rendered += 1
+            text = macro(*args)
+        new[name] = (key, text)
+        return text
+
+    def build_config(self, listener, vip):
+        """Renders the haproxy configuration of a listener.
+
+        :param listener: octavia.common.data_models.Listener with its
+                         default pool, members, health monitor and
+                         session persistence loaded
+        :param vip: octavia.common.data_models.Vip
+        :returns: the configuration file as a string
+        """
+        cache = self._cache.setdefault(listener.id, {})
+        mode = MODE_MAP[listener.protocol]
+        stats_socket = os.path.join(self.base_path, listener.id + '.sock')
+        parts = [self._fragment(
+            cache, cache, 'frontend',
+            _frontend_key(listener, vip, stats_socket),
+            self._macros.frontend, listener, vip, mode, stats_socket)]
+        pool = listener.default_pool
+        members = {}
+        if pool:
+            monitor = pool.health_monitor
+            expected_codes = expand_expected_codes(
+                monitor and monitor.expected_codes)
+            parts.append(self._fragment(
+                cache, cache, 'backend', _backend_key(pool, mode),
+                self._macros.backend, pool, mode,
+                BALANCE_MAP[pool.lb_algorithm], expected_codes))
+            if not (monitor and monitor.enabled):
+                monitor = None
+            monitor_key = _monitor_key(monitor)
+            persistence = pool.session_persistence
+            cookie = bool(persistence and persistence.type ==
+                          constants.SESSION_PERSISTENCE_HTTP_COOKIE)
+            old_members = cache.get('members', {})
+            for member in pool.members:
+                parts.append(self._fragment(
+                    old_members, members, member.id,
+                    _member_key(member, monitor_key, cookie),
+                    self._macros.member, member, monitor, cookie))
+        # Members no longer in the pool drop out of the cache here.
+        cache['members'] = members
+        return ''.join(parts)
+
+    def forget(self, listener_id):
+        """Drops the cached fragments of a deleted listener."""
+        self._cache.pop(listener_id, None)
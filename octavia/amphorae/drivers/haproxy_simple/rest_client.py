@@ -0,0 +1,102 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+
+from oslo.config import cfg
+from six.moves import http_client
+
+from octavia.amphorae.drivers import exceptions as driver_exceptions
+from octavia.amphorae.drivers.haproxy_simple import client
+from octavia.amphorae.drivers.haproxy_simple import connection_pool
+from octavia.openstack.common import jsonutils
+from octavia.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+API_VERSION = '0.5'
+
+_STATUS_EXCEPTIONS = {
+    404: driver_exceptions.NotFoundError,
+    401: driver_exceptions.UnauthorizedException,
+    403: driver_exceptions.UnauthorizedException,
+    503: driver_exceptions.UnavailableException}
+
+
+class AmphoraAPIClient(client.AmphoraClientBase):
+    """Talks to the REST agent of amphorae over pooled connections."""
+
+    def __init__(self, pool=None, port=None):
+        if port is None:
+            port = cfg.CONF.haproxy_amphora.bind_port
+        self.pool = pool or connection_pool.ConnectionPool()
+        self.port = port
+
+    def _request(self, amphora, method, path, body=None):
+        url = '/%s/%s' % (API_VERSION, path)
+        headers = {'Content-Type': 'text/plain'} if body is not None else {}
+        # A pooled connection may have been closed by the agent while it
+        # was idle; such a request is retried once on a new connection.
+        for attempt in range(2):
+            conn = self.pool.get(amphora.lb_network_ip, self.port)
+            reused = conn.sock is not None
+            done = False
+            try:
+                conn.request(method, url, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+                done = True
+            except socket.timeout:
+                raise driver_exceptions.TimeOutException(
+                    amphora_id=amphora.id, timeout=self.pool.connect_timeout)
+            except (http_client.HTTPException, socket.error) as e:
+                if reused and attempt == 0:
+                    continue
+                LOG.warn(_('Request to amphora %(id)s failed: %(error)s'),
+                         {'id': amphora.id, 'error': e})
+                raise driver_exceptions.UnavailableException(
+                    amphora_id=amphora.id)
+            finally:
+                # Only a connection that completed its request is reused;
+                # any other exit, eventlet.Timeout included, closes it so
+                # its slot in the pool is freed.
+                if done:
+                    self.pool.put(conn)
+                else:
+                    self.pool.discard(conn)
+            break
+        if response.status >= 400:
+            exception = _STATUS_EXCEPTIONS.get(
+                response.status, driver_exceptions.AmphoraDriverError)
+            raise exception(amphora_id=amphora.id)
+        return data
+
+    def upload_config(self, amphora, listener_id, config):
+        self._request(amphora, 'PUT', 'listeners/%s/haproxy' % listener_id,
+                      config)
+
+    def reload_listener(self, amphora, listener_id):
+        self._request(amphora, 'PUT', 'listeners/%s/reload' % listener_id)
+
+    def start_listener(self, amphora, listener_id):
+        self._request(amphora, 'PUT', 'listeners/%s/start' % listener_id)
+
+    def stop_listener(self, amphora, listener_id):
+        self._request(amphora, 'PUT', 'listeners/%s/stop' % listener_id)
+
+    def delete_listener(self, amphora, listener_id):
+        self._request(amphora, 'DELETE', 'listeners/%s' % listener_id)
+
+    def get(self, amphora, path):
+        return jsonutils.loads(self._request(amphora, 'GET', path))
@@ -0,0 +1,258 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import errno
+import socket
+
+from eventlet import greenthread
+from eventlet import hubs
+from oslo.config import cfg
+import six
+
+from octavia.common import constants
+from octavia.openstack.common import jsonutils
+from octavia.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# Largest UDP payload that fits in a single IPv4 datagram.
+MAX_PACKET_SIZE = 65507
+
+# Statistics that describe the current state rather than a count since the
+# previous report; the newest value wins when heartbeats are merged.
+GAUGE_STATS = ('active_connections', 'active-connections')
+
+_NUMBERS = six.integer_types + (float,)
+
+
+def _all_dicts(values):
+    return all(isinstance(value, dict) for value in values)
+
+
+def _valid_health(health):
+    if not isinstance(health, dict):
+        return False
+    load_balancers = health.get(constants.HEALTH_LOADBALANCERS, {})
+    if (not isinstance(load_balancers, dict) or
+            not _all_dicts(load_balancers.values())):
+        return False
+    for load_balancer in load_balancers.values():
+        listeners = load_balancer.get(constants.HEALTH_LISTENERS, {})
+        if not isinstance(listeners, dict) or not _all_dicts(
+                listeners.values()):
+            return False
+        for listener in listeners.values():
+            pools = listener.get(constants.HEALTH_POOLS, {})
+            if (not isinstance(listener.get(constants.HEALTH_NODES, {}),
+                               dict) or
+                    not isinstance(pools, dict) or
+                    not _all_dicts(pools.values()) or
+                    not _all_dicts(pool.get(constants.HEALTH_NODES, {})
+                                   for pool in pools.values())):
+                return False
+    return True
+
+
+def _valid_stats(stats):
+    # {"<lb id>": {"<listener id>": {"<counter>": <number>, ...}}}
+    if not isinstance(stats, dict) or not _all_dicts(stats.values()):
+        return False
+    for listeners in stats.values():
+        if not _all_dicts(listeners.values()):
+            return False
+        for counters in listeners.values():
+            for key, value in counters.items():
+                if not (isinstance(value, _NUMBERS) or
+                        (value is None and key in GAUGE_STATS)):
+                    return False
+    return True
+
+
+def _valid(heartbeat):
+    if not isinstance(heartbeat, dict):
+        return False
+    if not isinstance(heartbeat.get('id', ''), six.string_types):
+        return False
+    if heartbeat.get('health') and not _valid_health(heartbeat['health']):
+        return False
+    if heartbeat.get('stats') and not _valid_stats(heartbeat['stats']):
+        return False
+    return True
+
+
+def _merge_health(target, health):
+    for key, value in health.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_health(target[key], value)
+        else:
+            target[key] = value
+
+
+def _merge_stats(target, stats):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _merge_stats(target.setdefault(key, {}), value)
+        elif key in target and key not in GAUGE_STATS:
+            target[key] += value
+        else:
+            target[key] = value
+
+
+class UDPHeartbeatReceiver(object):
+    """Receives amphora heartbeats over UDP and hands them to the mixins.
+
+    Each datagram carries one JSON encoded heartbeat::
+
+        {"id": "<amphora id>",
+         "health": {<health map, see HealthMixIn.update_health>},
+         "stats": {<statistics map, see StatsMixIn.update_stats>}}
+
+    The socket is non-blocking and read from a single green thread.  Every
+    time it becomes readable all queued datagrams, up to batch_size, are
+    drained and merged, so a burst of heartbeats results in one
+    update_health and one update_stats call.  In the merged health map the
+    "amphora-status" of every heartbeat is kept under "amphorae", keyed by
+    amphora id.  Heartbeats that are not JSON or whose health or stats map
+    is not shaped as described are dropped one by one and counted in
+    packets_malformed, so they can not fail the rest of their batch.
+
+    When several controllers receive the heartbeats, membership (a
+    ControllerMembership) restricts each of them to the amphorae it owns.
+    This assumes every amphora sends its heartbeats to every controller:
+    heartbeats of an amphora that reach only controllers not owning it are
+    dropped, and the amphora is never heard from.
+    """
+
+    def __init__(self, health_handler, stats_handler=None, ip=None,
+                 port=None, batch_size=None, rcvbuf=None, membership=None):
+        if ip is None:
+            ip = cfg.CONF.health_manager.bind_ip
+        if port is None:
+            port = cfg.CONF.health_manager.bind_port
+        if batch_size is None:
+            batch_size = cfg.CONF.health_manager.heartbeat_batch_size
+        if rcvbuf is None:
+            rcvbuf = cfg.CONF.health_manager.heartbeat_rcvbuf
+        self.health_handler = health_handler
+        self.stats_handler = stats_handler
+        self.ip = ip
+        self.port = port
+        self.batch_size = batch_size
+        self.rcvbuf = rcvbuf
+        self.membership = membership
+        self.sock = None
+        self.packets_received = 0
+        self.packets_malformed = 0
+        self.batches_dispatched = 0
+        self.heartbeats_not_owned = 0
+        self._running = False
+        self._thread = None
+
+    def bind(self):
+        family = socket.AF_INET6 if ':' in self.ip else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        sock.bind((self.ip, self.port))
+        sock.setblocking(False)
+        self.sock = sock
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def _decode(self, data, srcaddr):
+        try:
+            heartbeat = jsonutils.loads(data)
+            if not _valid(heartbeat):
+                raise ValueError(data)
+        except ValueError:
+            self.packets_malformed += 1
+            LOG.debug('Dropping malformed heartbeat from %s', srcaddr)
+            return None
+        return heartbeat
+
+    def receive(self):
+        """Returns the heartbeats already queued on the socket.
+
+        Never blocks; at most batch_size heartbeats are returned.
+        """
+        heartbeats = []
+        while len(heartbeats) < self.batch_size:
+            try:
+                data, srcaddr = self.sock.recvfrom(MAX_PACKET_SIZE)
+            except socket.error as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            self.packets_received += 1
+            heartbeat = self._decode(data, srcaddr)
+            if heartbeat is not None:
+                heartbeats.append(heartbeat)
+        return heartbeats
+
+    def dispatch(self, heartbeats):
+        """Merges heartbeats and passes them to the health/stats mixins."""
+        health = {}
+        stats = {}
+        for heartbeat in heartbeats:
+            if (self.membership and
+                    not self.membership.owns(heartbeat.get('id', ''))):
+                self.heartbeats_not_owned += 1
+                continue
+            amp_health = heartbeat.get('health')
+            if amp_health:
+                amp_status = amp_health.pop(constants.HEALTH_AMPHORA_STATUS,
+                                            None)
+                if amp_status is not None and 'id' in heartbeat:
+                    health.setdefault(constants.HEALTH_AMPHORAE, {})[
+                        heartbeat['id']] = amp_status
+                _merge_health(health, amp_health)
+            if heartbeat.get('stats'):
+                _merge_stats(stats, heartbeat['stats'])
+        if health:
+            self.health_handler.update_health(health)
+        if stats and self.stats_handler:
+            self.stats_handler.update_stats(stats)
+        self.batches_dispatched += 1
+
+    def run_once(self):
+        """Waits for the socket to become readable and handles one batch."""
+        hubs.trampoline(self.sock, read=True)
+        heartbeats = self.receive()
+        if heartbeats:
+            self.dispatch(heartbeats)
+
+    def _run(self):
+        while self._running:
+            try:
+                self.run_once()
+            except Exception:
+                LOG.exception(_('Failed to process amphora heartbeats'))
+
+    def start(self):
+        if self.sock is None:
+            self.bind()
+        self._running = True
+        self._thread = greenthread.spawn(self._run)
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.kill()
+            self._thread = None
+        if self.sock:
+            self.sock.close()
+            self.sock = None
@@ -0,0 +1,193 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import random
+
+import eventlet
+
+from octavia.amphorae.drivers import base as driver_base
+from octavia.amphorae.drivers import exceptions as driver_exceptions
+from octavia.common import constants
+from octavia.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+METHODS = ('update', 'suspend', 'enable', 'delete', 'info', 'get_metrics',
+           'get_health', 'get_diagnostics')
+
+CONSTANT = 'constant'
+UNIFORM = 'uniform'
+EXPONENTIAL = 'exponential'
+LOGNORMAL = 'lognormal'
+
+
+class Latency(object):
+    """A distribution of simulated call latencies in seconds.
+
+    :param kind: constant (a), uniform between a and b, exponential with
+                 mean a, or lognormal with mu a and sigma b
+    """
+
+    def __init__(self, kind=CONSTANT, a=0.0, b=0.0):
+        if kind not in (CONSTANT, UNIFORM, EXPONENTIAL, LOGNORMAL):
+            raise ValueError(kind)
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec):
+        """Builds a distribution from "kind[:a[:b]]", e.g. "uniform:0:1"."""
+        parts = spec.split(':')
+        return cls(parts[0], *[float(part) for part in parts[1:]])
+
+    def sample(self, rng):
+        if self.kind == UNIFORM:
+            return rng.uniform(self.a, self.b)
+        if self.kind == EXPONENTIAL:
+            return rng.expovariate(1.0 / self.a) if self.a else 0.0
+        if self.kind == LOGNORMAL:
+            return rng.lognormvariate(self.a, self.b)
+        return self.a
+
+
+class Behavior(object):
+    """How a simulated driver method behaves.
+
+    Every call sleeps for a latency drawn from latency.  With probability
+    failure_rate it then raises the method's driver exception and with
+    probability timeout_rate it hangs for hang_time seconds first and then
+    raises TimeOutException.
+    """
+
+    def __init__(self, latency=None, failure_rate=0.0, timeout_rate=0.0,
+                 hang_time=0.0):
+        self.latency = latency or Latency()
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.hang_time = hang_time
+
+
+class NoopAmphoraLoadBalancerDriver(driver_base.AmphoraLoadBalancerDriver):
+    """Simulates amphorae without touching any.
+
+    The driver tracks which listeners it configured, suspended or deleted
+    on each amphora and counts its calls, so tests can check what a
+    controller did.  Latencies, failures and timeouts can be injected per
+    method to load test controllers without VMs.
+
+    :param behavior: Behavior of every method not in behaviors
+    :param behaviors: dict mapping method names to their Behavior
+    :param seed: seed of the random source, for repeatable runs
+    """
+
+    def __init__(self, behavior=None, behaviors=None, seed=None,
+                 sleep=eventlet.sleep):
+        self.behavior = behavior or Behavior()
+        self.behaviors = behaviors or {}
+        for method in self.behaviors:
+            if method not in METHODS:
+                raise ValueError(method)
+        self.rng = random.Random(seed)
+        self.sleep = sleep
+        self.calls = collections.defaultdict(int)
+        self.failures = collections.defaultdict(int)
+        self.timeouts = collections.defaultdict(int)
+        self.listeners = {}
+
+    def _simulate(self, method, exception, **kwargs):
+        self.calls[method] += 1
+        behavior = self.behaviors.get(method, self.behavior)
+        latency = behavior.latency.sample(self.rng)
+        if latency > 0:
+            self.sleep(latency)
+        chance = self.rng.random()
+        if chance < behavior.timeout_rate:
+            self.timeouts[method] += 1
+            if behavior.hang_time > 0:
+                self.sleep(behavior.hang_time)
+            raise driver_exceptions.TimeOutException(
+                amphora_id=kwargs.get('amphora_id', kwargs.get('id')),
+                timeout=latency + behavior.hang_time)
+        if chance < behavior.timeout_rate + behavior.failure_rate:
+            self.failures[method] += 1
+            raise exception(**kwargs)
+
+    @staticmethod
+    def _amphorae(listener):
+        load_balancer = listener.load_balancer
+        return load_balancer.amphorae if load_balancer else []
+
+    def _set_state(self, listener, state):
+        for amphora in self._amphorae(listener):
+            listeners = self.listeners.setdefault(amphora.id, {})
+            if state is None:
+                listeners.pop(listener.id, None)
+            else:
+                listeners[listener.id] = (
+                    listener.load_balancer_id or amphora.load_balancer_id,
+                    state)
+
+    def update(self, listener, vip):
+        LOG.debug('Noop update of listener %s', listener.id)
+        self._simulate('update', driver_exceptions.ListenerProvisioningError,
+                       id=listener.id)
+        self._set_state(listener, constants.ACTIVE)
+
+    def suspend(self, listener, vip):
+        self._simulate('suspend', driver_exceptions.SuspendFailed,
+                       load_balancer_id=listener.load_balancer_id)
+        self._set_state(listener, constants.OFFLINE)
+
+    def enable(self, listener, vip):
+        self._simulate('enable', driver_exceptions.EnableFailed,
+                       load_balancer_id=listener.load_balancer_id)
+        self._set_state(listener, constants.ACTIVE)
+
+    def delete(self, listener, vip):
+        self._simulate('delete', driver_exceptions.DeleteFailed,
+                       load_balancer_id=listener.load_balancer_id)
+        self._set_state(listener, None)
+
+    def info(self, amphora):
+        self._simulate('info', driver_exceptions.InfoException,
+                       amphora_id=amphora.id)
+        return {'Rest Interface': '1.0', 'Amphorae': '1.0',
+                'packages': {'ha proxy': '1.5'}}
+
+    def get_metrics(self, amphora):
+        self._simulate('get_metrics', driver_exceptions.MetricsException,
+                       amphora_id=amphora.id)
+        return {}
+
+    def get_health(self, amphora):
+        self._simulate('get_health', driver_exceptions.InfoException,
+                       amphora_id=amphora.id)
+        load_balancers = {}
+        for listener_id, (load_balancer_id, state) in self.listeners.get(
+                amphora.id, {}).items():
+            load_balancer = load_balancers.setdefault(
+                load_balancer_id, {constants.HEALTH_LISTENERS: {}})
+            load_balancer[constants.HEALTH_LISTENERS][listener_id] = {
+                constants.HEALTH_LISTENER_STATUS: (
+                    constants.ONLINE if state == constants.ACTIVE
+                    else constants.OFFLINE)}
+        return {constants.HEALTH_AMPHORA_STATUS: constants.ONLINE,
+                constants.HEALTH_LOADBALANCERS: load_balancers}
+
+    def get_diagnostics(self, amphora):
+        self._simulate('get_diagnostics', driver_exceptions.InfoException,
+                       amphora_id=amphora.id)
+        return {}
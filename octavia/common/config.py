@@ -52,6 +52,27 @@ core_opts = [
                       "means no limit")),
     cfg.StrOpt('host', default=utils.get_hostname(),
                help=_("The hostname Octavia is running on")),
+    cfg.IntOpt('policy_cache_size', default=10000,
+               help=_("Maximum number of policy decisions cached")),
+    cfg.IntOpt('policy_reload_interval', default=5,
+               help=_("Seconds between checks of the policy file for "
+                      "changes")),
+    cfg.IntOpt('policy_http_timeout', default=5,
+               help=_("Seconds to wait for the server of http: policy "
+                      "checks before denying")),
+    cfg.IntOpt('policy_http_max_connections', default=10,
+               help=_("Maximum number of connections open to http: policy "
+                      "check servers")),
+    cfg.IntOpt('policy_http_cache_ttl', default=10,
+               help=_("Seconds the decisions of http: policy checks are "
+                      "cached")),
+    cfg.IntOpt('policy_http_batch_size', default=0,
+               help=_("Maximum number of http: policy checks sent in one "
+                      "request, 0 to send each on its own. Batching "
+                      "needs a server accepting a JSON list of checks")),
+    cfg.FloatOpt('policy_http_batch_window', default=0.01,
+                 help=_("Seconds http: policy checks wait to be sent "
+                        "together")),
     cfg.StrOpt('nova_url',
                default='http://127.0.0.1:8774/v2',
                help=_('URL for connection to nova')),
@@ -77,9 +98,133 @@ core_opts = [
 
 core_cli_opts = []
 
+health_manager_opts = [
+    cfg.StrOpt('bind_ip', default='0.0.0.0',
+               help=_('IP address the controller listens on for amphora '
+                      'heartbeats')),
+    cfg.IntOpt('bind_port', default=5555,
+               help=_('UDP port the controller listens on for amphora '
+                      'heartbeats')),
+    cfg.IntOpt('heartbeat_batch_size', default=1000,
+               help=_('Maximum number of heartbeats dispatched together')),
+    cfg.IntOpt('heartbeat_rcvbuf', default=4194304,
+               help=_('Receive buffer size in bytes of the heartbeat '
+                      'socket')),
+    cfg.IntOpt('heartbeat_interval', default=5,
+               help=_('Seconds an amphora in use may go without sending a '
+                      'heartbeat before it is considered stale')),
+    cfg.IntOpt('spare_heartbeat_interval', default=60,
+               help=_('Seconds a spare amphora may go without sending a '
+                      'heartbeat before it is considered stale')),
+    cfg.IntOpt('stats_flush_interval', default=10,
+               help=_('Seconds between writes of the accumulated listener '
+                      'statistics to the database')),
+]
+
+haproxy_amphora_opts = [
+    cfg.StrOpt('base_path', default='/var/lib/octavia',
+               help=_('Base directory for haproxy files on the amphora')),
+    cfg.IntOpt('bind_port', default=9443,
+               help=_('Port the amphora agent listens on')),
+    cfg.BoolOpt('use_ssl', default=True,
+                help=_('Use TLS to reach the amphora agent')),
+    cfg.StrOpt('client_cert',
+               help=_('Certificate and key file the controller presents to '
+                      'amphora agents')),
+    cfg.StrOpt('server_ca',
+               help=_('CA certificate file used to verify amphora agents; '
+                      'without it their certificates are not verified')),
+    cfg.IntOpt('connect_timeout', default=10,
+               help=_('Seconds to wait on the amphora agent socket')),
+    cfg.IntOpt('max_connections', default=1000,
+               help=_('Maximum number of open connections to amphora '
+                      'agents')),
+    cfg.IntOpt('max_idle_per_amphora', default=2,
+               help=_('Maximum number of idle connections kept open to '
+                      'each amphora agent')),
+    cfg.IntOpt('connection_idle_timeout', default=60,
+               help=_('Seconds an idle connection to an amphora agent is '
+                      'kept open')),
+]
+
+controller_worker_opts = [
+    cfg.IntOpt('workers', default=10,
+               help=_('Number of load balancers operated on concurrently '
+                      'by the controller worker')),
+    cfg.IntOpt('membership_interval', default=10,
+               help=_('Seconds between heartbeats of a controller to the '
+                      'controller membership table')),
+    cfg.IntOpt('membership_expiry', default=30,
+               help=_('Seconds without a heartbeat after which a controller '
+                      'is considered dead and its share is rebalanced')),
+    cfg.IntOpt('hash_ring_replicas', default=100,
+               help=_('Points per controller on the consistent hash ring '
+                      'that assigns amphorae and load balancers')),
+    cfg.IntOpt('lock_ttl', default=120,
+               help=_('Seconds after which a database lock held by a dead '
+                      'controller can be taken over')),
+    cfg.FloatOpt('lock_retry_interval', default=0.5,
+                 help=_('Seconds between attempts to take a database lock '
+                        'held by another controller')),
+    cfg.IntOpt('periodic_task_workers', default=10,
+               help=_('Maximum number of periodic tasks running at once')),
+    cfg.FloatOpt('periodic_task_jitter', default=0.1,
+                 help=_('Fraction of its interval a periodic task run is '
+                        'randomly delayed by, so controllers do not run '
+                        'the same task at the same moment')),
+    cfg.IntOpt('amp_fanout_concurrency', default=50,
+               help=_('Maximum number of amphora calls made concurrently')),
+    cfg.IntOpt('amp_call_timeout', default=30,
+               help=_('Seconds an amphora call may take before it is '
+                      'abandoned; the upper bound of adaptive timeouts')),
+    cfg.IntOpt('amp_breaker_failure_threshold', default=5,
+               help=_('Consecutive failed calls to an amphora that open its '
+                      'circuit breaker')),
+    cfg.IntOpt('amp_breaker_reset_timeout', default=30,
+               help=_('Seconds a circuit breaker stays open before a probe '
+                      'call is let through')),
+    cfg.FloatOpt('amp_timeout_percentile', default=99.0,
+                 help=_('Latency percentile adaptive amphora call timeouts '
+                        'are derived from')),
+    cfg.FloatOpt('amp_timeout_multiplier', default=3.0,
+                 help=_('Multiple of the latency percentile allowed before '
+                        'an amphora call times out')),
+    cfg.FloatOpt('amp_timeout_min', default=1.0,
+                 help=_('Lower bound in seconds of adaptive amphora call '
+                        'timeouts')),
+]
+
+house_keeping_opts = [
+    cfg.ListOpt('spare_amphora_flavors', default=[],
+                help=_('Compute flavors to keep spare amphorae of')),
+    cfg.IntOpt('spare_amphora_pool_size', default=0,
+               help=_('Minimum number of spare amphorae kept per compute '
+                      'flavor')),
+    cfg.IntOpt('spare_amphora_pool_max_size', default=20,
+               help=_('Maximum number of spare amphorae kept per compute '
+                      'flavor, including forecast demand')),
+    cfg.IntOpt('spare_check_interval', default=30,
+               help=_('Seconds between checks of the spare amphora pool')),
+    cfg.IntOpt('spare_build_rate', default=5,
+               help=_('Maximum number of spare amphorae started per check')),
+    cfg.IntOpt('spare_boot_time', default=60,
+               help=_('Initial estimate in seconds of the time an amphora '
+                      'takes to boot; refined from observed boots')),
+    cfg.IntOpt('spare_forecast_window', default=60,
+               help=_('Seconds of load balancer creations counted together '
+                      'when forecasting spare amphora demand')),
+    cfg.FloatOpt('spare_forecast_alpha', default=0.3,
+                 help=_('Weight of the newest window in the moving average '
+                        'of load balancer creations')),
+]
+
 # Register the configuration options
 cfg.CONF.register_opts(core_opts)
 cfg.CONF.register_cli_opts(core_cli_opts)
+cfg.CONF.register_opts(health_manager_opts, group='health_manager')
+cfg.CONF.register_opts(controller_worker_opts, group='controller_worker')
+cfg.CONF.register_opts(house_keeping_opts, group='house_keeping')
+cfg.CONF.register_opts(haproxy_amphora_opts, group='haproxy_amphora')
 
 # Ensure that the control exchange is set correctly
 messaging.set_transport_defaults(control_exchange='octavia')
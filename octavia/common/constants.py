@@ -50,3 +50,18 @@ OFFLINE = 'OFFLINE'
 DEGRADED = 'DEGRADED'
 ERROR = 'ERROR'
 SUPPORTED_OPERATING_STATUSES = (ONLINE, OFFLINE, DEGRADED, ERROR)
+
+MIN_WEIGHT = 0
+MAX_WEIGHT = 256
+
+# Keys of the health map reported by amphorae, see the amphora driver
+# interface spec.
+HEALTH_AMPHORA_STATUS = 'amphora-status'
+HEALTH_AMPHORAE = 'amphorae'
+HEALTH_LOADBALANCERS = 'loadbalancers'
+HEALTH_LOADBALANCER_STATUS = 'loadbalancer-status'
+HEALTH_LISTENERS = 'listeners'
+HEALTH_LISTENER_STATUS = 'listener-status'
+HEALTH_POOLS = 'pools'
+HEALTH_POOL_STATUS = 'pool-status'
+HEALTH_NODES = 'nodes'
@@ -15,26 +15,62 @@
 
 
 class BaseDataModel(object):
+    """Base of the data models.
+
+    Data models list their attributes in __slots__ so instances carry no
+    __dict__; the controller keeps a data model for every member and
+    amphora of the fleet.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def _get_fields(cls):
+        """Returns the attribute names of the class, computed once."""
+        fields = cls.__dict__.get('_fields')
+        if fields is None:
+            fields = []
+            for klass in reversed(cls.__mro__):
+                fields.extend(klass.__dict__.get('__slots__', ()))
+            fields = tuple(fields)
+            cls._fields = fields
+        return fields
 
     # NOTE(brandon-logan) This does not discover dicts for relationship
     # attributes.
     def to_dict(self):
         ret = {}
-        for attr in self.__dict__:
-            if (attr.startswith('_') or
-                    isinstance(getattr(self, attr), BaseDataModel)):
-                continue
-            ret[attr] = self.__dict__[attr]
+        for attr in self._get_fields():
+            value = getattr(self, attr)
+            if not isinstance(value, BaseDataModel):
+                ret[attr] = value
         return ret
 
     def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.to_dict() == other.to_dict()
-        return False
+        # Same result as comparing to_dict() of both, without building
+        # the dicts.
+        if not isinstance(other, self.__class__):
+            return False
+        for attr in self._get_fields():
+            mine = getattr(self, attr)
+            theirs = getattr(other, attr)
+            if mine is theirs:
+                continue
+            if isinstance(mine, BaseDataModel):
+                if not isinstance(theirs, BaseDataModel):
+                    return False
+            elif isinstance(theirs, BaseDataModel) or mine != theirs:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
 
 class SessionPersistence(BaseDataModel):
 
+    __slots__ = ('pool_id', 'type', 'cookie_name', 'pool')
+
     def __init__(self, pool_id=None, type=None, cookie_name=None,
                  pool=None):
         self.pool_id = pool_id
@@ -45,6 +81,9 @@ class SessionPersistence(BaseDataModel):
 
 class ListenerStatistics(BaseDataModel):
 
+    __slots__ = ('listener_id', 'bytes_in', 'bytes_out', 'active_connections',
+                 'total_connections', 'listener')
+
     def __init__(self, listener_id=None, bytes_in=None, bytes_out=None,
                  active_connections=None, total_connections=None,
                  listener=None):
@@ -58,6 +97,10 @@ class ListenerStatistics(BaseDataModel):
 
 class HealthMonitor(BaseDataModel):
 
+    __slots__ = ('id', 'tenant_id', 'pool_id', 'type', 'delay', 'timeout',
+                 'fall_threshold', 'rise_threshold', 'http_method', 'url_path',
+                 'expected_codes', 'enabled', 'pool')
+
     def __init__(self, id=None, tenant_id=None, pool_id=None, type=None,
                  delay=None, timeout=None, fall_threshold=None,
                  rise_threshold=None, http_method=None, url_path=None,
@@ -79,6 +122,10 @@ class HealthMonitor(BaseDataModel):
 
 class Pool(BaseDataModel):
 
+    __slots__ = ('id', 'tenant_id', 'name', 'description', 'protocol',
+                 'lb_algorithm', 'enabled', 'operating_status', 'members',
+                 'health_monitor', 'session_persistence', 'listener')
+
     def __init__(self, id=None, tenant_id=None, name=None, description=None,
                  protocol=None, lb_algorithm=None, enabled=None,
                  operating_status=None, members=None, health_monitor=None,
@@ -99,6 +146,9 @@ class Pool(BaseDataModel):
 
 class Member(BaseDataModel):
 
+    __slots__ = ('id', 'tenant_id', 'pool_id', 'ip_address', 'protocol_port',
+                 'weight', 'enabled', 'subnet_id', 'operating_status', 'pool')
+
     def __init__(self, id=None, tenant_id=None, pool_id=None, ip_address=None,
                  protocol_port=None, weight=None, enabled=None,
                  subnet_id=None, operating_status=None, pool=None):
@@ -116,6 +166,12 @@ class Member(BaseDataModel):
 
 class Listener(BaseDataModel):
 
+    __slots__ = ('id', 'tenant_id', 'name', 'description', 'default_pool_id',
+                 'load_balancer_id', 'protocol', 'protocol_port',
+                 'connection_limit', 'enabled', 'provisioning_status',
+                 'operating_status', 'default_tls_container_id', 'stats',
+                 'default_pool', 'load_balancer', 'sni_containers')
+
     def __init__(self, id=None, tenant_id=None, name=None, description=None,
                  default_pool_id=None, load_balancer_id=None, protocol=None,
                  protocol_port=None, connection_limit=None,
@@ -143,6 +199,10 @@ class Listener(BaseDataModel):
 
 class LoadBalancer(BaseDataModel):
 
+    __slots__ = ('id', 'tenant_id', 'name', 'description',
+                 'provisioning_status', 'operating_status', 'enabled', 'vip',
+                 'listeners', 'amphorae')
+
     def __init__(self, id=None, tenant_id=None, name=None, description=None,
                  provisioning_status=None, operating_status=None, enabled=None,
                  vip=None, listeners=None, amphorae=None):
@@ -160,6 +220,9 @@ class LoadBalancer(BaseDataModel):
 
 class Vip(BaseDataModel):
 
+    __slots__ = ('load_balancer_id', 'ip_address', 'net_port_id', 'subnet_id',
+                 'floating_ip_id', 'floating_ip_network_id', 'load_balancer')
+
     def __init__(self, load_balancer_id=None, ip_address=None,
                  net_port_id=None, subnet_id=None, floating_ip_id=None,
                  floating_ip_network_id=None, load_balancer=None):
@@ -174,6 +237,8 @@ class Vip(BaseDataModel):
 
 class SNI(BaseDataModel):
 
+    __slots__ = ('listener_id', 'position', 'listener', 'tls_container_id')
+
     def __init__(self, listener_id=None, position=None, listener=None,
                  tls_container_id=None):
         self.listener_id = listener_id
@@ -184,10 +249,35 @@ class SNI(BaseDataModel):
 
 class Amphora(BaseDataModel):
 
+    __slots__ = ('id', 'load_balancer_id', 'host_id', 'status',
+                 'lb_network_ip', 'compute_flavor', 'load_balancer')
+
     def __init__(self, id=None, load_balancer_id=None, host_id=None,
-                 status=None, load_balancer=None):
+                 status=None, lb_network_ip=None, compute_flavor=None,
+                 load_balancer=None):
         self.id = id
         self.load_balancer_id = load_balancer_id
         self.host_id = host_id
         self.status = status
-        self.load_balancer = load_balancer
\ No newline at end of file
+        self.lb_network_ip = lb_network_ip
+        self.compute_flavor = compute_flavor
+        self.load_balancer = load_balancer
+
+
+class Controller(BaseDataModel):
+
+    __slots__ = ('host', 'updated_at')
+
+    def __init__(self, host=None, updated_at=None):
+        self.host = host
+        self.updated_at = updated_at
+
+
+class DistributedLock(BaseDataModel):
+
+    __slots__ = ('name', 'owner', 'expires_at')
+
+    def __init__(self, name=None, owner=None, expires_at=None):
+        self.name = name
+        self.owner = owner
+        self.expires_at = expires_at
@@ -57,3 +57,13 @@ class NotFound(OctaviaException):
 
 class NotAuthorized(OctaviaException):
     message = _("Not authorized.")
+
+
+class DuplicateMemberEntry(OctaviaException):
+    message = _("Another member on pool %(pool_id)s is already using ip "
+                "%(ip_address)s on protocol_port %(protocol_port)d.")
+
+
+class LockTimeout(OctaviaException):
+    message = _("Timed out after %(timeout).1f seconds waiting for lock "
+                "%(name)s.")
@@ -0,0 +1,51 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import hashlib
+import struct
+
+
+def _hash(key):
+    return struct.unpack('>I', hashlib.md5(key).digest()[:4])[0]
+
+
+class HashRing(object):
+    """Consistent hash ring assigning keys to a set of nodes.
+
+    Each node is placed on the ring at replicas points and a key belongs
+    to the node of the first point at or after the key's hash.  Adding or
+    removing a node only moves the keys of the ring segments it gains or
+    loses, about 1/len(nodes) of all keys, and every process building a
+    ring from the same nodes assigns keys identically.
+    """
+
+    def __init__(self, nodes, replicas=100):
+        self.nodes = frozenset(nodes)
+        self.replicas = replicas
+        points = sorted((_hash(('%s-%d' % (node, i)).encode('utf-8')), node)
+                        for node in self.nodes for i in range(replicas))
+        self._hashes = [point for point, node in points]
+        self._nodes = [node for point, node in points]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get_node(self, key):
+        """Returns the node owning key, or None if the ring is empty."""
+        if not self._hashes:
+            return None
+        index = bisect.bisect_left(self._hashes,
+                                   _hash(key.encode('utf-8')))
+        return self._nodes[index % len(self._nodes)]
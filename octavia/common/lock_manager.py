@@ -0,0 +1,204 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Per-object locks for green threads, optionally backed by database rows.
+
+Unlike lockutils, which keeps a semaphore (and for external locks a file)
+for every name ever locked, a lock here only exists while a green thread
+holds or waits for it.
+"""
+
+import contextlib
+import time
+
+import eventlet
+from eventlet import semaphore
+from oslo.config import cfg
+
+from octavia.common import exceptions
+from octavia.db import api as db_api
+from octavia.db import repositories
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import uuidutils
+
+LOG = logging.getLogger(__name__)
+
+
+class _Lock(object):
+
+    def __init__(self):
+        self.semaphore = semaphore.Semaphore()
+        self.refs = 0
+
+
+class DBLock(object):
+    """Locks shared by controllers as rows of the distributed_lock table.
+
+    A lock expires ttl seconds after it was taken so the locks of a dead
+    controller are taken over; holders of long operations must call
+    refresh() in time.  Waiting polls every retry_interval seconds.
+    """
+
+    def __init__(self, owner=None, ttl=None, retry_interval=None,
+                 session=None, clock=time.time):
+        if owner is None:
+            owner = '%s:%s' % (cfg.CONF.host, uuidutils.generate_uuid())
+        if ttl is None:
+            ttl = cfg.CONF.controller_worker.lock_ttl
+        if retry_interval is None:
+            retry_interval = cfg.CONF.controller_worker.lock_retry_interval
+        self.owner = owner
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.clock = clock
+        self._session = session
+        self.lock_repo = repositories.DistributedLockRepository()
+
+    def _get_session(self):
+        return self._session or db_api.get_session()
+
+    def acquire(self, name, timeout=None):
+        """Takes the lock, waiting up to timeout seconds or forever.
+
+        :returns: True if the lock was taken.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        while not self.lock_repo.acquire(self._get_session(), name,
+                                         self.owner, self.ttl):
+            if deadline is not None and self.clock() >= deadline:
+                return False
+            eventlet.sleep(self.retry_interval)
+        return True
+
+    def refresh(self, name):
+        """Extends a held lock by ttl seconds.
+
+        :returns: False if the lock expired and was taken over meanwhile.
+        """
+        return self.lock_repo.acquire(self._get_session(), name, self.owner,
+                                      self.ttl)
+
+    def release(self, name):
+        if not self.lock_repo.release(self._get_session(), name,
+                                      self.owner):
+            LOG.warn(_('Lock %s expired before it was released'), name)
+
+
+class LockManager(object):
+    """Reference counted locks keyed by object id.
+
+    A lock is created when the first green thread asks for it and dropped
+    when the last one releases it, so memory use follows the number of
+    objects being worked on rather than the size of the fleet.  With
+    distributed, a DBLock, the lock is additionally taken in the database
+    once the local lock is held, so only one green thread per process
+    polls the database for it.
+
+    Wait and hold times of every acquisition are accumulated for
+    get_metrics().
+    """
+
+    def __init__(self, distributed=None, clock=time.time):
+        self.distributed = distributed
+        self.clock = clock
+        self._locks = {}
+        self.acquisitions = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.hold_time = 0.0
+        self.max_hold_time = 0.0
+
+    def __len__(self):
+        return len(self._locks)
+
+    def locked(self, key):
+        lock = self._locks.get(key)
+        return lock is not None and lock.semaphore.locked()
+
+    def _acquire(self, lock, key, timeout):
+        start = self.clock()
+        if lock.semaphore.locked():
+            self.contended += 1
+        if not lock.semaphore.acquire(timeout=timeout):
+            return False
+        if self.distributed is not None:
+            remaining = (None if timeout is None
+                         else max(timeout - (self.clock() - start), 0))
+            acquired = False
+            try:
+                acquired = self.distributed.acquire(key, remaining)
+            finally:
+                if not acquired:
+                    lock.semaphore.release()
+            if not acquired:
+                return False
+        wait = self.clock() - start
+        self.wait_time += wait
+        self.max_wait_time = max(self.max_wait_time, wait)
+        return True
+
+    def _unref(self, lock, key):
+        lock.refs -= 1
+        if not lock.refs:
+            del self._locks[key]
+
+    @contextlib.contextmanager
+    def lock(self, key, timeout=None):
+        """Holds the lock of key for the duration of the with block.
+
+        :param timeout: seconds to wait for the lock, forever if None
+        :raises LockTimeout: if the lock was not taken within timeout
+        """
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = _Lock()
+        lock.refs += 1
+        try:
+            acquired = self._acquire(lock, key, timeout)
+        except BaseException:
+            # eventlet.Timeout and GreenletExit included.
+            self._unref(lock, key)
+            raise
+        if not acquired:
+            self.timeouts += 1
+            self._unref(lock, key)
+            raise exceptions.LockTimeout(name=key, timeout=timeout)
+        self.acquisitions += 1
+        start = self.clock()
+        try:
+            yield
+        finally:
+            hold = self.clock() - start
+            self.hold_time += hold
+            self.max_hold_time = max(self.max_hold_time, hold)
+            try:
+                if self.distributed is not None:
+                    self.distributed.release(key)
+            finally:
+                lock.semaphore.release()
+                self._unref(lock, key)
+
+    def get_metrics(self):
+        acquisitions = self.acquisitions or 1
+        return {'locks': len(self._locks),
+                'acquisitions': self.acquisitions,
+                'contended': self.contended,
+                'timeouts': self.timeouts,
+                'mean_wait_time': self.wait_time / acquisitions,
+                'max_wait_time': self.max_wait_time,
+                'mean_hold_time': self.hold_time / acquisitions,
+                'max_hold_time': self.max_hold_time}
@@ -0,0 +1,208 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+The members of a pool stored column by column.
+
+Statuses and enabled flags are bytearrays and weights and ports arrays, so
+counting and scanning them runs in C rather than in a Python loop over
+Member objects.
+"""
+
+import array
+
+import six
+
+from octavia.common import constants
+from octavia.common import data_models
+
+# Code of each operating status in the status column; 0 is no status.
+_STATUSES = (None,) + constants.SUPPORTED_OPERATING_STATUSES
+_STATUS_CODES = dict((status, code) for code, status in enumerate(_STATUSES))
+# Code of disabled members in the column of enabled members' statuses.
+_DISABLED = len(_STATUSES)
+_ENABLED = (False, True, None)
+_ENABLED_CODES = {False: 0, True: 1, None: 2}
+# None in the integer columns.
+_NULL = -1
+
+
+def _status_code(status):
+    try:
+        return _STATUS_CODES[status]
+    except KeyError:
+        raise ValueError(_('Unknown operating status %s') % status)
+
+
+def _scaled_weight(weight, factor):
+    if weight in (_NULL, constants.MIN_WEIGHT):
+        return weight
+    # Rounding never takes a member out of rotation.
+    return min(max(int(round(weight * factor)), 1), constants.MAX_WEIGHT)
+
+
+class MemberTable(object):
+    """Members of one pool as parallel columns.
+
+    Row i of ids, tenant_ids, subnet_ids, ip_addresses, protocol_ports,
+    weights, enabled and statuses describes the same member.  Rows are
+    added and updated from Member data models with put() and turned back
+    into Members with get_member(); removing a member moves the last row
+    into its place.
+    Members with enabled False do not count towards the pool's status.
+    """
+
+    def __init__(self, pool_id=None, members=()):
+        self.pool_id = pool_id
+        self.ids = []
+        self.tenant_ids = []
+        self.subnet_ids = []
+        self.ip_addresses = []
+        self.protocol_ports = array.array('l')
+        self.weights = array.array('l')
+        self.enabled = bytearray()
+        self.statuses = bytearray()
+        # The status code of enabled members and _DISABLED for others.
+        self._active = bytearray()
+        self._rows = {}
+        for member in members:
+            self.put(member)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, member_id):
+        return member_id in self._rows
+
+    def _columns(self):
+        return (self.ids, self.tenant_ids, self.subnet_ids,
+                self.ip_addresses, self.protocol_ports, self.weights,
+                self.enabled, self.statuses, self._active)
+
+    def put(self, member):
+        """Adds a member, or updates the row of a member already held."""
+        status = _status_code(member.operating_status)
+        enabled = _ENABLED_CODES[member.enabled]
+        values = (member.id, member.tenant_id, member.subnet_id,
+                  member.ip_address,
+                  _NULL if member.protocol_port is None
+                  else member.protocol_port,
+                  _NULL if member.weight is None else member.weight,
+                  enabled, status,
+                  _DISABLED if member.enabled is False else status)
+        row = self._rows.get(member.id)
+        if row is None:
+            self._rows[member.id] = len(self.ids)
+            for column, value in zip(self._columns(), values):
+                column.append(value)
+        else:
+            for column, value in zip(self._columns(), values):
+                column[row] = value
+
+    def remove(self, member_id):
+        row = self._rows.pop(member_id)
+        last = len(self.ids) - 1
+        for column in self._columns():
+            if row != last:
+                column[row] = column[last]
+            column.pop()
+        if row != last:
+            self._rows[self.ids[row]] = row
+
+    def get_member(self, member_id):
+        """Returns the member as a Member data model."""
+        row = self._rows[member_id]
+        port = self.protocol_ports[row]
+        weight = self.weights[row]
+        return data_models.Member(
+            id=member_id, tenant_id=self.tenant_ids[row],
+            pool_id=self.pool_id, subnet_id=self.subnet_ids[row],
+            ip_address=self.ip_addresses[row],
+            protocol_port=None if port == _NULL else port,
+            weight=None if weight == _NULL else weight,
+            enabled=_ENABLED[self.enabled[row]],
+            operating_status=_STATUSES[self.statuses[row]])
+
+    def set_status(self, member_id, status):
+        row = self._rows[member_id]
+        code = _status_code(status)
+        self.statuses[row] = code
+        if self._active[row] != _DISABLED:
+            self._active[row] = code
+
+    def update_statuses(self, statuses):
+        """Applies a {member_id: operating_status} dict.
+
+        Members not in the table are ignored.
+        :returns: the number of members whose status changed
+        """
+        changed = 0
+        for member_id, status in six.iteritems(statuses):
+            row = self._rows.get(member_id)
+            if row is not None and self.statuses[row] != _status_code(status):
+                self.set_status(member_id, status)
+                changed += 1
+        return changed
+
+    def set_enabled(self, member_id, enabled):
+        row = self._rows[member_id]
+        self.enabled[row] = _ENABLED_CODES[enabled]
+        self._active[row] = (_DISABLED if enabled is False
+                             else self.statuses[row])
+
+    def count(self, status, enabled_only=True):
+        """Counts the members with status, only enabled ones by default."""
+        column = self._active if enabled_only else self.statuses
+        return column.count(six.int2byte(_status_code(status)))
+
+    def count_enabled(self):
+        return len(self._active) - self._active.count(
+            six.int2byte(_DISABLED))
+
+    def member_ids(self, status, enabled_only=True):
+        """Returns the ids of the members with status."""
+        column = self._active if enabled_only else self.statuses
+        code = six.int2byte(_status_code(status))
+        ids = []
+        row = column.find(code)
+        while row != -1:
+            ids.append(self.ids[row])
+            row = column.find(code, row + 1)
+        return ids
+
+    def operating_status(self):
+        """Derives the operating status of the pool from its members.
+
+        ONLINE if all enabled members are ONLINE, DEGRADED if only some
+        are and OFFLINE if none are or no member is enabled.
+        """
+        online = self.count(constants.ONLINE)
+        if not online:
+            return constants.OFFLINE
+        if online == self.count_enabled():
+            return constants.ONLINE
+        return constants.DEGRADED
+
+    def scale_weights(self, factor):
+        """Multiplies every weight by factor.
+
+        Weights are rounded and capped at MAX_WEIGHT; a weight above 0
+        stays at least 1 and a weight of 0 stays 0.
+        """
+        if factor < 0:
+            raise ValueError(_('Weights can not be scaled by %s') % factor)
+        scaled = dict((weight, _scaled_weight(weight, factor))
+                      for weight in set(self.weights))
+        self.weights = array.array('l', map(scaled.__getitem__,
+                                            self.weights))
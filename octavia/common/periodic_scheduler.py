@@ -0,0 +1,235 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Runs periodic tasks concurrently, each on its own schedule.
+
+PeriodicTasks.run_periodic_tasks runs every due task one after the other,
+so one slow task delays all others.  The scheduler here starts every task
+in its own green thread when it is due.
+"""
+
+import functools
+import heapq
+import itertools
+import math
+import random
+import time
+
+import eventlet
+from eventlet import queue
+from oslo.config import cfg
+
+from octavia.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class PeriodicTask(object):
+    """A function run every spacing seconds and its run statistics.
+
+    lag is how late a run started after it was due and skipped counts the
+    runs dropped because max_concurrency runs of the task were still busy
+    or the scheduler fell more than a period behind.
+    """
+
+    def __init__(self, name, func, spacing, priority, max_concurrency,
+                 jitter):
+        self.name = name
+        self.func = func
+        self.spacing = spacing
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.base = None
+        self.due = None
+        self.active = 0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_duration = None
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def get_metrics(self):
+        runs = self.runs or 1
+        return {'runs': self.runs,
+                'failures': self.failures,
+                'skipped': self.skipped,
+                'active': self.active,
+                'last_duration': self.last_duration,
+                'mean_duration': self.total_duration / runs,
+                'max_duration': self.max_duration,
+                'mean_lag': self.total_lag / runs,
+                'max_lag': self.max_lag}
+
+
+class PeriodicScheduler(object):
+    """Starts periodic tasks on their own deadlines.
+
+    Every task is due each spacing seconds on a fixed grid, so a slow run
+    does not push back later runs, plus a random offset of up to jitter
+    times spacing to keep controllers started together from running the
+    same task at the same moment.  Due tasks are started in priority
+    order, lowest first, on a pool of workers green threads; when the
+    pool is busy higher priority tasks get the next free worker.  A task
+    never runs more than its max_concurrency times at once: a run that
+    comes due while that many are still busy is skipped.
+    """
+
+    def __init__(self, workers=None, jitter=None, clock=time.time,
+                 rng=None):
+        if workers is None:
+            workers = cfg.CONF.controller_worker.periodic_task_workers
+        if jitter is None:
+            jitter = cfg.CONF.controller_worker.periodic_task_jitter
+        self.workers = workers
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.tasks = {}
+        self._heap = []
+        self._order = itertools.count()
+        self._pool = eventlet.GreenPool(workers)
+        self._wakeup = queue.LightQueue()
+        self._thread = None
+
+    def _offset(self, task):
+        return self.rng.uniform(0, task.jitter * task.spacing)
+
+    def _push(self, task):
+        heapq.heappush(self._heap,
+                       (task.due, task.priority, next(self._order), task))
+
+    def add_task(self, name, func, spacing, priority=0, max_concurrency=1,
+                 jitter=None, run_immediately=False):
+        """Schedules func() every spacing seconds.
+
+        :param priority: tasks due together start lowest priority first
+        :param jitter: fraction of spacing a run is randomly delayed by,
+                       the scheduler's jitter by default
+        :param run_immediately: run first now instead of after spacing
+        :raises ValueError: if spacing is not positive
+        """
+        if spacing <= 0:
+            raise ValueError(_('Spacing of periodic task %(name)s must be '
+                               'positive, not %(spacing)s') %
+                             {'name': name, 'spacing': spacing})
+        task = PeriodicTask(name, func, spacing, priority, max_concurrency,
+                            self.jitter if jitter is None else jitter)
+        task.base = self.clock() + (0 if run_immediately else spacing)
+        task.due = task.base + self._offset(task)
+        self.tasks[name] = task
+        self._push(task)
+        self._wakeup.put(None)
+        return task
+
+    def add_periodic_tasks(self, periodic_tasks, context=None):
+        """Schedules the tasks of a PeriodicTasks instance.
+
+        Tasks decorated with periodic_task keep their spacing and
+        run_immediately; a _periodic_priority attribute sets their
+        priority.
+        """
+        for name, method in periodic_tasks._periodic_tasks:
+            self.add_task(
+                '.'.join([periodic_tasks.__class__.__name__, name]),
+                functools.partial(method, periodic_tasks, context),
+                periodic_tasks._periodic_spacing[name],
+                priority=getattr(method, '_periodic_priority', 0),
+                run_immediately=method._periodic_immediate)
+
+    def _run(self, task, due):
+        start = self.clock()
+        lag = start - due
+        task.total_lag += lag
+        task.max_lag = max(task.max_lag, lag)
+        try:
+            task.func()
+        except Exception:
+            task.failures += 1
+            LOG.exception(_('Periodic task %s failed'), task.name)
+        finally:
+            duration = self.clock() - start
+            task.active -= 1
+            task.runs += 1
+            task.last_duration = duration
+            task.total_duration += duration
+            task.max_duration = max(task.max_duration, duration)
+
+    def _reschedule(self, task, now):
+        task.base += task.spacing
+        if task.base <= now:
+            # More than a period behind: drop the missed runs.
+            missed = int(math.floor((now - task.base) / task.spacing)) + 1
+            task.skipped += missed
+            task.base += missed * task.spacing
+        task.due = task.base + self._offset(task)
+        self._push(task)
+
+    def run_pending(self):
+        """Starts every task due now.
+
+        :returns: seconds until the next task is due, or None
+        """
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        due.sort(key=lambda entry: (entry[1], entry[0]))
+        for due_at, priority, order, task in due:
+            if self.tasks.get(task.name) is not task:
+                continue
+            if task.active >= task.max_concurrency:
+                task.skipped += 1
+                LOG.warn(_('Skipping run of periodic task %s, the previous '
+                           'run is still busy'), task.name)
+            else:
+                task.active += 1
+                self._pool.spawn_n(self._run, task, due_at)
+            self._reschedule(task, now)
+        if not self._heap:
+            return None
+        return max(self._heap[0][0] - self.clock(), 0)
+
+    def remove_task(self, name):
+        self.tasks.pop(name, None)
+
+    def _loop(self):
+        while True:
+            try:
+                idle = self.run_pending()
+            except Exception:
+                LOG.exception(_('Periodic task scheduler failed'))
+                idle = 1
+            try:
+                self._wakeup.get(timeout=idle)
+            except queue.Empty:
+                pass
+
+    def start(self):
+        self._thread = eventlet.spawn(self._loop)
+
+    def stop(self, graceful=True):
+        if self._thread:
+            self._thread.kill()
+            self._thread = None
+        if graceful:
+            self._pool.waitall()
+
+    def get_metrics(self):
+        return dict((name, task.get_metrics())
+                    for name, task in self.tasks.items())
@@ -0,0 +1,550 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Policy enforcement with compiled rules and cached decisions.
+"""
+
+import ast
+import re
+import socket
+import time
+
+import eventlet
+from eventlet import event
+from eventlet import semaphore
+from oslo.config import cfg
+import six
+from six.moves import http_client
+import six.moves.urllib.parse as urlparse
+
+from octavia.openstack.common import jsonutils
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import policy
+
+LOG = logging.getLogger(__name__)
+
+# Names of the target fields a GenericCheck match interpolates.
+_TARGET_FIELD = re.compile(r'%\(([^)]+)\)')
+_MISSING = object()
+
+
+class CompiledRule(object):
+    """A check tree turned into nested closures.
+
+    func(target, creds) gives the same result as the check.  A rule only
+    depends on the credential fields in cred_keys and the target fields
+    in target_keys; it is cacheable unless it contains checks whose
+    outcome depends on anything else, such as http: checks.
+    """
+
+    def __init__(self, func, target_keys=(), cred_keys=(), cacheable=True):
+        self.func = func
+        self.target_keys = tuple(sorted(set(target_keys)))
+        self.cred_keys = tuple(sorted(set(cred_keys)))
+        self.cacheable = cacheable
+
+
+def _constant(value):
+    return CompiledRule(lambda target, creds: value)
+
+
+def _merge(children, func):
+    return CompiledRule(
+        func,
+        frozenset().union(*[child.target_keys for child in children]),
+        frozenset().union(*[child.cred_keys for child in children]),
+        all(child.cacheable for child in children))
+
+
+class HttpCheckClient(object):
+    """Evaluates http: checks over pooled keep-alive connections.
+
+    A check is posted like HttpCheck does and is granted if the server
+    answers "True".  Connections are reused, at most max_connections
+    requests are in flight and a server not answering within timeout
+    seconds denies the check.  Decisions are cached for cache_ttl seconds
+    and identical checks in flight share one request.
+
+    With batch_size above 1, checks against the same URL wait up to
+    batch_window seconds and are sent together, as a JSON list of
+    {"target": ..., "credentials": ...} objects answered by a JSON list
+    of booleans.  A check alone in its batch is posted as usual.
+    """
+
+    def __init__(self, timeout=None, max_connections=None, cache_ttl=None,
+                 cache_size=None, batch_size=None, batch_window=None,
+                 clock=time.time):
+        if timeout is None:
+            timeout = cfg.CONF.policy_http_timeout
+        if max_connections is None:
+            max_connections = cfg.CONF.policy_http_max_connections
+        if cache_ttl is None:
+            cache_ttl = cfg.CONF.policy_http_cache_ttl
+        if cache_size is None:
+            cache_size = cfg.CONF.policy_cache_size
+        if batch_size is None:
+            batch_size = cfg.CONF.policy_http_batch_size
+        if batch_window is None:
+            batch_window = cfg.CONF.policy_http_batch_window
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.clock = clock
+        self.cache_size = cache_size
+        self._slots = semaphore.Semaphore(max_connections)
+        self._idle = {}
+        self._cache = {}
+        self._in_flight = {}
+        self._pending = {}
+        self.open_connections = 0
+        self.requests = 0
+        self.batched_checks = 0
+        self.hits = 0
+        self.errors = 0
+
+    def check(self, url, target, creds):
+        """Asks the server at url whether creds may act on target."""
+        key = (url, jsonutils.dumps(target, sort_keys=True),
+               jsonutils.dumps(creds, sort_keys=True))
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > self.clock():
+            self.hits += 1
+            return cached[1]
+        waiter = self._in_flight.get(key)
+        if waiter is None:
+            waiter = self._in_flight[key] = event.Event()
+            if self.batch_size > 1:
+                self._queue(url, key)
+            else:
+                self._resolve(url, [key])
+        return waiter.wait()
+
+    def _queue(self, url, key):
+        pending = self._pending.setdefault(url, [])
+        pending.append(key)
+        if len(pending) >= self.batch_size:
+            del self._pending[url]
+            eventlet.spawn_n(self._resolve, url, pending)
+        elif len(pending) == 1:
+            eventlet.spawn_after(self.batch_window, self._flush, url,
+                                 pending)
+
+    def _flush(self, url, pending):
+        # The batch may have been sent already for being full.
+        if self._pending.get(url) is pending:
+            del self._pending[url]
+            self._resolve(url, pending)
+
+    def _resolve(self, url, keys):
+        results = None
+        try:
+            if len(keys) == 1:
+                results = [self._post_check(url, keys[0])]
+            else:
+                results = self._post_batch(url, keys)
+        except (http_client.HTTPException, socket.error, ValueError) as e:
+            self.errors += 1
+            LOG.warn(_('Policy check at %(url)s failed: %(error)s'),
+                     {'url': url, 'error': e})
+        finally:
+            # Waiters are woken on every exit, eventlet.Timeout included,
+            # so no later identical check waits on a dead request.
+            if results is not None:
+                self._store(keys, results)
+            for i, key in enumerate(keys):
+                waiter = self._in_flight.pop(key)
+                waiter.send(False if results is None else results[i])
+
+    def _store(self, keys, results):
+        expires = self.clock() + self.cache_ttl
+        if len(self._cache) + len(keys) > self.cache_size:
+            self._purge(expires - self.cache_ttl)
+        for key, result in zip(keys, results):
+            self._cache[key] = (expires, result)
+
+    def _purge(self, now):
+        for key, (expires, result) in list(self._cache.items()):
+            if expires <= now:
+                del self._cache[key]
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+
+    def _post_check(self, url, key):
+        body = urlparse.urlencode({'target': key[1], 'credentials': key[2]})
+        status, data = self._post(url, body,
+                                  'application/x-www-form-urlencoded')
+        return status == 200 and data == 'True'
+
+    def _post_batch(self, url, keys):
+        body = '[%s]' % ', '.join('{"target": %s, "credentials": %s}' %
+                                  (key[1], key[2]) for key in keys)
+        status, data = self._post(url, body, 'application/json')
+        if status != 200:
+            raise ValueError(_('Status %d') % status)
+        results = jsonutils.loads(data)
+        if not isinstance(results, list) or len(results) != len(keys):
+            raise ValueError(_('Expected a list of %d decisions') %
+                             len(keys))
+        self.batched_checks += len(keys)
+        return [result is True for result in results]
+
+    def _get(self, address):
+        idle = self._idle.get(address)
+        if idle:
+            return idle.pop()
+        self.open_connections += 1
+        return http_client.HTTPConnection(address[0], address[1],
+                                          timeout=self.timeout)
+
+    def _put(self, conn):
+        if conn.sock is None:
+            self._close(conn)
+        else:
+            self._idle.setdefault((conn.host, conn.port), []).append(conn)
+
+    def _close(self, conn):
+        conn.close()
+        self.open_connections -= 1
+
+    def _post(self, url, body, content_type):
+        parts = urlparse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        address = (parts.hostname, parts.port or http_client.HTTP_PORT)
+        headers = {'Content-Type': content_type}
+        # Connections are only opened while fewer than max_connections
+        # requests are in flight, so no more are ever kept per server.
+        if not self._slots.acquire(timeout=self.timeout):
+            raise socket.timeout(_('No connection available'))
+        try:
+            self.requests += 1
+            # The server may have closed a pooled connection while it was
+            # idle; such a request is retried once on a new connection.
+            for attempt in range(2):
+                conn = self._get(address)
+                reused = conn.sock is not None
+                try:
+                    conn.request('POST', path, body, headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                except socket.timeout:
+                    self._close(conn)
+                    raise
+                except (http_client.HTTPException, socket.error):
+                    self._close(conn)
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                self._put(conn)
+                return response.status, data
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        for idle in self._idle.values():
+            while idle:
+                self._close(idle.pop())
+        self._idle.clear()
+
+    def get_metrics(self):
+        return {'open_connections': self.open_connections,
+                'requests': self.requests,
+                'batched_checks': self.batched_checks,
+                'cached_decisions': len(self._cache),
+                'hits': self.hits,
+                'errors': self.errors}
+
+
+class RuleCompiler(object):
+    """Compiles the checks of a Rules mapping.
+
+    Rules referenced with rule: are compiled once and called directly, so
+    evaluating a rule does not look anything up in the Rules mapping.
+    """
+
+    def __init__(self, rules, enforcer):
+        self.rules = rules
+        self.enforcer = enforcer
+        self.compiled = {}
+        self._compiling = set()
+
+    def compile_rule(self, name):
+        """Compiles the rule called name.
+
+        :raises KeyError: if there is no such rule and no default rule
+        """
+        compiled = self.compiled.get(name)
+        if compiled is None:
+            check = self.rules[name]
+            self._compiling.add(name)
+            try:
+                compiled = self.compile(check)
+            finally:
+                self._compiling.discard(name)
+            self.compiled[name] = compiled
+        return compiled
+
+    def compile(self, check):
+        if isinstance(check, policy.TrueCheck):
+            return _constant(True)
+        if isinstance(check, policy.FalseCheck):
+            return _constant(False)
+        if isinstance(check, policy.NotCheck):
+            return self._compile_not(check)
+        if isinstance(check, policy.AndCheck):
+            return self._compile_and(check)
+        if isinstance(check, policy.OrCheck):
+            return self._compile_or(check)
+        if isinstance(check, policy.RuleCheck):
+            return self._compile_rule_check(check)
+        if isinstance(check, policy.RoleCheck):
+            return self._compile_role(check)
+        if isinstance(check, policy.GenericCheck):
+            return self._compile_generic(check)
+        if isinstance(check, policy.HttpCheck):
+            return self._compile_http(check)
+        # Registered custom checks are called as they are.
+        enforcer = self.enforcer
+        return CompiledRule(lambda target, creds: check(target, creds,
+                                                        enforcer),
+                            cacheable=False)
+
+    def _flatten(self, check, check_class):
+        # (a and (b and c)) is evaluated as (a and b and c).
+        children = []
+        for rule in check.rules:
+            if isinstance(rule, check_class):
+                children.extend(self._flatten(rule, check_class))
+            else:
+                children.append(self.compile(rule))
+        return children
+
+    def _compile_not(self, check):
+        inner = self.compile(check.rule)
+        func = inner.func
+        return _merge([inner], lambda target, creds: not func(target, creds))
+
+    def _compile_and(self, check):
+        children = self._flatten(check, policy.AndCheck)
+        if len(children) == 1:
+            return children[0]
+        funcs = tuple(child.func for child in children)
+
+        def check_all(target, creds):
+            for func in funcs:
+                if not func(target, creds):
+                    return False
+            return True
+        return _merge(children, check_all)
+
+    def _compile_or(self, check):
+        children = self._flatten(check, policy.OrCheck)
+        if len(children) == 1:
+            return children[0]
+        funcs = tuple(child.func for child in children)
+
+        def check_any(target, creds):
+            for func in funcs:
+                if func(target, creds):
+                    return True
+            return False
+        return _merge(children, check_any)
+
+    def _compile_rule_check(self, check):
+        if check.match in self._compiling:
+            # A rule referencing itself: keep the recursive lookup.
+            enforcer = self.enforcer
+            return CompiledRule(lambda target, creds: check(target, creds,
+                                                            enforcer),
+                                cacheable=False)
+        try:
+            referenced = self.compile_rule(check.match)
+        except KeyError:
+            return _constant(False)
+        func = referenced.func
+
+        def check_rule(target, creds):
+            # Like RuleCheck, a KeyError while evaluating fails the rule.
+            try:
+                return func(target, creds)
+            except KeyError:
+                return False
+        return _merge([referenced], check_rule)
+
+    def _compile_role(self, check):
+        role = check.match.lower()
+
+        def has_role(target, creds):
+            return role in [r.lower() for r in creds['roles']]
+        return CompiledRule(has_role, cred_keys=('roles',))
+
+    def _compile_generic(self, check):
+        match = check.match
+        target_keys = _TARGET_FIELD.findall(match)
+        try:
+            literal = six.text_type(ast.literal_eval(check.kind))
+        except ValueError:
+            literal = None
+        kind = check.kind
+
+        def generic(target, creds):
+            try:
+                value = match % target
+            except KeyError:
+                return False
+            if literal is not None:
+                return value == literal
+            try:
+                return value == six.text_type(creds[kind])
+            except KeyError:
+                return False
+        return CompiledRule(generic, target_keys,
+                            () if literal is not None else (kind,))
+
+    def _compile_http(self, check):
+        if self.enforcer.http_client is None:
+            self.enforcer.http_client = HttpCheckClient()
+        client = self.enforcer.http_client
+        url = 'http:' + check.match
+
+        def remote(target, creds):
+            return client.check(url % target, target, creds)
+        # The client caches these decisions for a limited time itself.
+        return CompiledRule(remote, cacheable=False)
+
+
+class CachingEnforcer(policy.Enforcer):
+    """Enforcer evaluating compiled rules and caching their decisions.
+
+    Rules are compiled when they are first enforced after a (re)load.
+    Decisions of cacheable rules are cached, keyed by the rule and the
+    values of only the credential and target fields the rule reads; the
+    cache is emptied when it reaches cache_size entries, which is cheaper
+    than LRU bookkeeping for decisions this small.  The policy file is
+    checked for changes at most every reload_interval seconds instead of
+    on every call; a reload drops the compiled rules and the cache.
+
+    http: checks are evaluated by http_client, an HttpCheckClient created
+    from the configuration by default.
+    """
+
+    def __init__(self, policy_file=None, rules=None, default_rule=None,
+                 use_conf=True, cache_size=None, reload_interval=None,
+                 clock=time.time, http_client=None):
+        if cache_size is None:
+            cache_size = cfg.CONF.policy_cache_size
+        if reload_interval is None:
+            reload_interval = cfg.CONF.policy_reload_interval
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self.http_client = http_client
+        self._next_reload_check = None
+        self.hits = 0
+        self.misses = 0
+        super(CachingEnforcer, self).__init__(policy_file, rules,
+                                              default_rule, use_conf)
+        self._reset()
+
+    def _reset(self):
+        self._compiler = RuleCompiler(self.rules, self)
+        self._cache = {}
+
+    def set_rules(self, rules, overwrite=True, use_conf=False):
+        super(CachingEnforcer, self).set_rules(rules, overwrite, use_conf)
+        self._reset()
+
+    def load_rules(self, force_reload=False):
+        now = self.clock()
+        if (not force_reload and self.rules and
+                self._next_reload_check is not None and
+                now < self._next_reload_check):
+            return
+        self._next_reload_check = now + self.reload_interval
+        use_conf = self.use_conf or force_reload
+        super(CachingEnforcer, self).load_rules(force_reload)
+        # Enforcer.load_rules goes through set_rules, which turns use_conf
+        # off and with it every later reload.
+        self.use_conf = use_conf
+
+    def _cache_key(self, rule, compiled, target, creds):
+        key = [rule]
+        for cred_key in compiled.cred_keys:
+            value = creds.get(cred_key, _MISSING)
+            if cred_key == 'roles' and value is not _MISSING:
+                value = frozenset([role.lower() for role in value])
+            key.append(value)
+        for target_key in compiled.target_keys:
+            key.append(target.get(target_key, _MISSING))
+        return tuple(key)
+
+    def _evaluate(self, compiled, target, creds):
+        try:
+            return compiled.func(target, creds)
+        except KeyError:
+            return False
+
+    def _decide(self, rule, target, creds):
+        try:
+            compiled = self._compiler.compile_rule(rule)
+        except KeyError:
+            LOG.debug("Rule [%s] doesn't exist" % rule)
+            return False
+        if not compiled.cacheable or not self.cache_size:
+            return self._evaluate(compiled, target, creds)
+        key = self._cache_key(rule, compiled, target, creds)
+        try:
+            result = self._cache.get(key, _MISSING)
+        except TypeError:
+            # Unhashable credential or target values are not cached.
+            return self._evaluate(compiled, target, creds)
+        if result is not _MISSING:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = self._evaluate(compiled, target, creds)
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+    def enforce(self, rule, target, creds, do_raise=False,
+                exc=None, *args, **kwargs):
+        """Checks authorization of a rule, see Enforcer.enforce."""
+        self.load_rules()
+
+        # Rule names are the common case; isinstance against the abstract
+        # BaseCheck is comparatively slow.
+        if (not isinstance(rule, six.string_types) and
+                isinstance(rule, policy.BaseCheck)):
+            result = rule(target, creds, self)
+        elif not self.rules:
+            result = False
+        else:
+            result = self._decide(rule, target, creds)
+
+        if do_raise and not result:
+            if exc:
+                raise exc(*args, **kwargs)
+            raise policy.PolicyNotAuthorized(rule)
+        return result
+
+    def get_metrics(self):
+        return {'compiled_rules': len(self._compiler.compiled),
+                'cached_decisions': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses}
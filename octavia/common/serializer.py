@@ -0,0 +1,151 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+JSON encoding of data models and their relationships.
+
+Every data model class gets an encoder generated from its fields, the
+same ones to_dict() and __eq__ use, which writes their JSON straight into
+a list of strings.  Related models are encoded in full; a model reached
+again while it is being encoded, such as member.pool inside its pool, is
+encoded as null since the *_id field next to it already refers to it.
+"""
+
+import datetime
+import json
+
+import six
+
+from octavia.common import data_models
+from octavia.openstack.common import jsonutils
+from octavia.openstack.common import timeutils
+
+_encode_string = json.encoder.encode_basestring_ascii
+
+
+def _encode_bool(value):
+    return 'true' if value else 'false'
+
+
+def _encode_float(value):
+    if value != value or value in (float('inf'), float('-inf')):
+        # NaN and Infinity, spelled as json spells them.
+        return json.dumps(value)
+    return repr(value)
+
+
+def _encode_datetime(value):
+    return '"%s"' % timeutils.strtime(value)
+
+
+_SCALARS = {
+    type(None): lambda value: 'null',
+    bool: _encode_bool,
+    int: str,
+    float: _encode_float,
+    datetime.datetime: _encode_datetime,
+}
+for _type in (str, six.text_type):
+    _SCALARS[_type] = _encode_string
+for _type in six.integer_types:
+    _SCALARS[_type] = str
+
+_FIELD = """
+    value = obj.%(field)s
+    scalar = scalars.get(value.__class__)
+    if scalar is not None:
+        append(%(prefix)r + scalar(value))
+    else:
+        append(%(prefix)r)
+        encode(value, append, path)"""
+
+_ENCODER = """
+def encode_%(name)s(obj, append, path, scalars, encode):
+    key = id(obj)
+    path.add(key)%(fields)s
+    append('}')
+    path.discard(key)
+"""
+
+_encoders = {}
+
+
+def fields(model_class):
+    """Returns the names of the fields of a data model class."""
+    return model_class._get_fields()
+
+
+def _generate_encoder(model_class):
+    body = []
+    for i, field in enumerate(fields(model_class)):
+        prefix = '%s"%s": ' % ('{' if i == 0 else ', ', field)
+        body.append(_FIELD % {'field': field, 'prefix': prefix})
+    if not body:
+        body.append("\n    append('{')")
+    source = _ENCODER % {'name': model_class.__name__,
+                         'fields': ''.join(body)}
+    namespace = {}
+    six.exec_(compile(source, '<encoder of %s>' % model_class.__name__,
+                      'exec'), namespace)
+    return namespace['encode_%s' % model_class.__name__]
+
+
+def get_encoder(model_class):
+    """Returns the encoder of a data model class, generating it once.
+
+    The encoder is called as encoder(obj, append, path, scalars, encode)
+    and appends the JSON of obj with append.
+    """
+    encoder = _encoders.get(model_class)
+    if encoder is None:
+        encoder = _encoders[model_class] = _generate_encoder(model_class)
+    return encoder
+
+
+def _encode(value, append, path):
+    scalar = _SCALARS.get(value.__class__)
+    if scalar is not None:
+        append(scalar(value))
+    elif isinstance(value, data_models.BaseDataModel):
+        if id(value) in path:
+            append('null')
+        else:
+            get_encoder(value.__class__)(value, append, path, _SCALARS,
+                                         _encode)
+    elif isinstance(value, (list, tuple)):
+        append('[')
+        for i, item in enumerate(value):
+            if i:
+                append(', ')
+            _encode(item, append, path)
+        append(']')
+    elif isinstance(value, dict):
+        append('{')
+        for i, (key, item) in enumerate(six.iteritems(value)):
+            # Byte string keys are encoded as is, since converting them to
+            # text would fail on non-ASCII bytes.
+            if not isinstance(key, six.string_types + (bytes,)):
+                key = six.text_type(key)
+            append('%s%s: ' % (', ' if i else '', _encode_string(key)))
+            _encode(item, append, path)
+        append('}')
+    else:
+        append(jsonutils.dumps(value))
+
+
+def dumps(value):
+    """Serializes value, which may be or contain data models, to JSON."""
+    parts = []
+    _encode(value, parts.append, set())
+    return ''.join(parts)
@@ -0,0 +1,52 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import abc
+
+import six
+
+
+@six.add_metaclass(abc.ABCMeta)
+class ComputeBase(object):
+
+    @abc.abstractmethod
+    def build(self, compute_flavor):
+        """Start booting a new amphora.
+
+        :param compute_flavor: the flavor to boot the amphora with
+        :returns: octavia.common.data_models.Amphora with id and host_id
+                  set and status PENDING_CREATE
+
+        Returns as soon as the boot was requested, status() reports when
+        the amphora is up.
+        """
+        pass
+
+    @abc.abstractmethod
+    def status(self, compute_id):
+        """Return the provisioning status of an amphora.
+
+        :param compute_id: id of the amphora as returned by build()
+        :returns: PENDING_CREATE while booting, ACTIVE once booted or ERROR
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete(self, compute_id):
+        """Delete an amphora.
+
+        :param compute_id: id of the amphora as returned by build()
+        :returns: None
+        """
+        pass
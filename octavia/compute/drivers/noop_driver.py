@@ -0,0 +1,54 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.compute import base as compute_base
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import uuidutils
+
+LOG = logging.getLogger(__name__)
+
+
+class NoopComputeDriver(compute_base.ComputeBase):
+    """Pretends to boot amphorae, each taking boot_time seconds."""
+
+    def __init__(self, boot_time=0, clock=time.time):
+        self.boot_time = boot_time
+        self.clock = clock
+        self.host_id = uuidutils.generate_uuid()
+        self.amphorae = {}
+
+    def build(self, compute_flavor):
+        compute_id = uuidutils.generate_uuid()
+        LOG.debug('Noop build of amphora %(id)s with flavor %(flavor)s',
+                  {'id': compute_id, 'flavor': compute_flavor})
+        self.amphorae[compute_id] = self.clock() + self.boot_time
+        return data_models.Amphora(id=compute_id, host_id=self.host_id,
+                                   status=constants.PENDING_CREATE,
+                                   compute_flavor=compute_flavor)
+
+    def status(self, compute_id):
+        ready_at = self.amphorae.get(compute_id)
+        if ready_at is None:
+            return constants.ERROR
+        if self.clock() < ready_at:
+            return constants.PENDING_CREATE
+        return constants.ACTIVE
+
+    def delete(self, compute_id):
+        LOG.debug('Noop delete of amphora %s', compute_id)
+        self.amphorae.pop(compute_id, None)
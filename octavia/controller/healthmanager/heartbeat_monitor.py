@@ -0,0 +1,179 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import math
+import time
+
+from oslo.config import cfg
+
+from octavia.amphorae.drivers import base as driver_base
+from octavia.common import constants
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import loopingcall
+
+LOG = logging.getLogger(__name__)
+
+
+class TimerWheel(object):
+    """A hashed timing wheel of per-key deadlines.
+
+    Time is divided into ticks and every key sits in the slot of the tick
+    its deadline falls in.  Pushing a deadline further out only updates a
+    dict; the key is moved lazily when its old slot comes up.  Both
+    set_deadline() and cancel() are O(1), and advance() only looks at the
+    slots of the ticks that passed.
+    """
+
+    def __init__(self, tick, slots, now):
+        self.tick = float(tick)
+        self._slots = [set() for i in range(slots)]
+        self._deadlines = {}
+        self._scheduled = {}
+        self._current_tick = self._tick_of(now)
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def _tick_of(self, timestamp):
+        return int(math.floor(timestamp / self.tick))
+
+    def _schedule(self, key, deadline):
+        tick = max(self._tick_of(deadline), self._current_tick + 1)
+        self._scheduled[key] = tick
+        self._slots[tick % len(self._slots)].add(key)
+
+    def set_deadline(self, key, deadline):
+        scheduled = self._scheduled.get(key)
+        self._deadlines[key] = deadline
+        if scheduled is None:
+            self._schedule(key, deadline)
+        elif self._tick_of(deadline) < scheduled:
+            self._slots[scheduled % len(self._slots)].discard(key)
+            self._schedule(key, deadline)
+
+    def cancel(self, key):
+        self._deadlines.pop(key, None)
+        scheduled = self._scheduled.pop(key, None)
+        if scheduled is not None:
+            self._slots[scheduled % len(self._slots)].discard(key)
+
+    def advance(self, now):
+        """Removes and returns the keys whose deadline is before now."""
+        target = self._tick_of(now)
+        if target - self._current_tick >= len(self._slots):
+            # Every slot is due at least once, look at each of them once.
+            due = [key for key, tick in self._scheduled.items()
+                   if tick <= target]
+            self._current_tick = target
+        else:
+            due = []
+            while self._current_tick < target:
+                self._current_tick += 1
+                slot = self._slots[self._current_tick % len(self._slots)]
+                due.extend(key for key in slot
+                           if self._scheduled[key] == self._current_tick)
+        expired = []
+        for key in due:
+            tick = self._scheduled.pop(key)
+            self._slots[tick % len(self._slots)].discard(key)
+            if self._deadlines[key] <= now:
+                del self._deadlines[key]
+                expired.append(key)
+            else:
+                self._schedule(key, self._deadlines[key])
+        return expired
+
+
+class HeartbeatMonitor(driver_base.HealthMixIn):
+    """Detects amphorae that missed their heartbeat window.
+
+    Every heartbeat moves the amphora's deadline to now plus the interval
+    of its kind, heartbeat_interval for amphorae in use and
+    spare_heartbeat_interval for spares.  check() fires on_stale only for
+    the amphorae whose deadline passed, so its cost does not depend on the
+    size of the fleet.  A stale amphora is not reported again until it
+    sends another heartbeat.
+
+    As a HealthMixIn it records the heartbeats of every amphora in the
+    "amphorae" part of a health map and then passes the map on to
+    health_handler, if given.
+    """
+
+    def __init__(self, on_stale, health_handler=None, active_interval=None,
+                 spare_interval=None, tick=1, clock=time.time):
+        if active_interval is None:
+            active_interval = cfg.CONF.health_manager.heartbeat_interval
+        if spare_interval is None:
+            spare_interval = cfg.CONF.health_manager.spare_heartbeat_interval
+        self.on_stale = on_stale
+        self.health_handler = health_handler
+        self.active_interval = active_interval
+        self.spare_interval = spare_interval
+        self.clock = clock
+        slots = int(math.ceil(max(active_interval, spare_interval) /
+                              float(tick))) + 2
+        self._wheel = TimerWheel(tick, slots, clock())
+        self._spares = set()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._wheel)
+
+    def watch(self, amphora_id, spare=False):
+        """Starts or restarts the heartbeat window of an amphora."""
+        if spare:
+            self._spares.add(amphora_id)
+        else:
+            self._spares.discard(amphora_id)
+        self.heartbeat(amphora_id)
+
+    def unwatch(self, amphora_id):
+        self._wheel.cancel(amphora_id)
+        self._spares.discard(amphora_id)
+
+    def heartbeat(self, amphora_id):
+        interval = (self.spare_interval if amphora_id in self._spares
+                    else self.active_interval)
+        self._wheel.set_deadline(amphora_id, self.clock() + interval)
+
+    def update_health(self, health):
+        for amphora_id in health.get(constants.HEALTH_AMPHORAE, ()):
+            self.heartbeat(amphora_id)
+        if self.health_handler:
+            self.health_handler.update_health(health)
+
+    def check(self):
+        """Fires on_stale for every amphora whose window expired."""
+        stale = self._wheel.advance(self.clock())
+        for amphora_id in stale:
+            LOG.warn(_('Amphora %s missed its heartbeat window'),
+                     amphora_id)
+            try:
+                self.on_stale(amphora_id)
+            except Exception:
+                LOG.exception(_('Failed to handle stale amphora %s'),
+                              amphora_id)
+        return stale
+
+    def start(self):
+        self._timer = loopingcall.FixedIntervalLoopingCall(self.check)
+        self._timer.start(self._wheel.tick)
+
+    def stop(self):
+        if self._timer:
+            self._timer.stop()
+            self._timer = None
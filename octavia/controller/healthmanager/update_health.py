@@ -0,0 +1,110 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+from octavia.amphorae.drivers import base as driver_base
+from octavia.common import constants
+from octavia.db import api as db_api
+from octavia.db import repositories
+from octavia.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+AMPHORA = 'amphora'
+LOAD_BALANCER = 'load_balancer'
+LISTENER = 'listener'
+POOL = 'pool'
+MEMBER = 'member'
+# Entity types whose operating_status lives in the database, in the order
+# returned by HealthStatusRepository.flatten.
+DB_ENTITY_TYPES = (LOAD_BALANCER, LISTENER, POOL, MEMBER)
+
+Transition = collections.namedtuple(
+    'Transition', ['entity_type', 'entity_id', 'old_status', 'new_status'])
+
+
+class UpdateHealthDb(driver_base.HealthMixIn):
+    """Propagates only health transitions to the database and notifier.
+
+    The last known status of every amphora, load balancer, listener, pool
+    and member is cached in memory.  Each incoming health map is compared
+    against the cache and only the entities whose status differs are
+    written, so steady state heartbeats from healthy amphorae cost no
+    database writes.  The cache is only updated once the write succeeded,
+    so a failed write is retried with the next heartbeat.
+    """
+
+    def __init__(self, session=None, notifier=None):
+        """Creates the cache.
+
+        :param session: database session to use, defaults to a new one
+        :param notifier: optional callable given the list of Transitions
+                         of every health map that changed something
+        """
+        self._session = session
+        self.notifier = notifier
+        self.health_repo = repositories.HealthStatusRepository()
+        self._state = dict((entity_type, {}) for entity_type in
+                           (AMPHORA,) + DB_ENTITY_TYPES)
+        self.heartbeats = 0
+        self.transitions = 0
+
+    def get_status(self, entity_type, entity_id):
+        """Returns the last known status of an entity, or None."""
+        return self._state[entity_type].get(entity_id)
+
+    def invalidate(self, entity_type, entity_id):
+        """Forgets an entity, e.g. after its status was changed elsewhere.
+
+        The next reported status of the entity is written unconditionally.
+        """
+        self._state[entity_type].pop(entity_id, None)
+
+    def clear(self):
+        for known in self._state.values():
+            known.clear()
+
+    def _diff(self, entity_type, statuses, transitions):
+        known = self._state[entity_type]
+        changed = {}
+        for entity_id, status in statuses.items():
+            old_status = known.get(entity_id)
+            if old_status != status:
+                changed[entity_id] = status
+                transitions.append(Transition(entity_type, entity_id,
+                                              old_status, status))
+        return changed
+
+    def update_health(self, health):
+        self.heartbeats += 1
+        transitions = []
+        amphorae = self._diff(AMPHORA,
+                              health.get(constants.HEALTH_AMPHORAE, {}),
+                              transitions)
+        changed = [self._diff(entity_type, statuses, transitions)
+                   for entity_type, statuses in zip(
+                       DB_ENTITY_TYPES, self.health_repo.flatten(health))]
+        if not transitions:
+            return
+        if any(changed):
+            session = self._session or db_api.get_session()
+            self.health_repo.update_statuses(session, *changed)
+        self._state[AMPHORA].update(amphorae)
+        for entity_type, statuses in zip(DB_ENTITY_TYPES, changed):
+            self._state[entity_type].update(statuses)
+        self.transitions += len(transitions)
+        LOG.debug('Health update changed %d statuses', len(transitions))
+        if self.notifier:
+            self.notifier(transitions)
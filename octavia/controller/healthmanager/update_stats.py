@@ -0,0 +1,178 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from oslo.config import cfg
+from oslo.db import exception as db_exception
+
+from octavia.amphorae.drivers import base as driver_base
+from octavia.db import api as db_api
+from octavia.db import repositories
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import loopingcall
+
+LOG = logging.getLogger(__name__)
+
+STATS_FIELDS = ('bytes_in', 'bytes_out', 'active_connections',
+                'total_connections')
+
+
+class ListenerStatsAccumulator(driver_base.StatsMixIn):
+    """Coalesces listener statistics in memory and flushes them in bulk.
+
+    Amphorae report statistics far more often than the database needs to
+    see them.  Each report is merged into a per-listener delta: bytes_in,
+    bytes_out and total_connections are summed while active_connections
+    keeps the latest value.  flush() writes all pending deltas with a single
+    ListenerStatisticsRepository.increment_batch call, and start() runs it
+    every health_manager.stats_flush_interval seconds.
+    """
+
+    def __init__(self, flush_interval=None, session=None):
+        if flush_interval is None:
+            flush_interval = cfg.CONF.health_manager.stats_flush_interval
+        self.flush_interval = flush_interval
+        self._session = session
+        self._pending = {}
+        self._timer = None
+        self.stats_repo = repositories.ListenerStatisticsRepository()
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.dropped = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+
+    @staticmethod
+    def _validate(key, value):
+        # Same check as models.ListenerStatistics.validate_non_negative_int,
+        # which bulk statements bypass.
+        if value < 0:
+            data = {'key': key, 'value': value}
+            raise ValueError(data)
+        return value
+
+    def add(self, listener_id, bytes_in=0, bytes_out=0,
+            active_connections=None, total_connections=0):
+        """Merges one statistics report for a listener.
+
+        :param bytes_in: bytes received since the previous report
+        :param bytes_out: bytes sent since the previous report
+        :param active_connections: current number of connections, or None
+                                   to leave the last reported value
+        :param total_connections: connections opened since the previous
+                                  report
+        :raises ValueError: if a value is negative
+        """
+        self._validate('bytes_in', bytes_in)
+        self._validate('bytes_out', bytes_out)
+        self._validate('total_connections', total_connections)
+        if active_connections is not None:
+            self._validate('active_connections', active_connections)
+        delta = self._pending.get(listener_id)
+        if delta is None:
+            delta = self._pending[listener_id] = {
+                'bytes_in': 0, 'bytes_out': 0, 'total_connections': 0,
+                'active_connections': None}
+        delta['bytes_in'] += bytes_in
+        delta['bytes_out'] += bytes_out
+        delta['total_connections'] += total_connections
+        if active_connections is not None:
+            delta['active_connections'] = active_connections
+
+    def update_stats(self, stats):
+        """Merges a statistics map as reported by an amphora.
+
+        :param stats: {"<lb id>": {"<listener id>": {"bytes_in": 123, ...}}}
+                      with the counters given as deltas since the previous
+                      report.  Keys may use '-' or '_' as separator.
+        """
+        for listeners in stats.values():
+            for listener_id, listener_stats in listeners.items():
+                values = dict((key.replace('-', '_'), value)
+                              for key, value in listener_stats.items())
+                self.add(listener_id, **dict(
+                    (field, values[field]) for field in STATS_FIELDS
+                    if field in values))
+
+    @property
+    def queue_depth(self):
+        """Number of listeners with statistics waiting to be flushed."""
+        return len(self._pending)
+
+    def _merge_back(self, pending):
+        for listener_id, delta in pending.items():
+            newer = self._pending.get(listener_id)
+            if newer is None:
+                self._pending[listener_id] = delta
+                continue
+            for field in ('bytes_in', 'bytes_out', 'total_connections'):
+                newer[field] += delta[field]
+            if newer['active_connections'] is None:
+                newer['active_connections'] = delta['active_connections']
+
+    def flush(self):
+        """Writes all pending deltas to the database in one batch.
+
+        A failed write is logged and its deltas are kept for the next flush.
+        Deltas of deleted listeners are dropped.
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        session = self._session or db_api.get_session()
+        start = time.time()
+        try:
+            skipped = self.stats_repo.increment_batch(session, pending)
+        except db_exception.DBReferenceError:
+            # A listener was deleted since increment_batch looked it up;
+            # retrying the same batch would fail forever.
+            self.flush_errors += 1
+            self.dropped += len(pending)
+            LOG.exception(_('Dropped statistics of %d listeners, one of '
+                            'them no longer exists'), len(pending))
+            return
+        except Exception:
+            self.flush_errors += 1
+            self._merge_back(pending)
+            LOG.exception(_('Failed to flush statistics for %d listeners'),
+                          len(pending))
+            return
+        if skipped:
+            self.dropped += len(skipped)
+            LOG.debug('Dropped statistics of deleted listeners %s', skipped)
+        latency = time.time() - start
+        self.flush_count += 1
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+
+    def get_metrics(self):
+        """Returns counters describing the accumulator."""
+        return {'queue_depth': self.queue_depth,
+                'flush_count': self.flush_count,
+                'flush_errors': self.flush_errors,
+                'dropped': self.dropped,
+                'last_flush_latency': self.last_flush_latency,
+                'max_flush_latency': self.max_flush_latency}
+
+    def start(self):
+        self._timer = loopingcall.FixedIntervalLoopingCall(self.flush)
+        self._timer.start(self.flush_interval,
+                          initial_delay=self.flush_interval)
+
+    def stop(self):
+        if self._timer:
+            self._timer.stop()
+            self._timer = None
+        self.flush()
@@ -0,0 +1,217 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import math
+import time
+
+from oslo.config import cfg
+
+from octavia.common import constants
+from octavia.db import api as db_api
+from octavia.db import repositories
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import loopingcall
+
+LOG = logging.getLogger(__name__)
+
+# Weight of the newest observed boot in the boot time estimate.
+BOOT_TIME_ALPHA = 0.3
+
+
+class DemandForecast(object):
+    """Exponentially weighted moving average of events per second.
+
+    Events are counted per key in windows of window seconds.  When a window
+    closes its rate is folded into the average with weight alpha; windows
+    without events decay the average.  rate() never reports less than the
+    rate of the window still open, so a burst is seen immediately.
+    """
+
+    def __init__(self, alpha, window, clock=time.time):
+        self.alpha = alpha
+        self.window = float(window)
+        self.clock = clock
+        self._window_start = clock()
+        self._counts = {}
+        self._rates = {}
+
+    def _roll(self):
+        elapsed = int((self.clock() - self._window_start) // self.window)
+        if elapsed <= 0:
+            return
+        for key in set(self._rates) | set(self._counts):
+            rate = self._rates.get(key, 0.0)
+            rate += self.alpha * (
+                self._counts.get(key, 0) / self.window - rate)
+            self._rates[key] = rate * (1 - self.alpha) ** (elapsed - 1)
+        self._counts = {}
+        self._window_start += elapsed * self.window
+
+    def record(self, key, count=1):
+        self._roll()
+        self._counts[key] = self._counts.get(key, 0) + count
+
+    def rate(self, key):
+        self._roll()
+        return max(self._rates.get(key, 0.0),
+                   self._counts.get(key, 0) / self.window)
+
+    def keys(self):
+        return set(self._rates) | set(self._counts)
+
+
+class SparePoolManager(object):
+    """Keeps enough booted spare amphorae for load balancers to claim.
+
+    The target depth of each compute flavor's pool is the configured
+    minimum plus the forecast number of load balancer creations during one
+    amphora boot, capped at spare_amphora_pool_max_size.  Every check marks
+    booted spares ACTIVE and starts new ones to cover the shortfall, never
+    more than spare_build_rate per check.  The boot time used for the
+    forecast follows the boots actually observed.
+    """
+
+    def __init__(self, compute_driver, flavors=None, min_size=None,
+                 max_size=None, build_rate=None, boot_time=None,
+                 forecast=None, session=None, clock=time.time):
+        if flavors is None:
+            flavors = cfg.CONF.house_keeping.spare_amphora_flavors
+        if min_size is None:
+            min_size = cfg.CONF.house_keeping.spare_amphora_pool_size
+        if max_size is None:
+            max_size = cfg.CONF.house_keeping.spare_amphora_pool_max_size
+        if build_rate is None:
+            build_rate = cfg.CONF.house_keeping.spare_build_rate
+        if boot_time is None:
+            boot_time = cfg.CONF.house_keeping.spare_boot_time
+        if forecast is None:
+            forecast = DemandForecast(
+                cfg.CONF.house_keeping.spare_forecast_alpha,
+                cfg.CONF.house_keeping.spare_forecast_window, clock)
+        self.compute = compute_driver
+        self.flavors = set(flavors)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.build_rate = build_rate
+        self.boot_time = float(boot_time)
+        self.forecast = forecast
+        self.clock = clock
+        self._session = session
+        self._booting = {}
+        self._timer = None
+        self.amphora_repo = repositories.AmphoraRepository()
+        self.claims = 0
+        self.claim_misses = 0
+        self.builds = 0
+
+    def _get_session(self):
+        return self._session or db_api.get_session()
+
+    def target(self, compute_flavor):
+        """Returns the number of spares wanted for a compute flavor."""
+        expected = self.forecast.rate(compute_flavor) * self.boot_time
+        return min(self.max_size,
+                   self.min_size + int(math.ceil(expected)))
+
+    def claim(self, load_balancer_id, compute_flavor=None):
+        """Allocates a ready spare to a load balancer.
+
+        The request counts towards the demand forecast whether or not a
+        spare was available.
+
+        :returns: octavia.common.data_models.Amphora or None if the pool
+                  of the compute flavor is empty.
+        """
+        self.forecast.record(compute_flavor)
+        amphora = self.amphora_repo.claim_spare(
+            self._get_session(), load_balancer_id, compute_flavor)
+        if amphora is None:
+            self.claim_misses += 1
+            LOG.warn(_('No spare amphora of flavor %s to claim'),
+                     compute_flavor)
+        else:
+            self.claims += 1
+        return amphora
+
+    def _observe_boot(self, amphora_id):
+        started = self._booting.pop(amphora_id, None)
+        if started is not None:
+            observed = self.clock() - started
+            self.boot_time += BOOT_TIME_ALPHA * (observed - self.boot_time)
+
+    def sync(self, session):
+        """Marks booted spares ACTIVE and removes the ones that failed."""
+        booted = {}
+        for amphora in self.amphora_repo.get_all(
+                session, status=constants.PENDING_CREATE,
+                load_balancer_id=None):
+            status = self.compute.status(amphora.id)
+            if status == constants.ACTIVE:
+                booted[amphora.id] = constants.ACTIVE
+                self._observe_boot(amphora.id)
+            elif status == constants.ERROR:
+                LOG.warn(_('Spare amphora %s failed to boot'), amphora.id)
+                self._booting.pop(amphora.id, None)
+                self.compute.delete(amphora.id)
+                self.amphora_repo.delete(session, id=amphora.id)
+        if booted:
+            self.amphora_repo.update_status_batch(session, 'status', booted)
+
+    def refill(self, session):
+        """Starts booting spares for the flavors below their target.
+
+        :returns: the number of amphorae started
+        """
+        counts = self.amphora_repo.count_spares(session)
+        shortfall = []
+        for compute_flavor in self.flavors | self.forecast.keys():
+            count = counts.get(compute_flavor, {})
+            have = (count.get(constants.ACTIVE, 0) +
+                    count.get(constants.PENDING_CREATE, 0))
+            missing = self.target(compute_flavor) - have
+            if missing > 0:
+                shortfall.append((missing, compute_flavor))
+        budget = self.build_rate
+        started = 0
+        shortfall.sort(key=lambda item: item[0], reverse=True)
+        for missing, compute_flavor in shortfall:
+            for i in range(min(missing, budget - started)):
+                amphora = self.compute.build(compute_flavor)
+                self.amphora_repo.create(
+                    session, id=amphora.id, host_id=amphora.host_id,
+                    status=constants.PENDING_CREATE,
+                    compute_flavor=compute_flavor)
+                self._booting[amphora.id] = self.clock()
+                started += 1
+        self.builds += started
+        return started
+
+    def check(self):
+        session = self._get_session()
+        try:
+            self.sync(session)
+            self.refill(session)
+        except Exception:
+            LOG.exception(_('Failed to maintain the spare amphora pool'))
+
+    def start(self, interval=None):
+        if interval is None:
+            interval = cfg.CONF.house_keeping.spare_check_interval
+        self._timer = loopingcall.FixedIntervalLoopingCall(self.check)
+        self._timer.start(interval)
+
+    def stop(self):
+        if self._timer:
+            self._timer.stop()
+            self._timer = None
@@ -0,0 +1,121 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo.config import cfg
+
+from octavia.common import hash_ring
+from octavia.db import api as db_api
+from octavia.db import repositories
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import loopingcall
+
+LOG = logging.getLogger(__name__)
+
+
+class ControllerMembership(object):
+    """Shares amphorae and load balancers out among live controllers.
+
+    Every controller writes a heartbeat to the controller table each
+    interval and builds a consistent hash ring of the controllers heard
+    from within expiry seconds.  owns() tells whether an amphora or load
+    balancer id falls into this controller's share, so health checking,
+    statistics and load balancer operations are done by exactly one
+    controller.  When a controller joins or dies the ring is rebuilt on
+    the next heartbeat of every other controller and only the share of
+    the joining or dead controller moves.
+
+    Until the first heartbeat the ring holds only this controller, which
+    then owns everything.
+
+    Liveness is judged by the database clock, see ControllerRepository.
+    Filtering amphora heartbeats with owns() assumes every amphora sends
+    its heartbeats to every controller.
+
+    :param on_rebalance: optional callable given the old and the new
+                         HashRing whenever the membership changed
+    """
+
+    def __init__(self, host=None, interval=None, expiry=None, replicas=None,
+                 session=None, on_rebalance=None):
+        if host is None:
+            host = cfg.CONF.host
+        if interval is None:
+            interval = cfg.CONF.controller_worker.membership_interval
+        if expiry is None:
+            expiry = cfg.CONF.controller_worker.membership_expiry
+        if replicas is None:
+            replicas = cfg.CONF.controller_worker.hash_ring_replicas
+        self.host = host
+        self.interval = interval
+        self.expiry = expiry
+        self.replicas = replicas
+        self.on_rebalance = on_rebalance
+        self._session = session
+        self.controller_repo = repositories.ControllerRepository()
+        self.ring = hash_ring.HashRing([host], replicas)
+        self.rebalances = 0
+        self._timer = None
+
+    def heartbeat(self):
+        """Records this controller as alive and refreshes the ring."""
+        session = self._session or db_api.get_session()
+        self.controller_repo.heartbeat(session, self.host)
+        self.controller_repo.purge_dead(session, self.expiry)
+        hosts = set(self.controller_repo.get_live_hosts(session,
+                                                        self.expiry))
+        hosts.add(self.host)
+        if hosts != self.ring.nodes:
+            old_ring = self.ring
+            self.ring = hash_ring.HashRing(hosts, self.replicas)
+            self.rebalances += 1
+            LOG.info(_('Controller membership changed from %(old)s to '
+                       '%(new)s'), {'old': sorted(old_ring.nodes),
+                                    'new': sorted(hosts)})
+            if self.on_rebalance:
+                self.on_rebalance(old_ring, self.ring)
+
+    def _run(self):
+        try:
+            self.heartbeat()
+        except Exception:
+            LOG.exception(_('Failed to update the controller membership'))
+
+    def owner(self, resource_id):
+        """Returns the host of the controller owning a resource."""
+        return self.ring.get_node(resource_id)
+
+    def owns(self, resource_id):
+        return self.ring.get_node(resource_id) == self.host
+
+    def owned(self, resource_ids):
+        """Returns the ids in this controller's share."""
+        return [resource_id for resource_id in resource_ids
+                if self.owns(resource_id)]
+
+    def leave(self):
+        """Removes this controller, others take over on their heartbeat."""
+        session = self._session or db_api.get_session()
+        if self.controller_repo.get(session, host=self.host):
+            self.controller_repo.delete(session, host=self.host)
+
+    def start(self):
+        self.heartbeat()
+        self._timer = loopingcall.FixedIntervalLoopingCall(self._run)
+        self._timer.start(self.interval, initial_delay=self.interval)
+
+    def stop(self):
+        if self._timer:
+            self._timer.stop()
+            self._timer = None
+        self.leave()
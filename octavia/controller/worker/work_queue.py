@@ -0,0 +1,187 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+from eventlet import event
+from eventlet import queue
+from oslo.config import cfg
+
+from octavia.openstack.common import log as logging
+from octavia.openstack.common import threadgroup
+
+LOG = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class Job(object):
+    """A queued operation on a load balancer.
+
+    Submitters coalesced into a job share it and all get the result of its
+    latest func from wait().
+    """
+
+    def __init__(self, load_balancer_id, key, func, args, kwargs):
+        self.load_balancer_id = load_balancer_id
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.coalesced = 0
+        self._done = event.Event()
+
+    def run(self):
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self._done.send_exception(e)
+            raise
+        self._done.send(result)
+
+    def done(self):
+        return self._done.ready()
+
+    def wait(self):
+        """Waits for the job and returns its result or raises its error."""
+        return self._done.wait()
+
+
+class WorkQueue(object):
+    """Runs controller jobs one at a time per load balancer.
+
+    Jobs of a load balancer run in submission order and never
+    concurrently, while jobs of different load balancers run in parallel
+    on workers green threads.  Only load balancers with queued jobs are
+    handed to the workers, one at a time, so a load balancer with many
+    jobs can not hold more than one worker and takes its turn behind the
+    others after every job.
+
+    A job submitted with a coalesce key replaces a queued, not yet
+    started job of the same load balancer and key when that job is the
+    last one queued: pushing the latest configuration once supersedes
+    pushing every intermediate one.  A job queued after it, such as a
+    delete, is never overtaken.
+    """
+
+    def __init__(self, workers=None):
+        if workers is None:
+            workers = cfg.CONF.controller_worker.workers
+        self.workers = workers
+        self._ready = queue.LightQueue()
+        self._pending = {}
+        self._coalescable = {}
+        self._group = None
+        self._unfinished = 0
+        self._idle = event.Event()
+        self._idle.send()
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, load_balancer_id, func, *args, **kwargs):
+        """Queues func(*args, **kwargs) behind the load balancer's jobs.
+
+        :param coalesce_key: optional keyword; if the last queued job of
+                             the load balancer has the same key and has not
+                             started, it gets func and its arguments
+                             instead of a new job being queued
+        :returns: the Job
+        """
+        key = kwargs.pop('coalesce_key', None)
+        self.submitted += 1
+        if key is not None:
+            job = self._coalescable.get((load_balancer_id, key))
+            if (job is not None and
+                    self._pending[load_balancer_id][-1] is job):
+                job.func, job.args, job.kwargs = func, args, kwargs
+                job.coalesced += 1
+                self.coalesced += 1
+                return job
+        job = Job(load_balancer_id, key, func, args, kwargs)
+        if key is not None:
+            self._coalescable[(load_balancer_id, key)] = job
+        if self._unfinished == 0:
+            self._idle = event.Event()
+        self._unfinished += 1
+        pending = self._pending.get(load_balancer_id)
+        if pending is None:
+            # The load balancer is neither running nor ready.
+            self._pending[load_balancer_id] = collections.deque([job])
+            self._ready.put(load_balancer_id)
+        else:
+            pending.append(job)
+        return job
+
+    def queued(self, load_balancer_id):
+        """Returns the number of jobs of the load balancer not finished."""
+        return len(self._pending.get(load_balancer_id, ()))
+
+    def _work(self):
+        while True:
+            load_balancer_id = self._ready.get()
+            if load_balancer_id is _STOP:
+                return
+            pending = self._pending[load_balancer_id]
+            job = pending[0]
+            if (job.key is not None and self._coalescable.get(
+                    (load_balancer_id, job.key)) is job):
+                del self._coalescable[(load_balancer_id, job.key)]
+            try:
+                job.run()
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+                LOG.exception(_('Job for load balancer %s failed'),
+                              load_balancer_id)
+            pending.popleft()
+            if pending:
+                self._ready.put(load_balancer_id)
+            else:
+                del self._pending[load_balancer_id]
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._idle.send()
+
+    def join(self):
+        """Waits until every submitted job has finished."""
+        self._idle.wait()
+
+    def start(self):
+        self._group = threadgroup.ThreadGroup(self.workers)
+        for i in range(self.workers):
+            self._group.add_thread(self._work)
+
+    def stop(self, graceful=True):
+        """Stops the workers, after the queued jobs if graceful."""
+        if self._group is None:
+            return
+        if graceful:
+            self.join()
+        for i in range(self.workers):
+            self._ready.put(_STOP)
+        if graceful:
+            self._group.wait()
+        else:
+            self._group.stop()
+        self._group = None
+
+    def get_metrics(self):
+        return {'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'completed': self.completed,
+                'failed': self.failed,
+                'queued': self._unfinished,
+                'load_balancers': len(self._pending)}
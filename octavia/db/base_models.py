@@ -12,43 +12,102 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from octavia.openstack.common import uuidutils
 
 from oslo.db.sqlalchemy import models
 import sqlalchemy as sa
 from sqlalchemy.ext import declarative
-from sqlalchemy.orm import collections
+from sqlalchemy import orm
+
+
+ConversionPlan = collections.namedtuple(
+    'ConversionPlan', ['columns', 'relationships', 'primary_key'])
 
 
 class OctaviaBase(models.ModelBase):
 
     __data_model__ = None
 
-    def to_data_model(self, calling_cls=None):
+    @classmethod
+    def _get_conversion_plan(cls):
+        """Returns the column and relationship names used for conversion.
+
+        The plan is computed once per mapped class from its mapper so that
+        converting a row never has to reflect over the instance.
+        """
+        plan = cls.__dict__.get('_conversion_plan')
+        if plan is None:
+            mapper = orm.class_mapper(cls)
+            columns = tuple(prop.key for prop in mapper.column_attrs)
+            relationships = tuple((prop.key, prop.uselist)
+                                  for prop in mapper.relationships)
+            primary_key = tuple(mapper.get_property_by_column(column).key
+                                for column in mapper.primary_key)
+            plan = ConversionPlan(columns, relationships, primary_key)
+            cls._conversion_plan = plan
+        return plan
+
+    def to_data_model(self, calling_cls=None, graph=False):
+        """Converts this row and its relationships into data models.
+
+        :param calling_cls: the model class that is converting this row, used
+                            to avoid walking straight back up a relationship
+        :param graph: if True, convert the whole connected object graph using
+                      a per-call identity map, so that every row becomes
+                      exactly one data model and back references point at
+                      the shared instances
+        """
         if not self.__data_model__:
             raise NotImplementedError
-        dm_kwargs = {}
-        for column in self.__table__.columns:
-            dm_kwargs[column.name] = getattr(self, column.name)
-        attr_names = [attr_name for attr_name in dir(self)
-                      if not attr_name.startswith('_')]
-        for attr_name in attr_names:
-            attr = getattr(self, attr_name)
-            if isinstance(attr, OctaviaBase):
-                if attr.__class__ != calling_cls:
-                    dm_kwargs[attr_name] = attr.to_data_model(
-                        calling_cls=self.__class__)
-            elif isinstance(attr, collections.InstrumentedList):
-                dm_kwargs[attr_name] = []
-                for item in attr:
-                    if isinstance(item, OctaviaBase):
-                        if attr.__class__ != calling_cls:
-                            dm_kwargs[attr_name].append(
-                                item.to_data_model(calling_cls=self.__class__))
-                    else:
-                        dm_kwargs[attr_name].append(item)
+        if graph:
+            return self._to_data_model_graph()
+        plan = self._get_conversion_plan()
+        dm_kwargs = dict((key, getattr(self, key)) for key in plan.columns)
+        for key, uselist in plan.relationships:
+            attr = getattr(self, key)
+            if uselist:
+                dm_kwargs[key] = [
+                    item.to_data_model(calling_cls=self.__class__)
+                    for item in attr]
+            elif attr is not None and attr.__class__ != calling_cls:
+                dm_kwargs[key] = attr.to_data_model(
+                    calling_cls=self.__class__)
         return self.__data_model__(**dm_kwargs)
 
+    def _to_data_model_graph(self):
+        # Rows are keyed by (class, primary key).  Each data model is created
+        # from its columns when its row is first seen and its relationships
+        # are wired afterwards, so cycles and diamonds resolve to the shared
+        # instances and every row is visited once.
+        identity_map = {}
+        pending = []
+
+        def get_data_model(row):
+            plan = row._get_conversion_plan()
+            identity = (row.__class__,
+                        tuple(getattr(row, key) for key in plan.primary_key))
+            data_model = identity_map.get(identity)
+            if data_model is None:
+                data_model = row.__data_model__(
+                    **dict((key, getattr(row, key)) for key in plan.columns))
+                identity_map[identity] = data_model
+                pending.append((row, data_model, plan))
+            return data_model
+
+        root = get_data_model(self)
+        while pending:
+            row, data_model, plan = pending.pop()
+            for key, uselist in plan.relationships:
+                attr = getattr(row, key)
+                if uselist:
+                    setattr(data_model, key,
+                            [get_data_model(item) for item in attr])
+                elif attr is not None:
+                    setattr(data_model, key, get_data_model(attr))
+        return root
+
 
 class LookupTableMixin(object):
     """Mixin to add to classes that are lookup tables."""
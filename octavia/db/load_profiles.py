@@ -0,0 +1,98 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Named relationship loading profiles for the Octavia models.
+
+Every relationship in the models is lazy, so walking a load balancer tree
+issues one query per object.  A profile is a set of query options that loads
+a known part of the tree eagerly, keeping the number of round trips constant
+regardless of how many listeners, members or amphorae there are.  Collections
+are loaded with subquery loads and scalar relationships with joins.
+"""
+
+from sqlalchemy import orm
+
+from octavia.db import models
+
+FULL_GRAPH = 'full_graph'
+STATUS_ONLY = 'status_only'
+
+
+def _pool_full_graph(load):
+    return [load.subqueryload(models.Pool.members),
+            load.joinedload(models.Pool.health_monitor),
+            load.joinedload(models.Pool.session_persistence),
+            load.joinedload(models.Pool.listener)]
+
+
+def _listener_full_graph(load):
+    default_pool = load.joinedload(models.Listener.default_pool)
+    return ([load.joinedload(models.Listener.stats),
+             load.subqueryload(models.Listener.sni_containers),
+             default_pool] +
+            _pool_full_graph(default_pool))
+
+
+def _load_balancer_full_graph():
+    listeners = orm.subqueryload(models.LoadBalancer.listeners)
+    return ([orm.joinedload(models.LoadBalancer.vip),
+             orm.subqueryload(models.LoadBalancer.amphorae),
+             listeners] +
+            _listener_full_graph(listeners))
+
+
+def _listener_full_graph_root():
+    return ([orm.joinedload(models.Listener.load_balancer)
+             .joinedload(models.LoadBalancer.vip)] +
+            _listener_full_graph(orm.Load(models.Listener)))
+
+
+def _load_balancer_status_only():
+    listeners = orm.subqueryload(models.LoadBalancer.listeners)
+    default_pool = listeners.joinedload(models.Listener.default_pool)
+    return [orm.load_only('id', 'provisioning_status', 'operating_status'),
+            listeners.load_only('id', 'load_balancer_id', 'default_pool_id',
+                                'provisioning_status', 'operating_status'),
+            default_pool.load_only('id', 'operating_status'),
+            default_pool.subqueryload(models.Pool.members).load_only(
+                'id', 'pool_id', 'operating_status')]
+
+
+_PROFILES = {
+    models.LoadBalancer: {FULL_GRAPH: _load_balancer_full_graph,
+                          STATUS_ONLY: _load_balancer_status_only},
+    models.Listener: {FULL_GRAPH: _listener_full_graph_root},
+}
+
+
+def get_options(model_class, profile):
+    """Returns the query options for a named loading profile.
+
+    :param model_class: the model class at the root of the query
+    :param profile: the profile name, e.g. FULL_GRAPH or STATUS_ONLY
+    :raises ValueError: if the profile is not defined for the model class
+    """
+    try:
+        return _PROFILES[model_class][profile]()
+    except KeyError:
+        raise ValueError(_('Loading profile %(profile)s is not defined for '
+                           '%(model)s') % {'profile': profile,
+                                           'model': model_class.__name__})
+
+
+def query(session, model_class, profile):
+    """Returns a query for model_class with a loading profile applied."""
+    return session.query(model_class).options(
+        *get_options(model_class, profile))
@@ -0,0 +1,42 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''add amphora compute flavor
+
+Revision ID: 2f1b9a5c7d3e
+Revises: 13500e2e978d
+Create Date: 2014-10-06 10:21:37.118254
+
+'''
+
+# revision identifiers, used by Alembic.
+revision = '2f1b9a5c7d3e'
+down_revision = '13500e2e978d'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column(
+        u'amphora',
+        sa.Column(u'compute_flavor', sa.String(255), nullable=True)
+    )
+    op.create_index(u'idx_amphora_spare', u'amphora',
+                    [u'status', u'compute_flavor', u'load_balancer_id'])
+
+
+def downgrade():
+    op.drop_index(u'idx_amphora_spare', u'amphora')
+    op.drop_column(u'amphora', u'compute_flavor')
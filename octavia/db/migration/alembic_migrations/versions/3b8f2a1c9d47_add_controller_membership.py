@@ -0,0 +1,41 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''add controller membership
+
+Revision ID: 3b8f2a1c9d47
+Revises: 4a6ec0ab7284
+Create Date: 2014-10-10 11:05:48.220917
+
+'''
+
+# revision identifiers, used by Alembic.
+revision = '3b8f2a1c9d47'
+down_revision = '4a6ec0ab7284'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        u'controller',
+        sa.Column(u'host', sa.String(255), nullable=False),
+        sa.Column(u'updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(u'host')
+    )
+
+
+def downgrade():
+    op.drop_table(u'controller')
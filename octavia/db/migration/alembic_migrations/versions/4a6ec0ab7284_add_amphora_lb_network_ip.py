@@ -0,0 +1,39 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''add amphora lb network ip
+
+Revision ID: 4a6ec0ab7284
+Revises: 2f1b9a5c7d3e
+Create Date: 2014-10-08 15:42:10.507615
+
+'''
+
+# revision identifiers, used by Alembic.
+revision = '4a6ec0ab7284'
+down_revision = '2f1b9a5c7d3e'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column(
+        u'amphora',
+        sa.Column(u'lb_network_ip', sa.String(64), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column(u'amphora', u'lb_network_ip')
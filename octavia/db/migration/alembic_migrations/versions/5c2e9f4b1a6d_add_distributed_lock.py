@@ -0,0 +1,42 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''add distributed lock
+
+Revision ID: 5c2e9f4b1a6d
+Revises: 3b8f2a1c9d47
+Create Date: 2014-10-13 09:37:12.604553
+
+'''
+
+# revision identifiers, used by Alembic.
+revision = '5c2e9f4b1a6d'
+down_revision = '3b8f2a1c9d47'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        u'distributed_lock',
+        sa.Column(u'name', sa.String(255), nullable=False),
+        sa.Column(u'owner', sa.String(255), nullable=False),
+        sa.Column(u'expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(u'name')
+    )
+
+
+def downgrade():
+    op.drop_table(u'distributed_lock')
@@ -313,6 +313,10 @@ class Amphora(base_models.BASE):
     __data_model__ = data_models.Amphora
 
     __tablename__ = "amphora"
+    __table_args__ = (
+        sa.Index('idx_amphora_spare', 'status', 'compute_flavor',
+                 'load_balancer_id'),
+    )
 
     id = sa.Column(sa.String(36), nullable=False, primary_key=True,
                    autoincrement=False)
@@ -324,4 +328,29 @@ class Amphora(base_models.BASE):
     status = sa.Column(
         sa.String(36),
         sa.ForeignKey("provisioning_status.name",
-                      name="fk_container_provisioning_status_name"))
\ No newline at end of file
+                      name="fk_container_provisioning_status_name"))
+    lb_network_ip = sa.Column(sa.String(64), nullable=True)
+    compute_flavor = sa.Column(sa.String(255), nullable=True)
+
+
+class Controller(base_models.BASE):
+
+    __data_model__ = data_models.Controller
+
+    __tablename__ = "controller"
+
+    host = sa.Column(sa.String(255), nullable=False, primary_key=True,
+                     autoincrement=False)
+    updated_at = sa.Column(sa.DateTime, nullable=False)
+
+
+class DistributedLock(base_models.BASE):
+
+    __data_model__ = data_models.DistributedLock
+
+    __tablename__ = "distributed_lock"
+
+    name = sa.Column(sa.String(255), nullable=False, primary_key=True,
+                     autoincrement=False)
+    owner = sa.Column(sa.String(255), nullable=False)
+    expires_at = sa.Column(sa.DateTime, nullable=False)
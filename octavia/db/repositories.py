@@ -0,0 +1,577 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Defines interface for DB access that Resource or Octavia Controllers may
+reference
+"""
+
+import datetime
+
+from oslo.db import exception as db_exception
+import sqlalchemy as sa
+
+from octavia.common import constants
+from octavia.common import exceptions
+from octavia.db import models
+from octavia.openstack.common import uuidutils
+
+# Upper bound on the number of rows or bound ids sent in one statement.  It
+# keeps IN clauses below the SQLite limit of 999 bound parameters.
+BATCH_SIZE = 500
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _database_now(session):
+    """Returns the time of the database server.
+
+    Times compared across controllers, such as heartbeats and lock
+    expiries, use this clock so skew between controllers does not matter.
+    """
+    return session.execute(sa.select([sa.func.now()])).scalar()
+
+
+class BaseRepository(object):
+
+    model_class = None
+
+    def create(self, session, **model_kwargs):
+        """Base create method for a database entity.
+
+        :param session: A Sql Alchemy database session.
+        :param model_kwargs: Attributes of the model to insert.
+        :returns: octavia.common.data_model
+        """
+        with session.begin(subtransactions=True):
+            model = self.model_class(**model_kwargs)
+            session.add(model)
+        return model.to_data_model()
+
+    def delete(self, session, **filters):
+        """Deletes an entity from the database.
+
+        :param session: A Sql Alchemy database session.
+        :param filters: Filters to decide which entity should be deleted.
+        :returns: None
+        """
+        model = session.query(self.model_class).filter_by(**filters).first()
+        with session.begin(subtransactions=True):
+            session.delete(model)
+            session.flush()
+
+    def update(self, session, id, **model_kwargs):
+        """Updates an entity in the database.
+
+        :param session: A Sql Alchemy database session.
+        :param model_kwargs: Entity attributes that should be updates.
+        :returns: None
+        """
+        with session.begin(subtransactions=True):
+            session.query(self.model_class).filter_by(
+                id=id).update(model_kwargs)
+
+    def get(self, session, **filters):
+        """Retrieves an entity from the database.
+
+        :param session: A Sql Alchemy database session.
+        :param filters: Filters to decide which entity should be retrieved.
+        :returns: octavia.common.data_model or None
+        """
+        model = session.query(self.model_class).filter_by(**filters).first()
+        if not model:
+            return None
+        return model.to_data_model()
+
+    def get_all(self, session, **filters):
+        """Retrieves a list of entities from the database.
+
+        :param session: A Sql Alchemy database session.
+        :param filters: Filters to decide which entities should be retrieved.
+        :returns: [octavia.common.data_model]
+        """
+        model_list = session.query(self.model_class).filter_by(**filters)
+        return [model.to_data_model() for model in model_list]
+
+    def update_status_batch(self, session, status_field, statuses):
+        """Sets a status column on many entities in a few statements.
+
+        Entities are grouped by their new status and each group is written
+        with UPDATE ... WHERE id IN (...).  Rows that already hold the new
+        status are excluded by the WHERE clause, so they are not written.
+
+        :param session: A Sql Alchemy database session.
+        :param status_field: The status column to set, e.g.
+                             'operating_status' or 'provisioning_status'.
+        :param statuses: A dict mapping entity id to its new status.
+        :returns: The number of rows whose status changed.
+        """
+        table = self.model_class.__table__
+        column = table.c[status_field]
+        groups = {}
+        for entity_id, status in statuses.items():
+            groups.setdefault(status, []).append(entity_id)
+        changed = 0
+        with session.begin(subtransactions=True):
+            for status, entity_ids in groups.items():
+                for chunk in _chunks(entity_ids):
+                    result = session.execute(
+                        table.update()
+                        .where(table.c.id.in_(chunk))
+                        .where(sa.or_(column != status, column == sa.null()))
+                        .values({status_field: status}))
+                    changed += result.rowcount
+        return changed
+
+
+class LoadBalancerRepository(BaseRepository):
+
+    model_class = models.LoadBalancer
+
+
+class ListenerRepository(BaseRepository):
+
+    model_class = models.Listener
+
+
+class PoolRepository(BaseRepository):
+
+    model_class = models.Pool
+
+
+class MemberRepository(BaseRepository):
+
+    model_class = models.Member
+
+    # Columns that may be changed by update_batch.  Changing the columns of
+    # uq_member_pool_id_ip_address_protocol_port is left to update().
+    BATCH_UPDATE_FIELDS = ('weight', 'enabled')
+
+    def _check_unique(self, session, rows):
+        """Enforces uq_member_pool_id_ip_address_protocol_port up front.
+
+        Checking before inserting lets a batch fail as a whole with a
+        meaningful error instead of part way through on an IntegrityError.
+        """
+        keys = set()
+        for row in rows:
+            key = (row['pool_id'], row['ip_address'], row['protocol_port'])
+            if key in keys:
+                raise exceptions.DuplicateMemberEntry(
+                    pool_id=key[0], ip_address=key[1], protocol_port=key[2])
+            keys.add(key)
+        table = self.model_class.__table__
+        for chunk in _chunks(keys, BATCH_SIZE // 2):
+            pool_ids = set(key[0] for key in chunk)
+            ip_addresses = set(key[1] for key in chunk)
+            existing = session.execute(
+                sa.select([table.c.pool_id, table.c.ip_address,
+                           table.c.protocol_port])
+                .where(table.c.pool_id.in_(pool_ids))
+                .where(table.c.ip_address.in_(ip_addresses)))
+            for key in existing:
+                if tuple(key) in keys:
+                    raise exceptions.DuplicateMemberEntry(
+                        pool_id=key[0], ip_address=key[1],
+                        protocol_port=key[2])
+
+    def create_batch(self, session, members):
+        """Inserts many members with batched multi-row statements.
+
+        :param session: A Sql Alchemy database session.
+        :param members: A list of dicts of member attributes.  An id is
+                        generated for any member that does not supply one.
+        :returns: The ids of the created members, in the order given.
+        :raises DuplicateMemberEntry: if a member would share its pool,
+                                      ip_address and protocol_port with
+                                      another member.
+        """
+        rows = [dict(member) for member in members]
+        member_ids = [row.setdefault('id', uuidutils.generate_uuid())
+                      for row in rows]
+        if not rows:
+            return member_ids
+        table = self.model_class.__table__
+        with session.begin(subtransactions=True):
+            self._check_unique(session, rows)
+            for chunk in _chunks(rows):
+                session.execute(table.insert(), chunk)
+        return member_ids
+
+    def update_batch(self, session, updates):
+        """Updates weight and enabled for many members.
+
+        Members that change the same set of columns share one executemany
+        UPDATE statement.
+
+        :param session: A Sql Alchemy database session.
+        :param updates: A dict mapping member id to a dict of new values.
+        :returns: None
+        :raises ValueError: if a column outside BATCH_UPDATE_FIELDS is given.
+        """
+        groups = {}
+        for member_id, values in updates.items():
+            invalid = set(values) - set(self.BATCH_UPDATE_FIELDS)
+            if invalid:
+                raise ValueError(_('Cannot batch update member fields: '
+                                   '%s') % ', '.join(sorted(invalid)))
+            if not values:
+                continue
+            row = dict(values)
+            row['_id'] = member_id
+            groups.setdefault(frozenset(values), []).append(row)
+        table = self.model_class.__table__
+        with session.begin(subtransactions=True):
+            for fields, rows in groups.items():
+                statement = table.update().where(
+                    table.c.id == sa.bindparam('_id')).values(
+                        dict((field, sa.bindparam(field))
+                             for field in fields))
+                for chunk in _chunks(rows):
+                    session.execute(statement, chunk)
+
+    def delete_batch(self, session, ids):
+        """Deletes many members with batched DELETE ... WHERE id IN.
+
+        :param session: A Sql Alchemy database session.
+        :param ids: The ids of the members to delete.
+        :returns: The number of deleted members.
+        """
+        table = self.model_class.__table__
+        deleted = 0
+        with session.begin(subtransactions=True):
+            for chunk in _chunks(set(ids)):
+                result = session.execute(
+                    table.delete().where(table.c.id.in_(chunk)))
+                deleted += result.rowcount
+        return deleted
+
+
+class AmphoraRepository(BaseRepository):
+
+    model_class = models.Amphora
+
+    def count_spares(self, session):
+        """Counts the amphorae not allocated to a load balancer.
+
+        :param session: A Sql Alchemy database session.
+        :returns: A dict mapping each compute flavor to a dict with the
+                  number of ready (ACTIVE) and booting (PENDING_CREATE)
+                  spares.
+        """
+        model = self.model_class
+        rows = (session.query(model.compute_flavor, model.status,
+                              sa.func.count(model.id))
+                .filter(model.load_balancer_id == sa.null())
+                .filter(model.status.in_((constants.ACTIVE,
+                                          constants.PENDING_CREATE)))
+                .group_by(model.compute_flavor, model.status))
+        counts = {}
+        for compute_flavor, status, count in rows:
+            counts.setdefault(compute_flavor, {
+                constants.ACTIVE: 0, constants.PENDING_CREATE: 0})[
+                    status] = count
+        return counts
+
+    def claim_spare(self, session, load_balancer_id, compute_flavor=None,
+                    candidates=3):
+        """Allocates a ready spare amphora to a load balancer.
+
+        Each candidate is claimed with a single UPDATE that only matches
+        while the amphora is still ACTIVE and unallocated, so two
+        controllers can never claim the same spare.  The one losing the
+        race updates no row and moves on to its next candidate.
+
+        :param session: A Sql Alchemy database session.
+        :param load_balancer_id: The load balancer to allocate to.
+        :param compute_flavor: The compute flavor the spare must have.
+        :param candidates: How many spares to try before giving up.
+        :returns: octavia.common.data_models.Amphora or None if no spare
+                  could be claimed.
+        """
+        model = self.model_class
+        table = model.__table__
+        rows = (session.query(model.id)
+                .filter_by(status=constants.ACTIVE,
+                           compute_flavor=compute_flavor,
+                           load_balancer_id=None)
+                .limit(candidates).all())
+        for row in rows:
+            with session.begin(subtransactions=True):
+                result = session.execute(
+                    table.update()
+                    .where(table.c.id == row.id)
+                    .where(table.c.status == constants.ACTIVE)
+                    .where(table.c.load_balancer_id == sa.null())
+                    .values(load_balancer_id=load_balancer_id))
+            if result.rowcount:
+                amphora = (session.query(model).populate_existing()
+                           .filter_by(id=row.id).first())
+                return amphora.to_data_model()
+        return None
+
+
+class ControllerRepository(BaseRepository):
+    """Heartbeats of the controllers sharing the work.
+
+    Heartbeats are stamped and compared with the clock of the database
+    server rather than of each controller, so clock skew between
+    controllers can not make one of them consider another dead.
+    """
+
+    model_class = models.Controller
+
+    @staticmethod
+    def _cutoff(session, expiry):
+        return _database_now(session) - datetime.timedelta(seconds=expiry)
+
+    def heartbeat(self, session, host):
+        """Records that the controller on host is alive.
+
+        :param session: A Sql Alchemy database session.
+        :param host: The host name of the controller.
+        :returns: None
+        """
+        with session.begin(subtransactions=True):
+            now = _database_now(session)
+            updated = session.query(self.model_class).filter_by(
+                host=host).update({'updated_at': now})
+            if not updated:
+                session.add(self.model_class(host=host, updated_at=now))
+
+    def get_live_hosts(self, session, expiry):
+        """Lists the controllers that sent a heartbeat recently.
+
+        :param session: A Sql Alchemy database session.
+        :param expiry: Seconds after which a silent controller is dead.
+        :returns: A sorted list of host names.
+        """
+        rows = (session.query(self.model_class.host)
+                .filter(self.model_class.updated_at >=
+                        self._cutoff(session, expiry))
+                .order_by(self.model_class.host))
+        return [row.host for row in rows]
+
+    def purge_dead(self, session, expiry):
+        """Deletes the controllers that have been silent for too long.
+
+        :param session: A Sql Alchemy database session.
+        :param expiry: Seconds after which a silent controller is dead.
+        :returns: The number of controllers deleted.
+        """
+        with session.begin(subtransactions=True):
+            return session.query(self.model_class).filter(
+                self.model_class.updated_at <
+                self._cutoff(session, expiry)).delete()
+
+
+class DistributedLockRepository(BaseRepository):
+
+    model_class = models.DistributedLock
+
+    def acquire(self, session, name, owner, ttl):
+        """Takes a lock row unless another owner holds it.
+
+        The lock is taken over when its holder let it expire, and taking it
+        again as its owner extends it.  Only one of several controllers
+        racing for the lock succeeds, either by the conditional UPDATE or
+        by the primary key on INSERT.  Expiry is set and checked with the
+        database clock.
+
+        :param session: A Sql Alchemy database session.
+        :param name: The name of the lock.
+        :param owner: A name unique to the process taking the lock.
+        :param ttl: Seconds until the lock expires.
+        :returns: True if the lock was taken.
+        """
+        model = self.model_class
+        with session.begin(subtransactions=True):
+            now = _database_now(session)
+            expires_at = now + datetime.timedelta(seconds=ttl)
+            updated = (session.query(model)
+                       .filter(model.name == name)
+                       .filter(sa.or_(model.owner == owner,
+                                      model.expires_at < now))
+                       .update({'owner': owner, 'expires_at': expires_at},
+                               synchronize_session=False))
+        if updated:
+            return True
+        try:
+            with session.begin(subtransactions=True):
+                session.execute(model.__table__.insert().values(
+                    name=name, owner=owner, expires_at=expires_at))
+        except db_exception.DBDuplicateEntry:
+            return False
+        return True
+
+    def release(self, session, name, owner):
+        """Drops a lock row if owner still holds it.
+
+        :param session: A Sql Alchemy database session.
+        :param name: The name of the lock.
+        :param owner: The owner that took the lock.
+        :returns: False if the lock had expired and was taken over.
+        """
+        with session.begin(subtransactions=True):
+            return bool(session.query(self.model_class)
+                        .filter_by(name=name, owner=owner)
+                        .delete(synchronize_session=False))
+
+
+class ListenerStatisticsRepository(BaseRepository):
+
+    model_class = models.ListenerStatistics
+
+    COUNTER_FIELDS = ('bytes_in', 'bytes_out', 'total_connections')
+
+    def increment_batch(self, session, deltas):
+        """Adds counter deltas to many listeners' statistics at once.
+
+        bytes_in, bytes_out and total_connections are incremented by the
+        given amounts while active_connections, a gauge, is replaced unless
+        it is None.  Rows that do not exist yet are inserted, unless their
+        listener has been deleted.  Existing rows are updated with one
+        executemany UPDATE and new rows are added with one executemany
+        INSERT per chunk.
+
+        :param session: A Sql Alchemy database session.
+        :param deltas: A dict mapping listener id to a dict with the keys
+                       bytes_in, bytes_out, total_connections and
+                       active_connections.
+        :returns: The ids of the listeners skipped for not existing.
+        """
+        table = self.model_class.__table__
+        increment = table.update().where(
+            table.c.listener_id == sa.bindparam('_listener_id')).values(
+                dict([(field, table.c[field] + sa.bindparam(field))
+                      for field in self.COUNTER_FIELDS] +
+                     [('active_connections',
+                       sa.func.coalesce(sa.bindparam('active_connections'),
+                                        table.c.active_connections))]))
+        listener_table = models.Listener.__table__
+        skipped = []
+        with session.begin(subtransactions=True):
+            for chunk in _chunks(deltas):
+                existing = set(row[0] for row in session.execute(
+                    sa.select([table.c.listener_id]).where(
+                        table.c.listener_id.in_(chunk))))
+                missing = [listener_id for listener_id in chunk
+                           if listener_id not in existing]
+                if missing:
+                    listeners = set(row[0] for row in session.execute(
+                        sa.select([listener_table.c.id]).where(
+                            listener_table.c.id.in_(missing))))
+                    skipped.extend(listener_id for listener_id in missing
+                                   if listener_id not in listeners)
+                else:
+                    listeners = set()
+                updates, inserts = [], []
+                for listener_id in chunk:
+                    row = dict(deltas[listener_id])
+                    if listener_id in existing:
+                        row['_listener_id'] = listener_id
+                        updates.append(row)
+                    elif listener_id in listeners:
+                        row['listener_id'] = listener_id
+                        if row['active_connections'] is None:
+                            row['active_connections'] = 0
+                        inserts.append(row)
+                if updates:
+                    session.execute(increment, updates)
+                if inserts:
+                    session.execute(table.insert(), inserts)
+        return skipped
+
+
+class HealthStatusRepository(object):
+    """Writes an amphora health map back to the operating_status columns.
+
+    The health map has the form given in the amphora driver interface spec::
+
+        {"loadbalancers": {"<lb id>": {
+            "loadbalancer-status": ONLINE,
+            "listeners": {"<listener id>": {
+                "listener-status": ONLINE,
+                "nodes": {"<member id>": ONLINE, ...},
+                "pools": {"<pool id>": {"pool-status": ONLINE,
+                                        "nodes": {...}}}}}}}}
+
+    Every level is optional, so a map carrying only the items whose health
+    changed is applied as is.
+    """
+
+    def __init__(self):
+        self.load_balancer = LoadBalancerRepository()
+        self.listener = ListenerRepository()
+        self.pool = PoolRepository()
+        self.member = MemberRepository()
+
+    @staticmethod
+    def flatten(health):
+        """Splits a health map into {id: status} dicts per entity type.
+
+        :returns: (load_balancers, listeners, pools, members)
+        """
+        load_balancers, listeners, pools, members = {}, {}, {}, {}
+
+        def add_pool(pool_id, pool):
+            if constants.HEALTH_POOL_STATUS in pool:
+                pools[pool_id] = pool[constants.HEALTH_POOL_STATUS]
+            members.update(pool.get(constants.HEALTH_NODES, {}))
+
+        for lb_id, lb in health.get(constants.HEALTH_LOADBALANCERS,
+                                    {}).items():
+            if constants.HEALTH_LOADBALANCER_STATUS in lb:
+                load_balancers[lb_id] = lb[
+                    constants.HEALTH_LOADBALANCER_STATUS]
+            for listener_id, listener in lb.get(constants.HEALTH_LISTENERS,
+                                                {}).items():
+                if constants.HEALTH_LISTENER_STATUS in listener:
+                    listeners[listener_id] = listener[
+                        constants.HEALTH_LISTENER_STATUS]
+                members.update(listener.get(constants.HEALTH_NODES, {}))
+                for pool_id, pool in listener.get(constants.HEALTH_POOLS,
+                                                  {}).items():
+                    add_pool(pool_id, pool)
+        return load_balancers, listeners, pools, members
+
+    def update_health(self, session, health):
+        """Applies a health map in a few set-based UPDATE statements.
+
+        :param session: A Sql Alchemy database session.
+        :param health: A health map, see the class docstring.
+        :returns: The number of rows whose operating_status changed.
+        """
+        return self.update_statuses(session, *self.flatten(health))
+
+    def update_statuses(self, session, load_balancers, listeners, pools,
+                        members):
+        """Applies {id: operating_status} dicts per entity type.
+
+        :param session: A Sql Alchemy database session.
+        :returns: The number of rows whose operating_status changed.
+        """
+        repos = (self.load_balancer, self.listener, self.pool, self.member)
+        changed = 0
+        with session.begin(subtransactions=True):
+            for repo, statuses in zip(
+                    repos, (load_balancers, listeners, pools, members)):
+                if statuses:
+                    changed += repo.update_status_batch(
+                        session, 'operating_status', statuses)
+        return changed
@@ -0,0 +1,125 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+import mock
+
+from octavia.amphorae.drivers.haproxy_simple import connection_pool
+import octavia.tests.unit.base as base
+
+
+class TestConnectionPool(base.TestCase):
+
+    def setUp(self):
+        super(TestConnectionPool, self).setUp()
+        self.clock = mock.Mock(return_value=100.0)
+        self.pool = connection_pool.ConnectionPool(
+            max_connections=3, max_idle_per_amphora=2, idle_timeout=60,
+            connect_timeout=5, use_ssl=False, clock=self.clock)
+
+    def _get(self, host):
+        conn = self.pool.get(host, 9443)
+        # Pretend the connection was used for a request.
+        conn.sock = mock.Mock()
+        return conn
+
+    def test_connections_are_reused(self):
+        conn = self._get('10.0.0.1')
+        self.pool.put(conn)
+        self.assertIs(conn, self._get('10.0.0.1'))
+        self.assertIsNot(conn, self._get('10.0.0.2'))
+        self.assertEqual(2, self.pool.opened)
+        self.assertEqual(1, self.pool.reused)
+
+    def test_closed_connection_is_not_kept(self):
+        conn = self.pool.get('10.0.0.1', 9443)
+        self.pool.put(conn)
+        self.assertEqual(0, self.pool.get_metrics()['idle_connections'])
+        self.assertEqual(0, self.pool.open_connections)
+
+    def test_idle_per_amphora_cap(self):
+        conns = [self._get('10.0.0.1') for i in range(3)]
+        for conn in conns:
+            self.pool.put(conn)
+        self.assertEqual(2, self.pool.get_metrics()['idle_connections'])
+        self.assertEqual(2, self.pool.open_connections)
+
+    def test_global_cap_evicts_least_recently_used(self):
+        first = self._get('10.0.0.1')
+        first_sock = first.sock
+        self.pool.put(first)
+        self.clock.return_value += 1
+        second = self._get('10.0.0.2')
+        self.pool.put(second)
+        self._get('10.0.0.3')
+        self._get('10.0.0.4')
+        self.assertEqual(3, self.pool.open_connections)
+        self.assertEqual(1, self.pool.evicted)
+        first_sock.close.assert_called_once_with()
+        self.assertIs(second, self._get('10.0.0.2'))
+
+    def test_idle_timeout(self):
+        conn = self._get('10.0.0.1')
+        self.pool.put(conn)
+        self.clock.return_value += 60
+        self.assertIsNot(conn, self._get('10.0.0.1'))
+        self.assertEqual(1, self.pool.evicted)
+
+    def test_evict_idle(self):
+        self.pool.put(self._get('10.0.0.1'))
+        self.clock.return_value += 30
+        self.pool.put(self._get('10.0.0.2'))
+        self.clock.return_value += 30
+        self.pool.evict_idle()
+        self.assertEqual({'open_connections': 1, 'idle_connections': 1,
+                          'opened': 2, 'reused': 0, 'evicted': 1,
+                          'handshakes': 0}, self.pool.get_metrics())
+
+    def test_connection_context_discards_on_error(self):
+        def fail():
+            with self.pool.connection('10.0.0.1', 9443) as conn:
+                conn.sock = mock.Mock()
+                raise IOError()
+        self.assertRaises(IOError, fail)
+        self.assertEqual(0, self.pool.open_connections)
+
+    def test_connection_context_discards_on_timeout(self):
+        def hang():
+            with self.pool.connection('10.0.0.1', 9443) as conn:
+                conn.sock = mock.Mock()
+                raise eventlet.Timeout()
+        for i in range(4):
+            self.assertRaises(eventlet.Timeout, hang)
+        self.assertEqual(0, self.pool.open_connections)
+
+    @mock.patch.object(connection_pool, 'LOG')
+    @mock.patch.object(connection_pool, 'cfg')
+    def test_ssl_verifies_agents_with_server_ca(self, cfg, log):
+        cfg.CONF.haproxy_amphora.client_cert = '/etc/octavia/client.pem'
+        cfg.CONF.haproxy_amphora.server_ca = '/etc/octavia/ca.pem'
+        ssl_kwargs = connection_pool.ConnectionPool._ssl_kwargs()
+        self.assertEqual(connection_pool.ssl.CERT_REQUIRED,
+                         ssl_kwargs['cert_reqs'])
+        self.assertEqual('/etc/octavia/ca.pem', ssl_kwargs['ca_certs'])
+        self.assertFalse(log.warning.called)
+
+    @mock.patch.object(connection_pool, 'LOG')
+    @mock.patch.object(connection_pool, 'cfg')
+    def test_ssl_without_server_ca_warns(self, cfg, log):
+        cfg.CONF.haproxy_amphora.client_cert = '/etc/octavia/client.pem'
+        cfg.CONF.haproxy_amphora.server_ca = None
+        ssl_kwargs = connection_pool.ConnectionPool._ssl_kwargs()
+        self.assertEqual(connection_pool.ssl.CERT_NONE,
+                         ssl_kwargs['cert_reqs'])
+        self.assertTrue(log.warning.called)
@@ -0,0 +1,124 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from octavia.amphorae.drivers.haproxy_simple import driver
+from octavia.amphorae.drivers.haproxy_simple import jinja_cfg
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.controller.healthmanager import heartbeat_monitor
+import octavia.tests.unit.base as base
+
+
+class TestHaproxyAmphoraLoadBalancerDriver(base.TestCase):
+
+    def setUp(self):
+        super(TestHaproxyAmphoraLoadBalancerDriver, self).setUp()
+        self.client = mock.Mock()
+        self.driver = driver.HaproxyAmphoraLoadBalancerDriver(
+            self.client, jinja_cfg.JinjaTemplater(base_path='/var/lib/octa'))
+        self.amphorae = [data_models.Amphora(id='amp1'),
+                         data_models.Amphora(id='amp2')]
+        self.member = data_models.Member(
+            id='member1', ip_address='10.0.1.1', protocol_port=80, weight=1,
+            enabled=True)
+        pool = data_models.Pool(
+            id='pool1', protocol=constants.PROTOCOL_HTTP,
+            lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN, enabled=True,
+            members=[self.member])
+        self.listener = data_models.Listener(
+            id='listener1', protocol=constants.PROTOCOL_HTTP,
+            protocol_port=80, enabled=True, default_pool_id=pool.id,
+            default_pool=pool, load_balancer=data_models.LoadBalancer(
+                amphorae=self.amphorae))
+        self.vip = data_models.Vip(ip_address='10.0.0.2')
+
+    def test_update_pushes_and_reloads(self):
+        self.driver.update(self.listener, self.vip)
+        self.assertEqual(2, self.client.upload_config.call_count)
+        self.client.reload_listener.assert_has_calls(
+            [mock.call(self.amphorae[0], 'listener1'),
+             mock.call(self.amphorae[1], 'listener1')])
+        config = self.client.upload_config.call_args[0][2]
+        self.assertEqual(driver.config_hash(config),
+                         self.driver.pushed_hash('amp1', 'listener1'))
+
+    def test_unchanged_update_is_skipped(self):
+        self.driver.update(self.listener, self.vip)
+        self.client.reset_mock()
+        self.driver.update(self.listener, self.vip)
+        self.assertFalse(self.client.upload_config.called)
+        self.assertFalse(self.client.reload_listener.called)
+        self.assertEqual(2, self.driver.pushes)
+        self.assertEqual(2, self.driver.pushes_skipped)
+
+    def test_changed_update_is_pushed(self):
+        self.driver.update(self.listener, self.vip)
+        self.member.weight = 5
+        self.driver.update(self.listener, self.vip)
+        self.assertEqual(4, self.client.reload_listener.call_count)
+
+    def test_failed_push_is_retried(self):
+        self.client.reload_listener.side_effect = [None, IOError]
+        self.assertRaises(IOError, self.driver.update, self.listener,
+                          self.vip)
+        self.client.reload_listener.side_effect = None
+        self.client.reset_mock()
+        self.driver.update(self.listener, self.vip)
+        self.client.upload_config.assert_called_once_with(
+            self.amphorae[1], 'listener1', mock.ANY)
+
+    def test_suspend_and_enable_forget_hash(self):
+        self.driver.update(self.listener, self.vip)
+        self.driver.suspend(self.listener, self.vip)
+        self.assertEqual(2, self.client.stop_listener.call_count)
+        self.driver.enable(self.listener, self.vip)
+        self.assertEqual(2, self.client.start_listener.call_count)
+        self.assertIsNone(self.driver.pushed_hash('amp1', 'listener1'))
+        self.driver.update(self.listener, self.vip)
+        self.assertEqual(4, self.client.upload_config.call_count)
+
+    def test_delete(self):
+        self.driver.update(self.listener, self.vip)
+        self.driver.delete(self.listener, self.vip)
+        self.client.delete_listener.assert_called_with(self.amphorae[1],
+                                                       'listener1')
+        self.assertIsNone(self.driver.pushed_hash('amp2', 'listener1'))
+
+    def test_invalidate(self):
+        self.driver.update(self.listener, self.vip)
+        self.driver.invalidate(amphora_id='amp1')
+        self.assertIsNone(self.driver.pushed_hash('amp1', 'listener1'))
+        self.assertIsNotNone(self.driver.pushed_hash('amp2', 'listener1'))
+        self.driver.invalidate()
+        self.assertIsNone(self.driver.pushed_hash('amp2', 'listener1'))
+
+    def test_stale_amphora_is_pushed_again(self):
+        clock = mock.Mock(return_value=0)
+        monitor = heartbeat_monitor.HeartbeatMonitor(
+            self.driver.invalidate, active_interval=10, spare_interval=10,
+            clock=clock)
+        monitor.watch('amp1')
+        self.driver.update(self.listener, self.vip)
+        clock.return_value = 20
+        self.assertEqual(['amp1'], monitor.check())
+        self.client.reset_mock()
+        self.driver.update(self.listener, self.vip)
+        self.client.upload_config.assert_called_once_with(
+            self.amphorae[0], 'listener1', mock.ANY)
+
+    def test_get_health(self):
+        self.driver.get_health(self.amphorae[0])
+        self.client.get.assert_called_once_with(self.amphorae[0], 'health')
@@ -0,0 +1,128 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from octavia.amphorae.drivers.haproxy_simple import jinja_cfg
+from octavia.common import constants
+from octavia.common import data_models
+import octavia.tests.unit.base as base
+
+
+class TestJinjaTemplater(base.TestCase):
+
+    def setUp(self):
+        super(TestJinjaTemplater, self).setUp()
+        self.templater = jinja_cfg.JinjaTemplater(base_path='/var/lib/octa')
+        self.monitor = data_models.HealthMonitor(
+            type=constants.HEALTH_MONITOR_HTTP, delay=5, timeout=3,
+            fall_threshold=2, rise_threshold=3, http_method='GET',
+            url_path='/index.html', expected_codes='200-202,404',
+            enabled=True)
+        self.members = [data_models.Member(
+            id='member%d' % i, ip_address='10.0.1.%d' % i, protocol_port=80,
+            weight=1, enabled=True) for i in range(10)]
+        self.pool = data_models.Pool(
+            id='pool1', protocol=constants.PROTOCOL_HTTP,
+            lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN, enabled=True,
+            members=self.members, health_monitor=self.monitor)
+        self.listener = data_models.Listener(
+            id='listener1', protocol=constants.PROTOCOL_HTTP,
+            protocol_port=80, connection_limit=100, enabled=True,
+            default_pool_id=self.pool.id, default_pool=self.pool)
+        self.vip = data_models.Vip(ip_address='10.0.0.2')
+
+    def _build(self):
+        return self.templater.build_config(self.listener, self.vip)
+
+    def test_expand_expected_codes(self):
+        self.assertEqual('200', jinja_cfg.expand_expected_codes('200'))
+        self.assertEqual('200|201|202|404',
+                         jinja_cfg.expand_expected_codes('200-202, 404'))
+        self.assertEqual('', jinja_cfg.expand_expected_codes(None))
+
+    def test_build_config(self):
+        self.pool.session_persistence = data_models.SessionPersistence(
+            type=constants.SESSION_PERSISTENCE_HTTP_COOKIE)
+        self.members[1].enabled = False
+        config = self._build()
+        self.assertIn('stats socket /var/lib/octa/listener1.sock', config)
+        self.assertIn('frontend listener1\n', config)
+        self.assertIn('    maxconn 100\n', config)
+        self.assertIn('    bind 10.0.0.2:80\n', config)
+        self.assertIn('    default_backend pool1\n', config)
+        self.assertIn('backend pool1\n    mode http\n    balance roundrobin\n'
+                      '    cookie SRV insert indirect nocache\n', config)
+        self.assertIn('    option httpchk GET /index.html\n', config)
+        self.assertIn('    http-check expect rstatus 200|201|202|404\n',
+                      config)
+        self.assertIn('    server member0 10.0.1.0:80 weight 1 check inter 5s '
+                      'fall 2 rise 3 cookie member0\n', config)
+        self.assertIn('    server member1 10.0.1.1:80 weight 1 check inter 5s '
+                      'fall 2 rise 3 cookie member1 disabled\n', config)
+
+    def test_tcp_without_monitor(self):
+        self.listener.protocol = constants.PROTOCOL_TCP
+        self.pool.protocol = constants.PROTOCOL_TCP
+        self.pool.health_monitor = None
+        self.pool.lb_algorithm = constants.LB_ALGORITHM_SOURCE_IP
+        self.pool.session_persistence = data_models.SessionPersistence(
+            type=constants.SESSION_PERSISTENCE_SOURCE_IP)
+        config = self._build()
+        self.assertIn('    option tcplog\n', config)
+        self.assertIn('    mode tcp\n    balance source\n'
+                      '    stick-table type ip size 10k\n    stick on src\n',
+                      config)
+        self.assertNotIn('httpchk', config)
+        self.assertIn('    server member0 10.0.1.0:80 weight 1\n', config)
+
+    def test_unchanged_config_is_not_rendered(self):
+        config = self._build()
+        self.assertEqual(12, self.templater.fragments_rendered)
+        self.assertEqual(config, self._build())
+        self.assertEqual(12, self.templater.fragments_rendered)
+        self.assertEqual(12, self.templater.fragments_reused)
+
+    def test_member_change_renders_one_fragment(self):
+        self._build()
+        self.members[3].weight = 10
+        config = self._build()
+        self.assertEqual(13, self.templater.fragments_rendered)
+        self.assertIn('server member3 10.0.1.3:80 weight 10 ', config)
+        self.assertEqual(
+            config, jinja_cfg.JinjaTemplater(
+                base_path='/var/lib/octa').build_config(self.listener,
+                                                        self.vip))
+
+    def test_monitor_change_renders_backend_and_members(self):
+        self._build()
+        self.monitor.delay = 10
+        config = self._build()
+        self.assertEqual(23, self.templater.fragments_rendered)
+        self.assertNotIn('inter 5s', config)
+
+    def test_removed_members_leave_the_cache(self):
+        self._build()
+        del self.members[5:]
+        config = self._build()
+        self.assertNotIn('member5', config)
+        self.members.append(data_models.Member(
+            id='member5', ip_address='10.0.1.5', protocol_port=80, weight=1,
+            enabled=True))
+        self._build()
+        self.assertEqual(13, self.templater.fragments_rendered)
+
+    def test_forget(self):
+        self._build()
+        self.templater.forget(self.listener.id)
+        self._build()
+        self.assertEqual(24, self.templater.fragments_rendered)
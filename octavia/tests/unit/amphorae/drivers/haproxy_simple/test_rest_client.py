@@ -0,0 +1,136 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import eventlet
+import mock
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from octavia.amphorae.drivers import exceptions as driver_exceptions
+from octavia.amphorae.drivers.haproxy_simple import connection_pool
+from octavia.amphorae.drivers.haproxy_simple import rest_client
+from octavia.common import data_models
+import octavia.tests.unit.base as base
+
+
+class FakeAgentHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _respond(self, status, body=''):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.requests.append(('PUT', self.path,
+                                     self.rfile.read(length)))
+        self._respond(202)
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path, None))
+        if self.path == '/0.5/info':
+            self._respond(200, '{"haproxy": "1.5"}')
+        else:
+            self._respond(404)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeAgent(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           FakeAgentHandler)
+        self.requests = []
+
+
+class TestAmphoraAPIClient(base.TestCase):
+
+    def setUp(self):
+        super(TestAmphoraAPIClient, self).setUp()
+        self.agent = FakeAgent()
+        thread = threading.Thread(target=self.agent.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.agent.server_close)
+        self.addCleanup(self.agent.shutdown)
+        self.pool = connection_pool.ConnectionPool(
+            max_connections=10, max_idle_per_amphora=2, idle_timeout=60,
+            connect_timeout=5, use_ssl=False)
+        self.addCleanup(self.pool.close_all)
+        self.client = rest_client.AmphoraAPIClient(
+            self.pool, port=self.agent.server_address[1])
+        self.amphora = data_models.Amphora(id='amp1',
+                                           lb_network_ip='127.0.0.1')
+
+    def test_requests_reuse_connection(self):
+        self.client.upload_config(self.amphora, 'listener1', 'config')
+        self.client.reload_listener(self.amphora, 'listener1')
+        self.assertEqual({'haproxy': '1.5'},
+                         self.client.get(self.amphora, 'info'))
+        self.assertEqual(
+            [('PUT', '/0.5/listeners/listener1/haproxy', 'config'),
+             ('PUT', '/0.5/listeners/listener1/reload', ''),
+             ('GET', '/0.5/info', None)], self.agent.requests)
+        self.assertEqual(1, self.pool.opened)
+        self.assertEqual(2, self.pool.reused)
+
+    def test_error_status(self):
+        self.assertRaises(driver_exceptions.NotFoundError,
+                          self.client.get, self.amphora, 'missing')
+
+    def test_stale_connection_is_retried(self):
+        self.client.reload_listener(self.amphora, 'listener1')
+        idle = self.pool.get('127.0.0.1', self.agent.server_address[1])
+        idle.sock.close()
+        self.pool.put(idle)
+        self.client.reload_listener(self.amphora, 'listener1')
+        self.assertEqual(2, len(self.agent.requests))
+
+    def test_unreachable_amphora(self):
+        self.agent.server_close()
+        amphora = data_models.Amphora(id='amp2', lb_network_ip='127.0.0.1')
+        client = rest_client.AmphoraAPIClient(self.pool, port=1)
+        self.assertRaises(driver_exceptions.UnavailableException,
+                          client.get, amphora, 'info')
+        self.assertEqual(0, self.pool.open_connections)
+
+    def test_outside_timeout_frees_connection(self):
+        pool = connection_pool.ConnectionPool(
+            max_connections=2, max_idle_per_amphora=2, idle_timeout=60,
+            connect_timeout=5, use_ssl=False)
+        self.addCleanup(pool.close_all)
+        client = rest_client.AmphoraAPIClient(
+            pool, port=self.agent.server_address[1])
+        # Timeouts of callers, e.g. the fanout or circuit breaker layer.
+        # A leaked connection would make pool.get() block for good.
+        with eventlet.Timeout(5):
+            with mock.patch.object(connection_pool.AmphoraConnection,
+                                   'getresponse',
+                                   side_effect=eventlet.Timeout()):
+                for i in range(3):
+                    self.assertRaises(eventlet.Timeout, client.get,
+                                      self.amphora, 'info')
+            self.assertEqual(0, pool.open_connections)
+            self.assertEqual({'haproxy': '1.5'},
+                             client.get(self.amphora, 'info'))
@@ -0,0 +1,177 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+import time
+
+import mock
+
+from octavia.amphorae.drivers.health import heartbeat_udp
+from octavia.common import constants
+from octavia.openstack.common import jsonutils
+import octavia.tests.unit.base as base
+
+
+def _heartbeat(amp_id, lb_id, listener_id, member_status, bytes_in=0,
+               active_connections=0):
+    return {'id': amp_id,
+            'health': {
+                constants.HEALTH_AMPHORA_STATUS: constants.ONLINE,
+                constants.HEALTH_LOADBALANCERS: {lb_id: {
+                    constants.HEALTH_LOADBALANCER_STATUS: constants.ONLINE,
+                    constants.HEALTH_LISTENERS: {listener_id: {
+                        constants.HEALTH_LISTENER_STATUS: constants.ONLINE,
+                        constants.HEALTH_NODES: member_status}}}}},
+            'stats': {lb_id: {listener_id: {
+                'bytes_in': bytes_in,
+                'active_connections': active_connections}}}}
+
+
+class TestUDPHeartbeatReceiver(base.TestCase):
+
+    def setUp(self):
+        super(TestUDPHeartbeatReceiver, self).setUp()
+        self.health_handler = mock.Mock()
+        self.stats_handler = mock.Mock()
+        self.receiver = heartbeat_udp.UDPHeartbeatReceiver(
+            self.health_handler, self.stats_handler, ip='127.0.0.1', port=0,
+            batch_size=10, rcvbuf=0)
+        self.receiver.bind()
+        self.addCleanup(self.receiver.stop)
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(self.sender.close)
+
+    def _send(self, *payloads):
+        for payload in payloads:
+            if not isinstance(payload, str):
+                payload = jsonutils.dumps(payload)
+            self.sender.sendto(payload, self.receiver.address)
+
+    def _receive(self, count):
+        heartbeats = []
+        deadline = time.time() + 5
+        while len(heartbeats) < count and time.time() < deadline:
+            heartbeats.extend(self.receiver.receive())
+        return heartbeats
+
+    def test_receive_does_not_block(self):
+        self.assertEqual([], self.receiver.receive())
+
+    def test_receive_limits_batch_size(self):
+        self._send(*[_heartbeat('amp', 'lb', 'l', {}) for i in range(15)])
+        self.assertEqual(10, len(self._receive(10)))
+        self.assertEqual(5, len(self._receive(5)))
+        self.assertEqual(15, self.receiver.packets_received)
+
+    def test_malformed_packets_are_dropped(self):
+        self._send('not json', '[1, 2]', _heartbeat('amp', 'lb', 'l', {}))
+        heartbeats = self._receive(1)
+        self.assertEqual(1, len(heartbeats))
+        self.assertEqual(2, self.receiver.packets_malformed)
+
+    def test_bad_heartbeats_are_dropped_alone(self):
+        bad = [dict(_heartbeat('amp', 'lb', 'l', {}), health=[1]),
+               dict(_heartbeat('amp', 'lb', 'l', {}),
+                    stats={'lb': {'l': {'bytes_in': 'many'}}}),
+               dict(_heartbeat('amp', 'lb', 'l', {}),
+                    stats={'lb': {'l': 5}}),
+               dict(_heartbeat('amp', 'lb', 'l', {}), id=7)]
+        health = _heartbeat('amp', 'lb', 'l', {})
+        health['health'][constants.HEALTH_LOADBALANCERS]['lb'][
+            constants.HEALTH_LISTENERS] = ['l']
+        bad.append(health)
+        self._send(*(bad + [_heartbeat('amp1', 'lb1', 'l1', {}, bytes_in=3),
+                            _heartbeat('amp2', 'lb1', 'l1', {}, bytes_in=4)]))
+        deadline = time.time() + 5
+        while (self.receiver.packets_received < 7 and
+               time.time() < deadline):
+            self.receiver.run_once()
+        self.assertEqual(5, self.receiver.packets_malformed)
+        self.stats_handler.update_stats.assert_called_once_with(
+            {'lb1': {'l1': {'bytes_in': 7, 'active_connections': 0}}})
+        health = self.health_handler.update_health.call_args[0][0]
+        self.assertEqual(set(['amp1', 'amp2']),
+                         set(health[constants.HEALTH_AMPHORAE]))
+
+    def test_dispatch_merges_batch(self):
+        self.receiver.dispatch([
+            _heartbeat('amp1', 'lb1', 'l1', {'m1': constants.ONLINE},
+                       bytes_in=10, active_connections=2),
+            _heartbeat('amp2', 'lb1', 'l1', {'m2': constants.OFFLINE},
+                       bytes_in=5, active_connections=3),
+            _heartbeat('amp3', 'lb2', 'l2', {'m3': constants.ONLINE})])
+        self.health_handler.update_health.assert_called_once_with({
+            constants.HEALTH_AMPHORAE: {'amp1': constants.ONLINE,
+                                        'amp2': constants.ONLINE,
+                                        'amp3': constants.ONLINE},
+            constants.HEALTH_LOADBALANCERS: {
+                'lb1': {constants.HEALTH_LOADBALANCER_STATUS:
+                        constants.ONLINE,
+                        constants.HEALTH_LISTENERS: {'l1': {
+                            constants.HEALTH_LISTENER_STATUS:
+                            constants.ONLINE,
+                            constants.HEALTH_NODES: {
+                                'm1': constants.ONLINE,
+                                'm2': constants.OFFLINE}}}},
+                'lb2': {constants.HEALTH_LOADBALANCER_STATUS:
+                        constants.ONLINE,
+                        constants.HEALTH_LISTENERS: {'l2': {
+                            constants.HEALTH_LISTENER_STATUS:
+                            constants.ONLINE,
+                            constants.HEALTH_NODES: {
+                                'm3': constants.ONLINE}}}}}})
+        self.stats_handler.update_stats.assert_called_once_with({
+            'lb1': {'l1': {'bytes_in': 15, 'active_connections': 3}},
+            'lb2': {'l2': {'bytes_in': 0, 'active_connections': 0}}})
+
+    def test_dispatch_skips_amphorae_not_owned(self):
+        self.receiver.membership = mock.Mock()
+        self.receiver.membership.owns.side_effect = lambda amp_id: (
+            amp_id == 'amp2')
+        self.receiver.dispatch([
+            _heartbeat('amp1', 'lb1', 'l1', {'m1': constants.ONLINE}),
+            _heartbeat('amp2', 'lb2', 'l2', {'m2': constants.ONLINE})])
+        health = self.health_handler.update_health.call_args[0][0]
+        self.assertEqual({'amp2': constants.ONLINE},
+                         health[constants.HEALTH_AMPHORAE])
+        self.assertEqual(['lb2'], list(
+            health[constants.HEALTH_LOADBALANCERS]))
+        self.assertEqual(['lb2'], list(
+            self.stats_handler.update_stats.call_args[0][0]))
+        self.assertEqual(1, self.receiver.heartbeats_not_owned)
+
+    def test_run_once(self):
+        self._send(_heartbeat('amp1', 'lb1', 'l1', {}),
+                   _heartbeat('amp2', 'lb1', 'l1', {}))
+        deadline = time.time() + 5
+        while (self.receiver.packets_received < 2 and
+               time.time() < deadline):
+            self.receiver.run_once()
+        self.assertEqual(2, self.receiver.packets_received)
+        health = self.health_handler.update_health.call_args_list
+        amphorae = set()
+        for call in health:
+            amphorae.update(call[0][0][constants.HEALTH_AMPHORAE])
+        self.assertEqual(set(['amp1', 'amp2']), amphorae)
+
+    def test_start_stop(self):
+        self.receiver.start()
+        self._send(_heartbeat('amp1', 'lb1', 'l1', {}))
+        deadline = time.time() + 5
+        while (not self.health_handler.update_health.called and
+               time.time() < deadline):
+            heartbeat_udp.greenthread.sleep(0.01)
+        self.assertTrue(self.health_handler.update_health.called)
+        self.receiver.stop()
+        self.assertIsNone(self.receiver.sock)
@@ -0,0 +1,161 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+import mock
+
+from octavia.amphorae.drivers import circuit_breaker
+from octavia.amphorae.drivers import exceptions as driver_exceptions
+from octavia.amphorae.drivers import fanout
+from octavia.common import data_models
+import octavia.tests.unit.base as base
+
+
+class TestCircuitBreaker(base.TestCase):
+
+    def setUp(self):
+        super(TestCircuitBreaker, self).setUp()
+        self.clock = mock.Mock(return_value=0.0)
+        self.breaker = circuit_breaker.CircuitBreaker(3, 30, self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+        self.breaker.record_failure()
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_probe(self):
+        for i in range(3):
+            self.breaker.record_failure()
+        self.clock.return_value = 30.0
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(circuit_breaker.HALF_OPEN, self.breaker.state)
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state)
+        self.clock.return_value = 60.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state)
+        self.assertTrue(self.breaker.allow())
+
+
+class TestLatencyTracker(base.TestCase):
+
+    def test_timeout(self):
+        tracker = circuit_breaker.LatencyTracker(90, 2.0, 0.5, 10)
+        self.assertEqual(10, tracker.timeout())
+        for latency in range(1, 11):
+            tracker.record(latency / 10.0)
+        self.assertEqual(0.9, tracker.latency_percentile())
+        self.assertEqual(1.8, tracker.timeout())
+        for i in range(100):
+            tracker.record(0.01)
+        self.assertEqual(0.5, tracker.timeout())
+        for i in range(100):
+            tracker.record(60)
+        self.assertEqual(10, tracker.timeout())
+
+
+class TestCircuitBreakerDriver(base.TestCase):
+
+    def setUp(self):
+        super(TestCircuitBreakerDriver, self).setUp()
+        self.driver = mock.Mock()
+        self.breaker_driver = circuit_breaker.CircuitBreakerDriver(
+            self.driver, failure_threshold=2, reset_timeout=30,
+            percentile=99, multiplier=3, min_timeout=0.05, max_timeout=5)
+        self.amphorae = [data_models.Amphora(id='amp1'),
+                         data_models.Amphora(id='amp2')]
+        self.listener = data_models.Listener(
+            id='listener1', load_balancer=data_models.LoadBalancer(
+                amphorae=self.amphorae))
+
+    def test_calls_pass_through(self):
+        self.driver.get_health.return_value = {'amphora-status': 'ONLINE'}
+        self.assertEqual({'amphora-status': 'ONLINE'},
+                         self.breaker_driver.get_health(self.amphorae[0]))
+        self.breaker_driver.update(self.listener, 'vip')
+        self.driver.update.assert_called_once_with(self.listener, 'vip')
+        metrics = self.breaker_driver.get_breaker_metrics()
+        self.assertEqual(2, metrics['calls'])
+        self.assertEqual(circuit_breaker.CLOSED,
+                         metrics['amphorae']['amp1']['state'])
+
+    def test_open_breaker_rejects_calls(self):
+        self.driver.info.side_effect = IOError
+        for i in range(2):
+            self.assertRaises(IOError, self.breaker_driver.info,
+                              self.amphorae[0])
+        self.assertRaises(driver_exceptions.UnavailableException,
+                          self.breaker_driver.info, self.amphorae[0])
+        self.assertEqual(2, self.driver.info.call_count)
+        # The listener touches the broken amphora too.
+        self.assertRaises(driver_exceptions.UnavailableException,
+                          self.breaker_driver.update, self.listener, 'vip')
+        self.assertFalse(self.driver.update.called)
+        self.breaker_driver.get_health(self.amphorae[1])
+        metrics = self.breaker_driver.get_breaker_metrics()
+        self.assertEqual(2, metrics['rejected'])
+        self.assertEqual(2, metrics['failures'])
+        self.assertEqual({circuit_breaker.OPEN: 1, circuit_breaker.CLOSED: 1,
+                          circuit_breaker.HALF_OPEN: 0}, metrics['states'])
+
+    def test_hung_amphora_times_out(self):
+        for i in range(circuit_breaker.MIN_LATENCY_SAMPLES):
+            self.breaker_driver.get_health(self.amphorae[0])
+        self.assertEqual(0.05, self.breaker_driver.get_breaker_metrics()[
+            'amphorae']['amp1']['timeout'])
+        self.driver.get_health.side_effect = lambda amphora: (
+            eventlet.sleep(10))
+        self.assertRaises(driver_exceptions.TimeOutException,
+                          self.breaker_driver.get_health, self.amphorae[0])
+        self.assertEqual(1, self.breaker_driver.timeouts)
+
+    def test_not_implemented_does_not_count(self):
+        self.driver.get_diagnostics.side_effect = NotImplementedError
+        for i in range(3):
+            self.assertRaises(NotImplementedError,
+                              self.breaker_driver.get_diagnostics,
+                              self.amphorae[0])
+        self.assertEqual(0, self.breaker_driver.failures)
+
+    def test_outside_timeout_releases_probe(self):
+        clock = mock.Mock(return_value=0.0)
+        self.breaker_driver = circuit_breaker.CircuitBreakerDriver(
+            self.driver, failure_threshold=2, reset_timeout=30,
+            percentile=99, multiplier=3, min_timeout=0.05, max_timeout=5,
+            clock=clock)
+        self.driver.info.side_effect = IOError
+        for i in range(2):
+            self.assertRaises(IOError, self.breaker_driver.info,
+                              self.amphorae[0])
+        clock.return_value = 30.0
+        # The half-open probe is cut short by the fanout's own timeout.
+        self.driver.info.side_effect = lambda amphora: eventlet.sleep(10)
+        executor = fanout.FanoutExecutor(concurrency=2, timeout=0.05)
+        results = executor.map(self.breaker_driver.info, self.amphorae[:1])
+        self.assertEqual(set(['amp1']), results.timed_out)
+        # The amphora recovered: the next call is the probe.
+        self.driver.info.side_effect = None
+        self.driver.info.return_value = 'info'
+        results = executor.map(self.breaker_driver.info, self.amphorae[:1])
+        self.assertEqual({'amp1': 'info'}, results.succeeded)
+        self.assertEqual(circuit_breaker.CLOSED,
+                         self.breaker_driver._breakers['amp1'].state)
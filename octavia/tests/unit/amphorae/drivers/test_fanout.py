@@ -0,0 +1,74 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+import mock
+
+from octavia.amphorae.drivers import fanout
+from octavia.common import data_models
+import octavia.tests.unit.base as base
+
+
+class TestFanoutExecutor(base.TestCase):
+
+    def setUp(self):
+        super(TestFanoutExecutor, self).setUp()
+        self.executor = fanout.FanoutExecutor(concurrency=4, timeout=0.5)
+        self.active = 0
+        self.max_active = 0
+
+    def _slow_call(self, value, delay=0.01):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            eventlet.sleep(delay)
+        finally:
+            self.active -= 1
+        return value
+
+    def test_concurrency_is_bounded(self):
+        results = self.executor.execute(
+            (i, self._slow_call, (i * 2,)) for i in range(20))
+        self.assertTrue(results.ok)
+        self.assertEqual(20, len(results))
+        self.assertEqual(dict((i, i * 2) for i in range(20)),
+                         results.succeeded)
+        self.assertEqual(4, self.max_active)
+
+    def test_failures_and_timeouts_are_aggregated(self):
+        error = ValueError('broken amphora')
+        results = self.executor.execute([
+            ('good', self._slow_call, (1,)),
+            ('bad', mock.Mock(side_effect=error), ()),
+            ('hung', self._slow_call, (1, 10))])
+        self.assertFalse(results.ok)
+        self.assertEqual({'good': 1}, results.succeeded)
+        self.assertEqual({'bad': error}, results.failed)
+        self.assertEqual(set(['hung']), results.timed_out)
+        self.assertTrue(results.elapsed < 5)
+
+    def test_map(self):
+        amphorae = [data_models.Amphora(id='amp%d' % i) for i in range(3)]
+        results = self.executor.map(lambda amphora: amphora.host_id,
+                                    amphorae)
+        self.assertEqual({'amp0': None, 'amp1': None, 'amp2': None},
+                         results.succeeded)
+
+    def test_update(self):
+        driver = mock.Mock()
+        listeners = [(data_models.Listener(id='listener%d' % i), 'vip')
+                     for i in range(3)]
+        results = self.executor.update(driver, listeners)
+        self.assertEqual(3, len(results.succeeded))
+        driver.update.assert_any_call(listeners[1][0], 'vip')
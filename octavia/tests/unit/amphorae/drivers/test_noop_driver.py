@@ -0,0 +1,141 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import random
+
+from octavia.amphorae.drivers import exceptions as driver_exceptions
+from octavia.amphorae.drivers import noop_driver
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.db import repositories
+import octavia.tests.unit.base as base
+
+
+class TestLatency(base.TestCase):
+
+    def test_parse(self):
+        latency = noop_driver.Latency.parse('uniform:0.5:1.5')
+        self.assertEqual(noop_driver.UNIFORM, latency.kind)
+        self.assertEqual((0.5, 1.5), (latency.a, latency.b))
+        self.assertEqual(0.25, noop_driver.Latency.parse('constant:0.25').a)
+        self.assertRaises(ValueError, noop_driver.Latency.parse, 'gauss:1')
+
+    def test_sample(self):
+        rng = random.Random(1)
+        self.assertEqual(0.5, noop_driver.Latency(
+            noop_driver.CONSTANT, 0.5).sample(rng))
+        for i in range(100):
+            self.assertTrue(0.5 <= noop_driver.Latency(
+                noop_driver.UNIFORM, 0.5, 1.5).sample(rng) <= 1.5)
+            self.assertTrue(noop_driver.Latency(
+                noop_driver.EXPONENTIAL, 0.1).sample(rng) >= 0)
+            self.assertTrue(noop_driver.Latency(
+                noop_driver.LOGNORMAL, -3, 0.5).sample(rng) > 0)
+
+
+class TestNoopAmphoraLoadBalancerDriver(base.TestCase):
+
+    def setUp(self):
+        super(TestNoopAmphoraLoadBalancerDriver, self).setUp()
+        self.sleeps = []
+        self.load_balancer = data_models.LoadBalancer(id='lb1')
+        self.amphora = data_models.Amphora(id='amp1',
+                                           load_balancer=self.load_balancer)
+        self.load_balancer.amphorae = [self.amphora]
+        self.listener = data_models.Listener(id='listener1',
+                                             load_balancer_id='lb1',
+                                             load_balancer=self.load_balancer)
+
+    def _driver(self, **kwargs):
+        return noop_driver.NoopAmphoraLoadBalancerDriver(
+            seed=1, sleep=self.sleeps.append, **kwargs)
+
+    def _listener_status(self, driver):
+        health = driver.get_health(self.amphora)
+        return health[constants.HEALTH_LOADBALANCERS]['lb1'][
+            constants.HEALTH_LISTENERS]['listener1'][
+                constants.HEALTH_LISTENER_STATUS]
+
+    def test_tracks_listener_state(self):
+        driver = self._driver()
+        driver.update(self.listener, None)
+        self.assertEqual(constants.ONLINE, self._listener_status(driver))
+        driver.suspend(self.listener, None)
+        self.assertEqual(constants.OFFLINE, self._listener_status(driver))
+        driver.enable(self.listener, None)
+        self.assertEqual(constants.ONLINE, self._listener_status(driver))
+        driver.delete(self.listener, None)
+        self.assertEqual({}, driver.get_health(self.amphora)[
+            constants.HEALTH_LOADBALANCERS])
+        self.assertEqual(1, driver.calls['update'])
+        self.assertEqual(4, driver.calls['get_health'])
+        self.assertEqual([], self.sleeps)
+
+    def test_health_map_format(self):
+        driver = self._driver()
+        driver.update(self.listener, None)
+        load_balancers, listeners, pools, members = (
+            repositories.HealthStatusRepository.flatten(
+                driver.get_health(self.amphora)))
+        self.assertEqual({'listener1': constants.ONLINE}, listeners)
+
+    def test_amphora_methods(self):
+        driver = self._driver()
+        self.assertIn('packages', driver.info(self.amphora))
+        self.assertEqual({}, driver.get_metrics(self.amphora))
+        self.assertEqual({}, driver.get_diagnostics(self.amphora))
+
+    def test_latency_is_injected_per_method(self):
+        slow = noop_driver.Behavior(
+            noop_driver.Latency(noop_driver.CONSTANT, 2.0))
+        driver = self._driver(
+            behavior=noop_driver.Behavior(
+                noop_driver.Latency(noop_driver.CONSTANT, 0.5)),
+            behaviors={'update': slow})
+        driver.update(self.listener, None)
+        driver.info(self.amphora)
+        self.assertEqual([2.0, 0.5], self.sleeps)
+        self.assertRaises(ValueError, self._driver,
+                          behaviors={'reboot': slow})
+
+    def test_failures_are_injected(self):
+        driver = self._driver(behavior=noop_driver.Behavior(
+            failure_rate=1.0))
+        self.assertRaises(driver_exceptions.ListenerProvisioningError,
+                          driver.update, self.listener, None)
+        self.assertRaises(driver_exceptions.DeleteFailed,
+                          driver.delete, self.listener, None)
+        self.assertRaises(driver_exceptions.InfoException,
+                          driver.info, self.amphora)
+        self.assertEqual({}, driver.listeners)
+        self.assertEqual(1, driver.failures['update'])
+
+    def test_timeouts_hang_then_raise(self):
+        driver = self._driver(behavior=noop_driver.Behavior(
+            timeout_rate=1.0, hang_time=30))
+        self.assertRaises(driver_exceptions.TimeOutException,
+                          driver.get_health, self.amphora)
+        self.assertEqual([30], self.sleeps)
+        self.assertEqual(1, driver.timeouts['get_health'])
+
+    def test_failure_rate_is_approximated(self):
+        driver = self._driver(behavior=noop_driver.Behavior(
+            failure_rate=0.2, timeout_rate=0.1))
+        for i in range(1000):
+            try:
+                driver.get_metrics(self.amphora)
+            except driver_exceptions.AmphoraDriverError:
+                pass
+        self.assertTrue(150 < driver.failures['get_metrics'] < 250)
+        self.assertTrue(60 < driver.timeouts['get_metrics'] < 140)
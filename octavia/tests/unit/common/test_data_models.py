@@ -0,0 +1,66 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from octavia.common import data_models
+import octavia.tests.unit.base as base
+
+
+class TestDataModels(base.TestCase):
+
+    def _pool(self, **kwargs):
+        pool = data_models.Pool(id='p1', name='pool', **kwargs)
+        pool.members = [data_models.Member(id='m%d' % i, weight=1, pool=pool)
+                        for i in range(2)]
+        return pool
+
+    def test_instances_have_no_dict(self):
+        member = data_models.Member(id='m1')
+        self.assertFalse(hasattr(member, '__dict__'))
+        self.assertRaises(AttributeError, setattr, member, 'unknown', 1)
+
+    def test_to_dict_leaves_out_related_models(self):
+        member = data_models.Member(id='m1', weight=2,
+                                    pool=data_models.Pool(id='p1'))
+        member_dict = member.to_dict()
+        self.assertNotIn('pool', member_dict)
+        self.assertEqual(2, member_dict['weight'])
+        self.assertEqual(set(data_models.Member.__slots__) - set(['pool']),
+                         set(member_dict))
+
+    def test_eq_matches_to_dict(self):
+        models = [self._pool(), self._pool(), self._pool(enabled=True),
+                  data_models.Pool(id='p1', name='pool'),
+                  data_models.Pool(id='p1', name='pool',
+                                   listener=data_models.Listener()),
+                  data_models.Member(id='p1')]
+        for mine in models:
+            for theirs in models:
+                expected = (isinstance(theirs, mine.__class__) and
+                            mine.to_dict() == theirs.to_dict())
+                self.assertEqual(expected, mine == theirs)
+                self.assertEqual(not expected, mine != theirs)
+
+    def test_eq_ignores_related_models(self):
+        mine = data_models.Member(id='m1', pool=data_models.Pool(id='p1'))
+        theirs = data_models.Member(id='m1', pool=data_models.Pool(id='p2'))
+        self.assertEqual(mine, theirs)
+        theirs.pool = None
+        self.assertNotEqual(mine, theirs)
+
+    def test_eq_compares_lists_of_models(self):
+        mine = self._pool()
+        theirs = self._pool()
+        self.assertEqual(mine, theirs)
+        theirs.members[1].weight = 5
+        self.assertNotEqual(mine, theirs)
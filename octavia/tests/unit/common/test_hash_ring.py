@@ -0,0 +1,51 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from octavia.common import hash_ring
+from octavia.openstack.common import uuidutils
+import octavia.tests.unit.base as base
+
+
+class TestHashRing(base.TestCase):
+
+    def setUp(self):
+        super(TestHashRing, self).setUp()
+        self.keys = [uuidutils.generate_uuid() for i in range(3000)]
+
+    def _assign(self, ring):
+        return dict((key, ring.get_node(key)) for key in self.keys)
+
+    def test_empty_ring(self):
+        self.assertIsNone(hash_ring.HashRing([]).get_node('key'))
+
+    def test_keys_are_spread_evenly(self):
+        ring = hash_ring.HashRing(['c1', 'c2', 'c3'])
+        counts = {}
+        for node in self._assign(ring).values():
+            counts[node] = counts.get(node, 0) + 1
+        self.assertEqual(set(['c1', 'c2', 'c3']), set(counts))
+        for count in counts.values():
+            self.assertTrue(700 < count < 1300, count)
+
+    def test_same_nodes_same_assignment(self):
+        self.assertEqual(
+            self._assign(hash_ring.HashRing(['c1', 'c2', 'c3'])),
+            self._assign(hash_ring.HashRing(['c3', 'c1', 'c2'])))
+
+    def test_adding_a_node_moves_only_its_share(self):
+        before = self._assign(hash_ring.HashRing(['c1', 'c2', 'c3']))
+        after = self._assign(hash_ring.HashRing(['c1', 'c2', 'c3', 'c4']))
+        moved = [key for key in self.keys if before[key] != after[key]]
+        self.assertTrue(all(after[key] == 'c4' for key in moved))
+        self.assertTrue(500 < len(moved) < 1000, len(moved))
@@ -0,0 +1,161 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import eventlet
+import mock
+
+from octavia.common import exceptions
+from octavia.common import lock_manager
+from octavia.db import repositories
+import octavia.tests.unit.base as base
+from octavia.tests.unit.db import base as db_base
+
+
+class TestLockManager(base.TestCase):
+
+    def setUp(self):
+        super(TestLockManager, self).setUp()
+        self.manager = lock_manager.LockManager()
+        self.log = []
+
+    def _work(self, key, value, delay=0.01):
+        with self.manager.lock(key):
+            self.log.append(('start', key, value))
+            eventlet.sleep(delay)
+            self.log.append(('end', key, value))
+
+    def test_serializes_per_key_and_evicts(self):
+        pool = eventlet.GreenPool()
+        for i in range(3):
+            pool.spawn(self._work, 'lb1', i)
+        pool.spawn(self._work, 'lb2', 0)
+        eventlet.sleep(0)
+        self.assertEqual(2, len(self.manager))
+        self.assertTrue(self.manager.locked('lb1'))
+        pool.waitall()
+        lb1 = [entry for entry in self.log if entry[1] == 'lb1']
+        self.assertEqual([('start', 'lb1', 0), ('end', 'lb1', 0),
+                          ('start', 'lb1', 1), ('end', 'lb1', 1),
+                          ('start', 'lb1', 2), ('end', 'lb1', 2)], lb1)
+        # lb2 ran alongside the first lb1 job.
+        self.assertTrue(self.log.index(('start', 'lb2', 0)) <
+                        self.log.index(('end', 'lb1', 0)))
+        self.assertEqual(0, len(self.manager))
+        self.assertFalse(self.manager.locked('lb1'))
+        metrics = self.manager.get_metrics()
+        self.assertEqual(4, metrics['acquisitions'])
+        self.assertEqual(2, metrics['contended'])
+        self.assertTrue(metrics['max_wait_time'] >= 0.01)
+        self.assertTrue(metrics['max_hold_time'] >= 0.01)
+
+    def test_timeout(self):
+        thread = eventlet.spawn(self._work, 'lb1', 0, 0.2)
+        eventlet.sleep(0)
+
+        def take():
+            with self.manager.lock('lb1', timeout=0.01):
+                pass
+        self.assertRaises(exceptions.LockTimeout, take)
+        self.assertEqual(1, self.manager.timeouts)
+        thread.wait()
+        self.assertEqual(0, len(self.manager))
+
+    def test_released_on_error(self):
+        def fail():
+            with self.manager.lock('lb1'):
+                raise ValueError()
+        self.assertRaises(ValueError, fail)
+        self.assertEqual(0, len(self.manager))
+        with self.manager.lock('lb1', timeout=0):
+            pass
+
+    def test_distributed(self):
+        distributed = mock.Mock()
+        distributed.acquire.side_effect = [True, False]
+        manager = lock_manager.LockManager(distributed)
+        with manager.lock('lb1'):
+            distributed.acquire.assert_called_once_with('lb1', None)
+        distributed.release.assert_called_once_with('lb1')
+
+        def take():
+            with manager.lock('lb1', timeout=5):
+                pass
+        self.assertRaises(exceptions.LockTimeout, take)
+        self.assertFalse(manager.locked('lb1'))
+        self.assertEqual(1, distributed.release.call_count)
+
+    def test_outside_timeout_while_waiting(self):
+        thread = eventlet.spawn(self._work, 'lb1', 0, 0.2)
+        eventlet.sleep(0)
+
+        def take():
+            with eventlet.Timeout(0.01):
+                with self.manager.lock('lb1'):
+                    pass
+        self.assertRaises(eventlet.Timeout, take)
+        thread.wait()
+        self.assertEqual(0, len(self.manager))
+
+    def test_outside_timeout_in_distributed_acquire(self):
+        distributed = mock.Mock()
+        distributed.acquire.side_effect = [eventlet.Timeout(), True]
+        manager = lock_manager.LockManager(distributed)
+
+        def take():
+            with manager.lock('lb1'):
+                pass
+        self.assertRaises(eventlet.Timeout, take)
+        self.assertEqual(0, len(manager))
+        with eventlet.Timeout(5):
+            take()
+        self.assertEqual(1, distributed.release.call_count)
+
+
+class TestDBLock(db_base.OctaviaDBTestBase):
+
+    def setUp(self):
+        super(TestDBLock, self).setUp()
+        # Locks expire by the database clock.
+        self.database_now = datetime.datetime(2014, 1, 1)
+        patcher = mock.patch.object(repositories, '_database_now',
+                                    lambda session: self.database_now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _advance(self, seconds):
+        self.database_now += datetime.timedelta(seconds=seconds)
+
+    def _lock(self, owner):
+        return lock_manager.DBLock(owner=owner, ttl=60, retry_interval=0.01,
+                                   session=self.session)
+
+    def test_exclusive_until_released_or_expired(self):
+        c1 = self._lock('c1')
+        c2 = self._lock('c2')
+        self.assertTrue(c1.acquire('lb1'))
+        self.assertFalse(c2.acquire('lb1', timeout=0.02))
+        self.assertTrue(c2.acquire('lb2', timeout=0))
+        c1.release('lb1')
+        self.assertTrue(c2.acquire('lb1', timeout=0))
+        self._advance(30)
+        self.assertTrue(c2.refresh('lb1'))
+        self._advance(45)
+        self.assertFalse(c1.acquire('lb1', timeout=0))
+        self._advance(30)
+        self.assertTrue(c1.acquire('lb1', timeout=0))
+        self.assertFalse(c2.refresh('lb1'))
+        c2.release('lb1')
+        self.assertFalse(c2.acquire('lb1', timeout=0))
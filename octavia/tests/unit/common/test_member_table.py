@@ -0,0 +1,97 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.common import member_table
+import octavia.tests.unit.base as base
+
+
+class TestMemberTable(base.TestCase):
+
+    def setUp(self):
+        super(TestMemberTable, self).setUp()
+        self.members = [
+            data_models.Member(id='m%d' % i, tenant_id='t1', pool_id='p1',
+                               subnet_id='s%d' % i,
+                               ip_address='10.0.0.%d' % i,
+                               protocol_port=80, weight=i, enabled=True,
+                               operating_status=constants.ONLINE)
+            for i in range(4)]
+        self.table = member_table.MemberTable('p1', self.members)
+
+    def test_members_round_trip(self):
+        member = data_models.Member(id='m9', tenant_id='t2', pool_id='p1',
+                                    subnet_id='s9')
+        self.table.put(member)
+        for member in self.members + [member]:
+            self.assertEqual(member, self.table.get_member(member.id))
+        self.assertEqual(5, len(self.table))
+
+    def test_put_updates_row(self):
+        self.members[1].weight = 7
+        self.members[1].operating_status = constants.OFFLINE
+        self.members[1].subnet_id = 's7'
+        self.table.put(self.members[1])
+        self.assertEqual(4, len(self.table))
+        self.assertEqual(self.members[1], self.table.get_member('m1'))
+
+    def test_remove_moves_last_row(self):
+        self.table.remove('m1')
+        self.assertNotIn('m1', self.table)
+        self.assertEqual(['m0', 'm3', 'm2'], self.table.ids)
+        self.assertEqual(self.members[3], self.table.get_member('m3'))
+        self.table.remove('m2')
+        self.assertEqual(['m0', 'm3'], self.table.ids)
+
+    def test_unknown_status(self):
+        self.assertRaises(ValueError, self.table.set_status, 'm0', 'UP')
+
+    def test_operating_status(self):
+        self.assertEqual(constants.ONLINE, self.table.operating_status())
+        self.assertEqual(1, self.table.update_statuses(
+            {'m0': constants.OFFLINE, 'm1': constants.ONLINE,
+             'unknown': constants.OFFLINE}))
+        self.assertEqual(constants.DEGRADED, self.table.operating_status())
+        self.assertEqual(3, self.table.count(constants.ONLINE))
+        self.assertEqual(['m0'], self.table.member_ids(constants.OFFLINE))
+        self.table.set_enabled('m0', False)
+        self.assertEqual(constants.ONLINE, self.table.operating_status())
+        self.assertEqual([], self.table.member_ids(constants.OFFLINE))
+        self.assertEqual(['m0'], self.table.member_ids(constants.OFFLINE,
+                                                       enabled_only=False))
+        self.table.set_status('m0', constants.ONLINE)
+        self.assertEqual(3, self.table.count_enabled())
+        for member_id in ('m1', 'm2', 'm3'):
+            self.table.set_status(member_id, constants.ERROR)
+        self.assertEqual(constants.OFFLINE, self.table.operating_status())
+        self.table.set_enabled('m0', True)
+        self.assertEqual(constants.DEGRADED, self.table.operating_status())
+
+    def test_empty_pool_is_offline(self):
+        self.assertEqual(constants.OFFLINE,
+                         member_table.MemberTable().operating_status())
+
+    def test_scale_weights(self):
+        self.table.put(data_models.Member(id='m4', weight=200))
+        self.table.put(data_models.Member(id='m5'))
+        self.table.scale_weights(1.5)
+        self.assertEqual([0, 2, 3, 5, 256, None],
+                         [self.table.get_member('m%d' % i).weight
+                          for i in range(6)])
+        self.table.scale_weights(0.01)
+        self.assertEqual([0, 1, 1, 1, 3, None],
+                         [self.table.get_member('m%d' % i).weight
+                          for i in range(6)])
+        self.assertRaises(ValueError, self.table.scale_weights, -1)
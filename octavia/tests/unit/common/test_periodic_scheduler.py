@@ -0,0 +1,166 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import random
+
+import eventlet
+from eventlet import event
+
+from octavia.common import periodic_scheduler
+from octavia.openstack.common import periodic_task
+import octavia.tests.unit.base as base
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Tasks(periodic_task.PeriodicTasks):
+
+    def __init__(self):
+        super(Tasks, self).__init__()
+        self.calls = []
+
+    @periodic_task.periodic_task(spacing=10, run_immediately=True)
+    def check(self, context):
+        self.calls.append(('check', context))
+
+    @periodic_task.periodic_task(spacing=30)
+    def cleanup(self, context):
+        self.calls.append(('cleanup', context))
+    cleanup._periodic_priority = 5
+
+
+class TestPeriodicScheduler(base.TestCase):
+
+    def setUp(self):
+        super(TestPeriodicScheduler, self).setUp()
+        self.clock = FakeClock()
+        self.scheduler = periodic_scheduler.PeriodicScheduler(
+            workers=4, jitter=0, clock=self.clock, rng=random.Random(1))
+        self.addCleanup(self.scheduler.stop, graceful=False)
+        self.calls = []
+
+    def _tick(self, seconds):
+        self.clock.now += seconds
+        idle = self.scheduler.run_pending()
+        eventlet.sleep(0)
+        return idle
+
+    def _task(self, name):
+        def task():
+            self.calls.append(name)
+        return task
+
+    def test_tasks_run_on_their_own_deadlines(self):
+        self.scheduler.add_task('fast', self._task('fast'), 10)
+        self.scheduler.add_task('slow', self._task('slow'), 25)
+        self.assertEqual(10, self._tick(0))
+        self.assertEqual([], self.calls)
+        for i in range(5):
+            self._tick(10)
+        self.assertEqual(['fast', 'fast', 'slow', 'fast', 'fast', 'slow',
+                          'fast'], self.calls)
+        metrics = self.scheduler.get_metrics()
+        self.assertEqual(5, metrics['fast']['runs'])
+        self.assertEqual(2, metrics['slow']['runs'])
+        # slow was due at 25 and 50 but started at 30 and 50.
+        self.assertEqual(5, metrics['slow']['max_lag'])
+        self.assertEqual(0, metrics['slow']['skipped'])
+
+    def test_due_tasks_start_by_priority(self):
+        self.scheduler.add_task('low', self._task('low'), 10, priority=9,
+                                run_immediately=True)
+        self.scheduler.add_task('high', self._task('high'), 10, priority=1,
+                                run_immediately=True)
+        self._tick(0)
+        self.assertEqual(['high', 'low'], self.calls)
+
+    def test_busy_task_is_skipped_not_stacked(self):
+        release = event.Event()
+        self.scheduler.add_task('hung', release.wait, 10,
+                                run_immediately=True)
+        self.scheduler.add_task('fast', self._task('fast'), 10,
+                                run_immediately=True)
+        self._tick(0)
+        self._tick(10)
+        self._tick(10)
+        task = self.scheduler.tasks['hung']
+        self.assertEqual(1, task.active)
+        self.assertEqual(2, task.skipped)
+        self.assertEqual(['fast'] * 3, self.calls)
+        release.send()
+        eventlet.sleep(0)
+        self.assertEqual(0, task.active)
+        self.assertEqual(1, task.runs)
+
+    def test_missed_periods_are_dropped(self):
+        self.scheduler.add_task('task', self._task('task'), 10)
+        self._tick(45)
+        self.assertEqual(['task'], self.calls)
+        self.assertEqual(3, self.scheduler.tasks['task'].skipped)
+        self.assertEqual(5, self._tick(0))
+
+    def test_jitter_spreads_first_runs(self):
+        scheduler = periodic_scheduler.PeriodicScheduler(
+            workers=1, jitter=0.5, clock=self.clock, rng=random.Random(1))
+        dues = [scheduler.add_task('t%d' % i, None, 10).due
+                for i in range(20)]
+        self.assertTrue(all(1010 <= due <= 1015 for due in dues))
+        self.assertTrue(len(set(dues)) == 20)
+
+    def test_failures_are_counted(self):
+        def fail():
+            raise ValueError()
+        self.scheduler.add_task('fail', fail, 10, run_immediately=True)
+        self._tick(0)
+        self.assertEqual(1, self.scheduler.tasks['fail'].failures)
+        self.assertEqual(0, self.scheduler.tasks['fail'].active)
+
+    def test_remove_task(self):
+        self.scheduler.add_task('task', self._task('task'), 10)
+        self.scheduler.remove_task('task')
+        self._tick(10)
+        self.assertEqual([], self.calls)
+
+    def test_spacing_must_be_positive(self):
+        for spacing in (0, -1):
+            self.assertRaises(ValueError, self.scheduler.add_task, 'task',
+                              self._task('task'), spacing)
+        self.assertEqual({}, self.scheduler.tasks)
+
+    def test_add_periodic_tasks(self):
+        tasks = Tasks()
+        self.scheduler.add_periodic_tasks(tasks, 'ctx')
+        self.assertEqual(5, self.scheduler.tasks['Tasks.cleanup'].priority)
+        self._tick(0)
+        self.assertEqual([('check', 'ctx')], tasks.calls)
+        self._tick(30)
+        self.assertEqual([('check', 'ctx'), ('check', 'ctx'),
+                          ('cleanup', 'ctx')], tasks.calls)
+
+    def test_start_stop(self):
+        scheduler = periodic_scheduler.PeriodicScheduler(workers=2,
+                                                         jitter=0)
+        scheduler.start()
+        scheduler.add_task('task', self._task('task'), 0.01,
+                           run_immediately=True)
+        eventlet.sleep(0.1)
+        scheduler.stop()
+        self.assertTrue(len(self.calls) >= 3)
@@ -0,0 +1,343 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import itertools
+import os
+import tempfile
+import threading
+import time
+
+import eventlet
+import mock
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+import six.moves.urllib.parse as urlparse
+
+from octavia.common import policy
+from octavia.openstack.common import jsonutils
+from octavia.openstack.common import policy as common_policy
+import octavia.tests.unit.base as base
+
+RULES = {
+    'admin': 'role:admin',
+    'owner': 'tenant_id:%(tenant_id)s',
+    'admin_or_owner': 'rule:admin or rule:owner',
+    'default': 'rule:admin_or_owner',
+    'create_lb': 'rule:admin_or_owner and not role:readonly',
+    'get_lb': '',
+    'delete_lb': 'rule:admin or (rule:owner and role:lb_admin)',
+    'shared': "'True':%(shared)s or rule:admin",
+    'never': '!',
+    'dangling': 'rule:missing',
+}
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class PolicyServerHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Grants checks of credentials with user admin."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.path.startswith('/slow'):
+            time.sleep(0.5)
+        if self.headers['Content-Type'] == 'application/json':
+            checks = jsonutils.loads(body)
+            response = jsonutils.dumps(
+                [check['credentials'].get('user') == 'admin'
+                 for check in checks])
+        else:
+            form = urlparse.parse_qs(body)
+            checks = [{'target': jsonutils.loads(form['target'][0]),
+                       'credentials': jsonutils.loads(
+                           form['credentials'][0])}]
+            response = str(checks[0]['credentials'].get('user') == 'admin')
+        self.server.requests.append((self.path, checks))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+class PolicyServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           PolicyServerHandler)
+        self.requests = []
+        self.url = 'http://127.0.0.1:%d' % self.server_address[1]
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out have gone away before the response.
+        pass
+
+
+class TestHttpCheckClient(base.TestCase):
+
+    def setUp(self):
+        super(TestHttpCheckClient, self).setUp()
+        self.server = PolicyServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.clock = FakeClock()
+
+    def _client(self, **kwargs):
+        kwargs.setdefault('timeout', 5)
+        kwargs.setdefault('max_connections', 2)
+        kwargs.setdefault('cache_ttl', 10)
+        kwargs.setdefault('cache_size', 100)
+        kwargs.setdefault('batch_size', 0)
+        kwargs.setdefault('batch_window', 0.05)
+        client = policy.HttpCheckClient(clock=self.clock, **kwargs)
+        self.addCleanup(client.close_all)
+        return client
+
+    def test_checks_reuse_connection(self):
+        client = self._client()
+        url = self.server.url + '/check'
+        self.assertTrue(client.check(url, {'id': 1}, {'user': 'admin'}))
+        self.assertFalse(client.check(url, {'id': 1}, {'user': 'bob'}))
+        self.assertEqual(
+            [('/check', [{'target': {'id': 1},
+                          'credentials': {'user': 'admin'}}]),
+             ('/check', [{'target': {'id': 1},
+                          'credentials': {'user': 'bob'}}])],
+            self.server.requests)
+        self.assertEqual(1, client.get_metrics()['open_connections'])
+
+    def test_decisions_are_cached_for_ttl(self):
+        client = self._client()
+        url = self.server.url + '/check'
+        for now in (0, 9, 10):
+            self.clock.now = now
+            self.assertTrue(client.check(url, {}, {'user': 'admin'}))
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual(1, client.hits)
+
+    def test_timeout_denies_and_is_not_cached(self):
+        client = self._client(timeout=0.1)
+        url = self.server.url + '/slow'
+        for i in range(2):
+            self.assertFalse(client.check(url, {}, {'user': 'admin'}))
+        self.assertEqual(2, client.errors)
+        self.assertEqual(0, client.get_metrics()['open_connections'])
+
+    def test_unreachable_server_denies(self):
+        client = self._client()
+        self.assertFalse(client.check('http://127.0.0.1:1/check', {},
+                                      {'user': 'admin'}))
+        self.assertEqual(1, client.errors)
+
+    def test_unexpected_failure_does_not_block_later_checks(self):
+        client = self._client()
+        url = self.server.url + '/check'
+        with mock.patch.object(client, '_post_check',
+                               side_effect=eventlet.Timeout()):
+            self.assertRaises(eventlet.Timeout, client.check, url, {},
+                              {'user': 'admin'})
+        with eventlet.Timeout(5):
+            self.assertTrue(client.check(url, {}, {'user': 'admin'}))
+
+    def test_unexpected_failure_denies_batched_checks(self):
+        client = self._client(batch_size=10)
+        with mock.patch.object(client, '_post_batch',
+                               side_effect=RuntimeError()):
+            with eventlet.Timeout(5):
+                self.assertEqual([False, False], self._check_concurrently(
+                    client, [{'user': 'admin'}, {'user': 'bob'}]))
+        self.assertEqual({}, client._in_flight)
+
+    def _check_concurrently(self, client, credentials):
+        url = self.server.url + '/check'
+        threads = [eventlet.spawn(client.check, url, {'id': 1}, creds)
+                   for creds in credentials]
+        return [thread.wait() for thread in threads]
+
+    def test_pending_checks_are_batched(self):
+        client = self._client(batch_size=10)
+        credentials = [{'user': 'admin'}, {'user': 'bob'},
+                       {'user': 'admin', 'roles': ['member']}]
+        self.assertEqual([True, False, True],
+                         self._check_concurrently(client, credentials))
+        self.assertEqual(1, len(self.server.requests))
+        self.assertEqual(credentials, [check['credentials'] for check in
+                                       self.server.requests[0][1]])
+        self.assertEqual(3, client.batched_checks)
+
+    def test_full_batch_is_sent_without_waiting(self):
+        client = self._client(batch_size=2, batch_window=60)
+        credentials = [{'user': 'admin'}, {'user': 'bob'}]
+        with eventlet.Timeout(5):
+            self.assertEqual([True, False],
+                             self._check_concurrently(client, credentials))
+
+    def test_identical_checks_share_a_request(self):
+        client = self._client(batch_size=10)
+        self.assertEqual([True] * 3, self._check_concurrently(
+            client, [{'user': 'admin'}] * 3))
+        self.assertEqual(
+            [('/check', [{'target': {'id': 1},
+                          'credentials': {'user': 'admin'}}])],
+            self.server.requests)
+
+    def test_enforcer_uses_client(self):
+        client = self._client()
+        enforcer = policy.CachingEnforcer(
+            default_rule='default', use_conf=False, cache_size=100,
+            reload_interval=5, http_client=client)
+        enforcer.set_rules(common_policy.Rules.load_json(jsonutils.dumps(
+            {'default': '!',
+             'remote': 'http:' + self.server.url[5:] +
+                       '/check/%(tenant_id)s'})))
+        self.assertTrue(enforcer.enforce('remote', {'tenant_id': 't1'},
+                                         {'user': 'admin'}))
+        self.assertFalse(enforcer.enforce('remote', {}, {'user': 'admin'}))
+        self.assertEqual('/check/t1', self.server.requests[0][0])
+        self.assertEqual(1, len(self.server.requests))
+
+
+class TestCachingEnforcer(base.TestCase):
+
+    def setUp(self):
+        super(TestCachingEnforcer, self).setUp()
+        self.clock = FakeClock()
+        self.enforcer = self._enforcer()
+        self.enforcer.set_rules(self._rules())
+
+    def _rules(self, rules=RULES):
+        return common_policy.Rules.load_json(jsonutils.dumps(rules),
+                                             'default')
+
+    def _enforcer(self, **kwargs):
+        kwargs.setdefault('cache_size', 100)
+        kwargs.setdefault('reload_interval', 5)
+        kwargs.setdefault('use_conf', False)
+        return policy.CachingEnforcer(default_rule='default',
+                                      clock=self.clock, **kwargs)
+
+    def test_same_decisions_as_enforcer(self):
+        reference = common_policy.Enforcer(default_rule='default',
+                                           use_conf=False)
+        reference.set_rules(self._rules())
+        credentials = [
+            {'roles': ['admin'], 'tenant_id': 't1'},
+            {'roles': ['Member'], 'tenant_id': 't1'},
+            {'roles': ['Member', 'readonly'], 'tenant_id': 't1'},
+            {'roles': ['LB_Admin'], 'tenant_id': 't1'},
+            {'roles': ['Member'], 'tenant_id': 't2'},
+            {'roles': [], 'tenant_id': 't1'},
+            {'tenant_id': 't1'},
+            {'roles': ['admin']}]
+        targets = [{'tenant_id': 't1'}, {'tenant_id': 't1', 'shared': True},
+                   {'shared': False}, {}]
+        rules = list(RULES) + ['unknown']
+        for i in range(2):
+            for rule, creds, target in itertools.product(rules, credentials,
+                                                         targets):
+                self.assertEqual(
+                    reference.enforce(rule, target, creds),
+                    self.enforcer.enforce(rule, target, creds),
+                    (rule, creds, target))
+        self.assertTrue(self.enforcer.hits > 0)
+
+    def test_cache_key_holds_only_fields_read(self):
+        creds = {'roles': ['member'], 'tenant_id': 't1', 'user_id': 'u1'}
+        self.assertTrue(self.enforcer.enforce(
+            'admin_or_owner', {'tenant_id': 't1', 'name': 'a'}, creds))
+        creds['user_id'] = 'u2'
+        creds['roles'] = ['MEMBER']
+        self.assertTrue(self.enforcer.enforce(
+            'admin_or_owner', {'tenant_id': 't1', 'name': 'b'}, creds))
+        self.assertEqual(1, self.enforcer.hits)
+        self.assertFalse(self.enforcer.enforce(
+            'admin_or_owner', {'tenant_id': 't2'}, creds))
+        self.assertEqual(2, self.enforcer.misses)
+
+    def test_cache_is_bounded(self):
+        enforcer = self._enforcer(cache_size=3)
+        enforcer.set_rules(self._rules())
+        for tenant in ('t1', 't2', 't3', 't4', 't1'):
+            enforcer.enforce('owner', {'tenant_id': tenant},
+                             {'roles': [], 'tenant_id': 't1'})
+        self.assertEqual(2, enforcer.get_metrics()['cached_decisions'])
+        self.assertEqual(5, enforcer.misses)
+
+    def test_unhashable_values_are_not_cached(self):
+        self.assertFalse(self.enforcer.enforce(
+            'owner', {'tenant_id': ['t1']}, {'roles': [], 'tenant_id': 't1'}))
+        self.assertEqual(0, self.enforcer.get_metrics()['cached_decisions'])
+
+    def test_http_checks_are_not_cached(self):
+        client = mock.Mock()
+        client.check.return_value = True
+        enforcer = self._enforcer(http_client=client)
+        enforcer.set_rules(self._rules(
+            {'remote': 'http://policy.example.com/check'}))
+        for i in range(2):
+            self.assertTrue(enforcer.enforce('remote', {}, {}))
+        self.assertEqual(2, client.check.call_count)
+        self.assertEqual(0, enforcer.hits)
+
+    def test_do_raise(self):
+        self.assertRaises(common_policy.PolicyNotAuthorized,
+                          self.enforcer.enforce, 'never', {}, {},
+                          do_raise=True)
+        self.assertRaises(ValueError, self.enforcer.enforce, 'never', {}, {},
+                          True, ValueError)
+
+    def test_check_objects_are_evaluated(self):
+        self.assertTrue(self.enforcer.enforce(common_policy.TrueCheck(), {},
+                                              {}))
+
+    def test_policy_file_is_checked_per_interval(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        def write(rules, mtime):
+            with open(path, 'w') as f:
+                f.write(jsonutils.dumps(rules))
+            os.utime(path, (mtime, mtime))
+        write({'default': '!'}, 1000)
+        enforcer = self._enforcer(use_conf=True)
+        enforcer.policy_path = path
+        creds = {'roles': ['admin']}
+        self.assertFalse(enforcer.enforce('default', {}, creds))
+        write({'default': 'role:admin'}, 2000)
+        with mock.patch.object(os.path, 'getmtime',
+                               wraps=os.path.getmtime) as getmtime:
+            self.clock.now = 4
+            self.assertFalse(enforcer.enforce('default', {}, creds))
+            self.assertEqual(0, getmtime.call_count)
+            self.clock.now = 5
+            self.assertTrue(enforcer.enforce('default', {}, creds))
+            self.assertEqual(1, getmtime.call_count)
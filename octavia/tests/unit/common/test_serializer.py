@@ -0,0 +1,100 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from octavia.common import data_models
+from octavia.common import serializer
+from octavia.openstack.common import jsonutils
+import octavia.tests.unit.base as base
+
+
+class TestSerializer(base.TestCase):
+
+    def _load_balancer(self):
+        lb = data_models.LoadBalancer(id='lb1', name='lb', enabled=True)
+        lb.vip = data_models.Vip(load_balancer_id='lb1',
+                                 ip_address='10.0.0.1', load_balancer=lb)
+        listener = data_models.Listener(id='l1', protocol_port=80,
+                                        load_balancer=lb)
+        pool = data_models.Pool(id='p1', listener=listener)
+        pool.members = [data_models.Member(id='m%d' % i, weight=i, pool=pool)
+                        for i in range(2)]
+        listener.default_pool = pool
+        lb.listeners = [listener]
+        return lb
+
+    def _expected(self, model, path=()):
+        # The JSON serializer.dumps should give, built as nested dicts.
+        if isinstance(model, data_models.BaseDataModel):
+            if model in path:
+                return None
+            return dict((field, self._expected(getattr(model, field),
+                                               path + (model,)))
+                        for field in serializer.fields(model.__class__))
+        if isinstance(model, list):
+            return [self._expected(item, path) for item in model]
+        return model
+
+    def test_relationships_are_encoded(self):
+        lb = self._load_balancer()
+        encoded = jsonutils.loads(serializer.dumps(lb))
+        self.assertEqual(self._expected(lb), encoded)
+        members = encoded['listeners'][0]['default_pool']['members']
+        self.assertEqual(['m0', 'm1'], [member['id'] for member in members])
+
+    def test_back_references_are_null(self):
+        encoded = jsonutils.loads(serializer.dumps(self._load_balancer()))
+        listener = encoded['listeners'][0]
+        self.assertIsNone(encoded['vip']['load_balancer'])
+        self.assertIsNone(listener['load_balancer'])
+        self.assertIsNone(listener['default_pool']['listener'])
+        self.assertIsNone(listener['default_pool']['members'][0]['pool'])
+
+    def test_shared_model_is_encoded_everywhere(self):
+        pool = data_models.Pool(id='p1')
+        listeners = [data_models.Listener(id='l%d' % i, default_pool=pool)
+                     for i in range(2)]
+        encoded = jsonutils.loads(serializer.dumps(listeners))
+        self.assertEqual(['p1', 'p1'], [listener['default_pool']['id']
+                                        for listener in encoded])
+
+    def test_values(self):
+        values = [None, True, False, 0, 2 ** 70, 1.5, float('inf'), 'abc',
+                  u'caf\xe9 "\\"', datetime.datetime(2014, 1, 2, 3, 4, 5),
+                  (1, 2), {'a': {'b': []}}, set([3])]
+        self.assertEqual(
+            [None, True, False, 0, 2 ** 70, 1.5, float('inf'), 'abc',
+             u'caf\xe9 "\\"', '2014-01-02T03:04:05.000000', [1, 2],
+             {'a': {'b': []}}, [3]],
+            jsonutils.loads(serializer.dumps(values)))
+
+    def test_dict_keys(self):
+        value = {'caf\xc3\xa9': 1, u'th\xe9': 2, 3: 3}
+        self.assertEqual({u'caf\xe9': 1, u'th\xe9': 2, u'3': 3},
+                         jsonutils.loads(serializer.dumps(value)))
+
+    def test_fields_match_to_dict(self):
+        member = data_models.Member(id='m1', weight=2)
+        encoded = jsonutils.loads(serializer.dumps(member))
+        self.assertEqual(set(data_models.Member._get_fields()), set(encoded))
+        self.assertEqual(member.to_dict(),
+                         dict((field, encoded[field])
+                              for field in member.to_dict()))
+
+    def test_encoder_is_generated_once(self):
+        encoder = serializer.get_encoder(data_models.Member)
+        self.assertIs(encoder, serializer.get_encoder(data_models.Member))
+        self.assertEqual('{"host": "h1", "updated_at": null}',
+                         serializer.dumps(data_models.Controller(host='h1')))
@@ -0,0 +1,42 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from octavia.common import constants
+from octavia.compute.drivers import noop_driver
+import octavia.tests.unit.base as base
+
+
+class TestNoopComputeDriver(base.TestCase):
+
+    def setUp(self):
+        super(TestNoopComputeDriver, self).setUp()
+        self.clock = mock.Mock(return_value=100.0)
+        self.driver = noop_driver.NoopComputeDriver(boot_time=30,
+                                                    clock=self.clock)
+
+    def test_build_boots_after_boot_time(self):
+        amphora = self.driver.build('small')
+        self.assertEqual(constants.PENDING_CREATE, amphora.status)
+        self.assertEqual('small', amphora.compute_flavor)
+        self.assertEqual(constants.PENDING_CREATE,
+                         self.driver.status(amphora.id))
+        self.clock.return_value = 130.0
+        self.assertEqual(constants.ACTIVE, self.driver.status(amphora.id))
+
+    def test_delete(self):
+        amphora = self.driver.build('small')
+        self.driver.delete(amphora.id)
+        self.assertEqual(constants.ERROR, self.driver.status(amphora.id))
@@ -0,0 +1,147 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from octavia.common import constants
+from octavia.controller.healthmanager import heartbeat_monitor
+import octavia.tests.unit.base as base
+
+
+class FakeClock(object):
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestTimerWheel(base.TestCase):
+
+    def setUp(self):
+        super(TestTimerWheel, self).setUp()
+        self.wheel = heartbeat_monitor.TimerWheel(1, 8, 100.0)
+
+    def test_expires_in_order(self):
+        self.wheel.set_deadline('a', 102.5)
+        self.wheel.set_deadline('b', 104.0)
+        self.assertEqual([], self.wheel.advance(102.0))
+        self.assertEqual(['a'], self.wheel.advance(103.0))
+        self.assertEqual(['b'], self.wheel.advance(104.5))
+        self.assertEqual(0, len(self.wheel))
+
+    def test_extended_deadline_is_rescheduled(self):
+        self.wheel.set_deadline('a', 102.0)
+        self.wheel.set_deadline('a', 106.0)
+        self.assertEqual([], self.wheel.advance(105.0))
+        self.assertIn('a', self.wheel)
+        self.assertEqual(['a'], self.wheel.advance(106.0))
+
+    def test_shortened_deadline(self):
+        self.wheel.set_deadline('a', 106.0)
+        self.wheel.set_deadline('a', 102.0)
+        self.assertEqual(['a'], self.wheel.advance(102.0))
+
+    def test_deadline_beyond_wheel_span(self):
+        self.wheel.set_deadline('a', 120.0)
+        for now in range(101, 120):
+            self.assertEqual([], self.wheel.advance(now))
+        self.assertEqual(['a'], self.wheel.advance(120.0))
+
+    def test_large_clock_jump(self):
+        self.wheel.set_deadline('a', 102.0)
+        self.wheel.set_deadline('b', 150.0)
+        self.assertEqual(['a'], self.wheel.advance(130.0))
+        self.assertEqual(['b'], self.wheel.advance(150.0))
+
+    def test_cancel(self):
+        self.wheel.set_deadline('a', 102.0)
+        self.wheel.cancel('a')
+        self.assertEqual([], self.wheel.advance(110.0))
+        self.assertNotIn('a', self.wheel)
+
+    def test_advance_only_visits_due_slots(self):
+        for i in range(100):
+            self.wheel.set_deadline(i, 105.0)
+        self.wheel.set_deadline('a', 101.5)
+        self.assertEqual(['a'], self.wheel.advance(102.0))
+        self.assertEqual(100, len(self.wheel.advance(105.0)))
+
+
+class TestHeartbeatMonitor(base.TestCase):
+
+    def setUp(self):
+        super(TestHeartbeatMonitor, self).setUp()
+        self.clock = FakeClock()
+        self.on_stale = mock.Mock()
+        self.health_handler = mock.Mock()
+        self.monitor = heartbeat_monitor.HeartbeatMonitor(
+            self.on_stale, health_handler=self.health_handler,
+            active_interval=5, spare_interval=60, clock=self.clock)
+
+    def _advance(self, seconds):
+        self.clock.now += seconds
+        return self.monitor.check()
+
+    def test_missed_heartbeat(self):
+        self.monitor.watch('amp1')
+        self.assertEqual([], self._advance(4))
+        self.assertEqual(['amp1'], self._advance(2))
+        self.on_stale.assert_called_once_with('amp1')
+        self.assertEqual([], self._advance(10))
+        self.assertEqual(0, len(self.monitor))
+
+    def test_heartbeats_keep_amphora_fresh(self):
+        self.monitor.watch('amp1')
+        for i in range(20):
+            self.assertEqual([], self._advance(3))
+            self.monitor.heartbeat('amp1')
+        self.assertFalse(self.on_stale.called)
+
+    def test_spare_interval(self):
+        self.monitor.watch('spare', spare=True)
+        self.monitor.watch('active')
+        self.assertEqual(['active'], self._advance(6))
+        self.assertEqual([], self._advance(50))
+        self.assertEqual(['spare'], self._advance(5))
+
+    def test_spare_becomes_active(self):
+        self.monitor.watch('amp1', spare=True)
+        self._advance(1)
+        self.monitor.watch('amp1')
+        self.assertEqual(['amp1'], self._advance(6))
+
+    def test_unwatch(self):
+        self.monitor.watch('amp1')
+        self.monitor.unwatch('amp1')
+        self.assertEqual([], self._advance(10))
+
+    def test_update_health(self):
+        health = {constants.HEALTH_AMPHORAE: {'amp1': constants.ONLINE,
+                                              'amp2': constants.ONLINE}}
+        self.monitor.update_health(health)
+        self.health_handler.update_health.assert_called_once_with(health)
+        self.assertEqual(2, len(self.monitor))
+        self._advance(3)
+        self.monitor.update_health({constants.HEALTH_AMPHORAE: {
+            'amp1': constants.ONLINE}})
+        self.assertEqual(['amp2'], self._advance(3))
+
+    def test_on_stale_failure_does_not_stop_check(self):
+        self.on_stale.side_effect = ValueError
+        self.monitor.watch('amp1')
+        self.monitor.watch('amp2')
+        self.assertEqual(set(['amp1', 'amp2']), set(self._advance(6)))
+        self.assertEqual(2, self.on_stale.call_count)
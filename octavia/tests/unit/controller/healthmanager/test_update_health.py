@@ -0,0 +1,115 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from octavia.common import constants
+from octavia.controller.healthmanager import update_health
+from octavia.db import models
+from octavia.tests.unit.db import base
+from octavia.tests.unit.db import test_models
+
+
+class UpdateHealthDbTest(base.OctaviaDBTestBase,
+                         test_models.ModelTestMixin):
+
+    def setUp(self):
+        super(UpdateHealthDbTest, self).setUp()
+        self.pool = self.create_pool(self.session)
+        self.lb = self.create_load_balancer(self.session)
+        self.listener = self.create_listener(
+            self.session, load_balancer_id=self.lb.id,
+            default_pool_id=self.pool.id)
+        self.member = self.create_member(self.session, self.pool.id)
+        self.lb_id = self.lb.id
+        self.listener_id = self.listener.id
+        self.member_id = self.member.id
+        self.notifier = mock.Mock()
+        self.health_db = update_health.UpdateHealthDb(
+            session=self.session, notifier=self.notifier)
+        self.statements = self.record_statements()
+
+    def _health(self, member_status, amp_status=constants.ONLINE):
+        return {
+            constants.HEALTH_AMPHORAE: {self.FAKE_UUID_2: amp_status},
+            constants.HEALTH_LOADBALANCERS: {self.lb_id: {
+                constants.HEALTH_LOADBALANCER_STATUS: constants.ONLINE,
+                constants.HEALTH_LISTENERS: {self.listener_id: {
+                    constants.HEALTH_LISTENER_STATUS: constants.ONLINE,
+                    constants.HEALTH_NODES: {
+                        self.member_id: member_status}}}}}}
+
+    def _writes(self):
+        return [s for s in self.statements if s.startswith('UPDATE')]
+
+    def _member_status(self):
+        self.session.expire_all()
+        return self.session.query(models.Member).filter_by(
+            id=self.member_id).one().operating_status
+
+    def test_steady_state_costs_no_writes(self):
+        self.health_db.update_health(self._health(constants.ONLINE))
+        self.assertEqual(3, len(self._writes()))
+        del self.statements[:]
+        self.notifier.reset_mock()
+        for i in range(10):
+            self.health_db.update_health(self._health(constants.ONLINE))
+        self.assertEqual([], self.statements)
+        self.assertFalse(self.notifier.called)
+        self.assertEqual(11, self.health_db.heartbeats)
+
+    def test_only_transitions_are_written(self):
+        self.health_db.update_health(self._health(constants.ONLINE))
+        del self.statements[:]
+        self.notifier.reset_mock()
+        self.health_db.update_health(self._health(constants.OFFLINE))
+        self.assertEqual(1, len(self._writes()))
+        self.assertIn('member', self._writes()[0])
+        self.assertEqual(constants.OFFLINE, self._member_status())
+        self.notifier.assert_called_once_with([update_health.Transition(
+            update_health.MEMBER, self.member_id, constants.ONLINE,
+            constants.OFFLINE)])
+        self.assertEqual(constants.OFFLINE, self.health_db.get_status(
+            update_health.MEMBER, self.member_id))
+
+    def test_amphora_transition_is_notified_only(self):
+        self.health_db.update_health(self._health(constants.ONLINE))
+        del self.statements[:]
+        self.notifier.reset_mock()
+        self.health_db.update_health(self._health(constants.ONLINE,
+                                                  constants.ERROR))
+        self.assertEqual([], self.statements)
+        self.notifier.assert_called_once_with([update_health.Transition(
+            update_health.AMPHORA, self.FAKE_UUID_2, constants.ONLINE,
+            constants.ERROR)])
+
+    def test_failed_write_is_retried(self):
+        with mock.patch.object(self.health_db.health_repo,
+                               'update_statuses',
+                               side_effect=ValueError('boom')):
+            self.assertRaises(ValueError, self.health_db.update_health,
+                              self._health(constants.OFFLINE))
+        self.assertIsNone(self.health_db.get_status(update_health.MEMBER,
+                                                    self.member_id))
+        self.health_db.update_health(self._health(constants.OFFLINE))
+        self.assertEqual(constants.OFFLINE, self._member_status())
+
+    def test_invalidate(self):
+        self.health_db.update_health(self._health(constants.ONLINE))
+        self.session.query(models.Member).filter_by(
+            id=self.member_id).update({'operating_status':
+                                       constants.OFFLINE})
+        self.health_db.invalidate(update_health.MEMBER, self.member_id)
+        self.health_db.update_health(self._health(constants.ONLINE))
+        self.assertEqual(constants.ONLINE, self._member_status())
@@ -0,0 +1,178 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo.db import exception as db_exception
+
+from octavia.controller.healthmanager import update_stats
+from octavia.db import models
+from octavia.tests.unit.db import base
+from octavia.tests.unit.db import test_models
+
+
+class ListenerStatsAccumulatorTest(base.OctaviaDBTestBase,
+                                   test_models.ModelTestMixin):
+
+    DELETED_ID = '00000000-0000-0000-0000-000000000003'
+
+    def setUp(self):
+        super(ListenerStatsAccumulatorTest, self).setUp()
+        self.listener_1 = self.create_listener(
+            self.session, id=self.FAKE_UUID_1, protocol_port=80)
+        self.listener_2 = self.create_listener(
+            self.session, id=self.FAKE_UUID_2, protocol_port=81)
+        self.create_listener_statistics(self.session, self.listener_1.id,
+                                        bytes_in=100, total_connections=5)
+        self.accumulator = update_stats.ListenerStatsAccumulator(
+            flush_interval=1, session=self.session)
+
+    def _get_stats(self, listener_id):
+        self.session.expire_all()
+        return self.session.query(models.ListenerStatistics).filter_by(
+            listener_id=listener_id).one()
+
+    def test_add_coalesces(self):
+        self.accumulator.add(self.listener_1.id, bytes_in=10, bytes_out=1,
+                             active_connections=3, total_connections=2)
+        self.accumulator.add(self.listener_1.id, bytes_in=5,
+                             total_connections=1)
+        self.accumulator.add(self.listener_2.id, bytes_in=7,
+                             active_connections=1)
+        self.assertEqual(2, self.accumulator.queue_depth)
+        self.accumulator.flush()
+        self.assertEqual(0, self.accumulator.queue_depth)
+        stats = self._get_stats(self.listener_1.id)
+        self.assertEqual(115, stats.bytes_in)
+        self.assertEqual(1, stats.bytes_out)
+        self.assertEqual(3, stats.active_connections)
+        self.assertEqual(8, stats.total_connections)
+        stats = self._get_stats(self.listener_2.id)
+        self.assertEqual(7, stats.bytes_in)
+        self.assertEqual(1, stats.active_connections)
+
+    def test_missing_active_connections_keeps_gauge(self):
+        self.accumulator.add(self.listener_1.id, active_connections=3)
+        self.accumulator.flush()
+        self.accumulator.add(self.listener_1.id, bytes_in=5)
+        self.accumulator.add(self.listener_2.id, bytes_in=7)
+        self.accumulator.flush()
+        stats = self._get_stats(self.listener_1.id)
+        self.assertEqual(105, stats.bytes_in)
+        self.assertEqual(3, stats.active_connections)
+        self.assertEqual(0, self._get_stats(
+            self.listener_2.id).active_connections)
+
+    def test_flush_batches_statements(self):
+        statements = self.record_statements()
+        for i in range(50):
+            self.accumulator.add(self.listener_1.id, bytes_in=1)
+            self.accumulator.add(self.listener_2.id, bytes_in=1)
+        self.accumulator.flush()
+        writes = [s for s in statements
+                  if s.startswith('UPDATE') or s.startswith('INSERT')]
+        self.assertEqual(2, len(writes))
+        self.assertEqual(150, self._get_stats(self.listener_1.id).bytes_in)
+        self.assertEqual(50, self._get_stats(self.listener_2.id).bytes_in)
+
+    def test_update_stats(self):
+        self.accumulator.update_stats({
+            'lb-id': {self.listener_1.id: {'bytes-in': 1, 'bytes_out': 2,
+                                           'active_connections': 3,
+                                           'total_connections': 4}}})
+        self.accumulator.flush()
+        stats = self._get_stats(self.listener_1.id)
+        self.assertEqual(101, stats.bytes_in)
+        self.assertEqual(2, stats.bytes_out)
+        self.assertEqual(3, stats.active_connections)
+        self.assertEqual(9, stats.total_connections)
+
+    def test_negative_value(self):
+        self.assertRaises(ValueError, self.accumulator.add,
+                          self.listener_1.id, bytes_in=-1)
+        self.assertRaises(ValueError, self.accumulator.add,
+                          self.listener_1.id, active_connections=-1)
+        self.assertEqual(0, self.accumulator.queue_depth)
+
+    def test_failed_flush_keeps_deltas(self):
+        self.accumulator.add(self.listener_1.id, bytes_in=10,
+                             active_connections=3)
+        with mock.patch.object(self.accumulator.stats_repo,
+                               'increment_batch',
+                               side_effect=Exception('boom')):
+            self.accumulator.flush()
+        self.accumulator.add(self.listener_1.id, bytes_in=5,
+                             active_connections=4)
+        self.assertEqual(1, self.accumulator.get_metrics()['flush_errors'])
+        self.accumulator.flush()
+        stats = self._get_stats(self.listener_1.id)
+        self.assertEqual(115, stats.bytes_in)
+        self.assertEqual(4, stats.active_connections)
+
+    def test_failed_flush_keeps_gauge(self):
+        self.accumulator.add(self.listener_1.id, active_connections=3)
+        with mock.patch.object(self.accumulator.stats_repo,
+                               'increment_batch',
+                               side_effect=Exception('boom')):
+            self.accumulator.flush()
+        self.accumulator.add(self.listener_1.id, bytes_in=5)
+        self.accumulator.flush()
+        self.assertEqual(3, self._get_stats(
+            self.listener_1.id).active_connections)
+
+    def test_deleted_listener_is_dropped(self):
+        self.accumulator.add(self.listener_1.id, bytes_in=5)
+        self.accumulator.add(self.DELETED_ID, bytes_in=7)
+        self.accumulator.flush()
+        self.assertEqual(0, self.accumulator.queue_depth)
+        self.assertEqual(1, self.accumulator.get_metrics()['dropped'])
+        self.assertEqual(105, self._get_stats(self.listener_1.id).bytes_in)
+        self.assertEqual(0, self.session.query(
+            models.ListenerStatistics).filter_by(
+                listener_id=self.DELETED_ID).count())
+
+    def test_reference_error_drops_batch(self):
+        self.accumulator.add(self.listener_1.id, bytes_in=5)
+        with mock.patch.object(self.accumulator.stats_repo,
+                               'increment_batch',
+                               side_effect=db_exception.DBReferenceError(
+                                   'listener_statistics', 'fk', 'id',
+                                   'listener')):
+            self.accumulator.flush()
+        metrics = self.accumulator.get_metrics()
+        self.assertEqual(0, metrics['queue_depth'])
+        self.assertEqual(1, metrics['dropped'])
+        self.assertEqual(1, metrics['flush_errors'])
+
+    def test_metrics(self):
+        self.accumulator.add(self.listener_1.id, bytes_in=1)
+        metrics = self.accumulator.get_metrics()
+        self.assertEqual(1, metrics['queue_depth'])
+        self.assertEqual(0, metrics['flush_count'])
+        self.accumulator.flush()
+        metrics = self.accumulator.get_metrics()
+        self.assertEqual(0, metrics['queue_depth'])
+        self.assertEqual(1, metrics['flush_count'])
+        self.assertTrue(metrics['last_flush_latency'] >= 0)
+
+    @mock.patch('octavia.openstack.common.loopingcall.'
+                'FixedIntervalLoopingCall')
+    def test_start_stop(self, looping_call):
+        self.accumulator.start()
+        looping_call.assert_called_once_with(self.accumulator.flush)
+        looping_call.return_value.start.assert_called_once_with(
+            1, initial_delay=1)
+        self.accumulator.add(self.listener_1.id, bytes_in=1)
+        self.accumulator.stop()
+        looping_call.return_value.stop.assert_called_once_with()
+        self.assertEqual(101, self._get_stats(self.listener_1.id).bytes_in)
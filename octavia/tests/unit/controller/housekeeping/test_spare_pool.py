@@ -0,0 +1,127 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from octavia.common import constants
+from octavia.compute.drivers import noop_driver
+from octavia.controller.housekeeping import spare_pool
+from octavia.db import models
+import octavia.tests.unit.base as base
+from octavia.tests.unit.db import base as db_base
+from octavia.tests.unit.db import test_models
+
+
+class TestDemandForecast(base.TestCase):
+
+    def setUp(self):
+        super(TestDemandForecast, self).setUp()
+        self.clock = mock.Mock(return_value=0.0)
+        self.forecast = spare_pool.DemandForecast(0.5, 10, self.clock)
+
+    def test_open_window_counts_immediately(self):
+        self.assertEqual(0.0, self.forecast.rate('small'))
+        for i in range(5):
+            self.forecast.record('small')
+        self.assertEqual(0.5, self.forecast.rate('small'))
+
+    def test_average_and_decay(self):
+        for i in range(10):
+            self.forecast.record('small')
+        self.clock.return_value = 10.0
+        self.assertEqual(0.5, self.forecast.rate('small'))
+        self.clock.return_value = 20.0
+        self.assertEqual(0.25, self.forecast.rate('small'))
+        self.clock.return_value = 40.0
+        self.assertEqual(0.0625, self.forecast.rate('small'))
+        self.assertEqual(set(['small']), self.forecast.keys())
+
+
+class TestSparePoolManager(db_base.OctaviaDBTestBase,
+                           test_models.ModelTestMixin):
+
+    def setUp(self):
+        super(TestSparePoolManager, self).setUp()
+        self.clock = mock.Mock(return_value=1000.0)
+        self.compute = noop_driver.NoopComputeDriver(boot_time=60,
+                                                     clock=self.clock)
+        self.forecast = spare_pool.DemandForecast(0.5, 60, self.clock)
+        self.manager = spare_pool.SparePoolManager(
+            self.compute, flavors=['small'], min_size=2, max_size=6,
+            build_rate=3, boot_time=60, forecast=self.forecast,
+            session=self.session, clock=self.clock)
+
+    def _spares(self, status):
+        self.session.expire_all()
+        return self.session.query(models.Amphora).filter_by(
+            status=status, load_balancer_id=None).count()
+
+    def test_refill_to_minimum(self):
+        self.manager.check()
+        self.assertEqual(2, self._spares(constants.PENDING_CREATE))
+        self.manager.check()
+        self.assertEqual(2, self._spares(constants.PENDING_CREATE))
+        self.clock.return_value += 60
+        self.manager.check()
+        self.assertEqual(2, self._spares(constants.ACTIVE))
+        self.assertEqual(0, self._spares(constants.PENDING_CREATE))
+
+    def test_claim(self):
+        self.manager.check()
+        self.clock.return_value += 60
+        self.manager.check()
+        lb_id = self.create_load_balancer(self.session).id
+        amphora = self.manager.claim(lb_id, 'small')
+        self.assertEqual(lb_id, amphora.load_balancer_id)
+        self.assertEqual(1, self.manager.claims)
+        self.assertIsNone(self.manager.claim(lb_id, 'large'))
+        self.assertEqual(1, self.manager.claim_misses)
+
+    def test_forecast_raises_target(self):
+        self.assertEqual(2, self.manager.target('small'))
+        for i in range(3):
+            self.forecast.record('small')
+        # 3 creations a minute and a one minute boot time.
+        self.assertEqual(5, self.manager.target('small'))
+        for i in range(60):
+            self.forecast.record('small')
+        self.assertEqual(6, self.manager.target('small'))
+
+    def test_build_rate_limit(self):
+        for i in range(60):
+            self.forecast.record('large')
+        self.assertEqual(3, self.manager.refill(self.session))
+        self.assertEqual(3, self._spares(constants.PENDING_CREATE))
+        self.assertEqual(3, self.manager.refill(self.session))
+        self.assertEqual(6, self._spares(constants.PENDING_CREATE))
+
+    def test_failed_boot_is_removed(self):
+        self.manager.check()
+        for amphora_id in list(self.compute.amphorae):
+            self.compute.delete(amphora_id)
+        self.manager.sync(self.session)
+        self.assertEqual(0, self._spares(constants.PENDING_CREATE))
+
+    def test_boot_time_follows_observed_boots(self):
+        self.compute.boot_time = 160
+        self.manager.check()
+        self.clock.return_value += 160
+        self.manager.check()
+        # Two boots of 160s observed, starting from the 60s estimate.
+        self.assertAlmostEqual(111.0, self.manager.boot_time)
+
+    def test_check_survives_compute_failure(self):
+        self.compute.build = mock.Mock(side_effect=ValueError)
+        self.manager.check()
+        self.assertEqual(0, self.manager.builds)
@@ -0,0 +1,87 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+
+from octavia.controller import membership
+from octavia.db import models
+from octavia.openstack.common import uuidutils
+from octavia.tests.unit.db import base
+
+
+class TestControllerMembership(base.OctaviaDBTestBase):
+
+    def setUp(self):
+        super(TestControllerMembership, self).setUp()
+        self.ids = [uuidutils.generate_uuid() for i in range(300)]
+
+    def _member(self, host, **kwargs):
+        return membership.ControllerMembership(
+            host=host, interval=10, expiry=30, replicas=50,
+            session=self.session, **kwargs)
+
+    def test_alone_owns_everything(self):
+        c1 = self._member('c1')
+        self.assertEqual(self.ids, c1.owned(self.ids))
+        c1.heartbeat()
+        self.assertEqual(self.ids, c1.owned(self.ids))
+        self.assertEqual(0, c1.rebalances)
+
+    def test_controllers_share_the_work(self):
+        members = [self._member(host) for host in ('c1', 'c2', 'c3')]
+        for member in members:
+            member.heartbeat()
+        # The first controllers learn about the later ones on their next
+        # heartbeat.
+        for member in members:
+            member.heartbeat()
+        shares = [set(member.owned(self.ids)) for member in members]
+        self.assertEqual(set(self.ids), set.union(*shares))
+        self.assertEqual(len(self.ids), sum(len(share) for share in shares))
+        self.assertTrue(all(shares))
+        for resource_id in self.ids:
+            self.assertEqual(1, len([member for member in members
+                                     if member.owns(resource_id)]))
+
+    def test_dead_controller_is_rebalanced(self):
+        on_rebalance = mock.Mock()
+        c1 = self._member('c1', on_rebalance=on_rebalance)
+        c2 = self._member('c2')
+        c2.heartbeat()
+        c1.heartbeat()
+        self.assertEqual(set(['c1', 'c2']), c1.ring.nodes)
+        self.assertNotEqual(self.ids, c1.owned(self.ids))
+        # Heartbeats are stamped by the database clock; c2 falls silent.
+        controller = self.session.query(models.Controller).filter_by(
+            host='c2').one()
+        controller.updated_at -= datetime.timedelta(seconds=31)
+        self.session.flush()
+        c1.heartbeat()
+        self.assertEqual(set(['c1']), c1.ring.nodes)
+        self.assertEqual(self.ids, c1.owned(self.ids))
+        self.assertEqual(2, on_rebalance.call_count)
+        self.assertEqual(['c1'], c1.controller_repo.get_live_hosts(
+            self.session, 3600))
+
+    def test_leave(self):
+        c1 = self._member('c1')
+        c2 = self._member('c2')
+        c1.heartbeat()
+        c2.heartbeat()
+        c2.stop()
+        c1.heartbeat()
+        self.assertEqual(set(['c1']), c1.ring.nodes)
+        c2.leave()
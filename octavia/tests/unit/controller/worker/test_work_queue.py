@@ -0,0 +1,130 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+
+from octavia.controller.worker import work_queue
+import octavia.tests.unit.base as base
+
+
+class TestWorkQueue(base.TestCase):
+
+    def setUp(self):
+        super(TestWorkQueue, self).setUp()
+        self.queue = work_queue.WorkQueue(workers=4)
+        self.addCleanup(self.queue.stop, graceful=False)
+        self.log = []
+        self.active = {}
+        self.max_active = 0
+
+    def _job(self, load_balancer_id, value, delay=0.01):
+        self.active[load_balancer_id] = self.active.get(
+            load_balancer_id, 0) + 1
+        self.max_active = max(self.max_active, sum(self.active.values()))
+        # Two jobs of one load balancer must never overlap.
+        assert self.active[load_balancer_id] == 1
+        eventlet.sleep(delay)
+        self.active[load_balancer_id] -= 1
+        self.log.append((load_balancer_id, value))
+        return value
+
+    def test_serializes_per_load_balancer(self):
+        self.queue.start()
+        jobs = [self.queue.submit('lb%d' % (i % 3), self._job,
+                                  'lb%d' % (i % 3), i)
+                for i in range(12)]
+        self.queue.join()
+        self.assertEqual(list(range(12)), [job.wait() for job in jobs])
+        for lb in ('lb0', 'lb1', 'lb2'):
+            self.assertEqual([i for i in range(12) if 'lb%d' % (i % 3) == lb],
+                             [value for lb_id, value in self.log
+                              if lb_id == lb])
+        self.assertEqual(3, self.max_active)
+
+    def test_parallel_across_load_balancers(self):
+        self.queue.start()
+        for i in range(20):
+            self.queue.submit(i, self._job, i, i)
+        self.queue.join()
+        self.assertEqual(4, self.max_active)
+        self.assertEqual(20, self.queue.completed)
+
+    def test_coalesces_queued_jobs(self):
+        jobs = [self.queue.submit('lb1', self._job, 'lb1', i,
+                                  coalesce_key='update')
+                for i in range(5)]
+        other = self.queue.submit('lb2', self._job, 'lb2', 'x',
+                                  coalesce_key='update')
+        self.assertEqual(1, len(set(jobs)))
+        self.assertEqual(4, jobs[0].coalesced)
+        self.assertEqual(1, self.queue.queued('lb1'))
+        self.queue.start()
+        self.queue.join()
+        self.assertEqual(4, jobs[0].wait())
+        self.assertEqual('x', other.wait())
+        self.assertEqual([('lb1', 4)], [entry for entry in self.log
+                                        if entry[0] == 'lb1'])
+        metrics = self.queue.get_metrics()
+        self.assertEqual(6, metrics['submitted'])
+        self.assertEqual(4, metrics['coalesced'])
+        self.assertEqual(0, metrics['queued'])
+
+    def test_running_job_is_not_coalesced(self):
+        self.queue.start()
+        first = self.queue.submit('lb1', self._job, 'lb1', 1, 0.05,
+                                  coalesce_key='update')
+        eventlet.sleep(0.01)
+        second = self.queue.submit('lb1', self._job, 'lb1', 2,
+                                   coalesce_key='update')
+        third = self.queue.submit('lb1', self._job, 'lb1', 3,
+                                  coalesce_key='update')
+        self.assertIsNot(first, second)
+        self.assertIs(second, third)
+        self.queue.join()
+        self.assertEqual([('lb1', 1), ('lb1', 3)], self.log)
+
+    def test_coalescing_keeps_submission_order(self):
+        first = self.queue.submit('lb1', self._job, 'lb1', 'update1',
+                                  coalesce_key='update')
+        self.queue.submit('lb1', self._job, 'lb1', 'delete')
+        second = self.queue.submit('lb1', self._job, 'lb1', 'update2',
+                                   coalesce_key='update')
+        third = self.queue.submit('lb1', self._job, 'lb1', 'update3',
+                                  coalesce_key='update')
+        self.assertIsNot(first, second)
+        self.assertIs(second, third)
+        self.assertEqual(3, self.queue.queued('lb1'))
+        self.queue.start()
+        self.queue.join()
+        self.assertEqual([('lb1', 'update1'), ('lb1', 'delete'),
+                          ('lb1', 'update3')], self.log)
+
+    def test_failure_does_not_stop_the_queue(self):
+        def fail():
+            raise ValueError('boom')
+        self.queue.start()
+        failed = self.queue.submit('lb1', fail)
+        job = self.queue.submit('lb1', self._job, 'lb1', 1)
+        self.queue.join()
+        self.assertRaises(ValueError, failed.wait)
+        self.assertEqual(1, job.wait())
+        self.assertEqual(1, self.queue.failed)
+        self.assertEqual(1, self.queue.completed)
+
+    def test_graceful_stop_drains_the_queue(self):
+        self.queue.start()
+        jobs = [self.queue.submit(i, self._job, i, i) for i in range(8)]
+        self.queue.stop()
+        self.assertTrue(all(job.done() for job in jobs))
+        self.assertEqual(0, self.queue.queued(0))
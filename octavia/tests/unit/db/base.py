@@ -13,6 +13,7 @@
 #    under the License.
 
 from oslo.db.sqlalchemy import test_base
+import sqlalchemy as sa
 
 from octavia.common import constants
 from octavia.db import base_models
@@ -36,6 +37,18 @@ class OctaviaDBTestBase(test_base.DbTestCase):
 
         self.session = self._get_session()
 
+    def record_statements(self):
+        """Returns a list that collects every SQL statement executed."""
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sa.event.listen(self.engine, 'before_cursor_execute', record)
+        self.addCleanup(sa.event.remove, self.engine,
+                        'before_cursor_execute', record)
+        return statements
+
     def _get_session(self):
         return self.sessionmaker(bind=self.engine, expire_on_commit=True)
 
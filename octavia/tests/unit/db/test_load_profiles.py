@@ -0,0 +1,112 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from octavia.common import constants
+from octavia.db import load_profiles
+from octavia.db import models
+from octavia.openstack.common import uuidutils
+from octavia.tests.unit.db import base
+from octavia.tests.unit.db import test_models
+
+
+class LoadProfilesTest(base.OctaviaDBTestBase, test_models.ModelTestMixin):
+
+    def setUp(self):
+        super(LoadProfilesTest, self).setUp()
+        self.statements = self.record_statements()
+
+    def _create_graph(self, num_listeners, num_members):
+        lb = self.create_load_balancer(self.session,
+                                       id=uuidutils.generate_uuid())
+        self.create_vip(self.session, lb.id)
+        self.create_amphora(self.session, id=uuidutils.generate_uuid(),
+                            load_balancer_id=lb.id)
+        for port in range(num_listeners):
+            pool = self.create_pool(self.session,
+                                    id=uuidutils.generate_uuid())
+            self.create_health_monitor(self.session, pool.id,
+                                       id=uuidutils.generate_uuid())
+            self.create_session_persistence(self.session, pool.id)
+            listener = self.create_listener(
+                self.session, id=uuidutils.generate_uuid(),
+                protocol_port=port, load_balancer_id=lb.id,
+                default_pool_id=pool.id)
+            self.create_listener_statistics(self.session, listener.id)
+            self.create_sni(self.session, listener_id=listener.id)
+            for i in range(num_members):
+                self.create_member(self.session, pool.id,
+                                   id=uuidutils.generate_uuid(),
+                                   ip_address='10.0.0.%d' % i)
+        lb_id = lb.id
+        self.session.expunge_all()
+        return lb_id
+
+    def _count_full_graph_queries(self, num_listeners, num_members,
+                                  graph=False):
+        lb_id = self._create_graph(num_listeners, num_members)
+        del self.statements[:]
+        lb_db = load_profiles.query(
+            self.session, models.LoadBalancer,
+            load_profiles.FULL_GRAPH).filter_by(id=lb_id).one()
+        lb = lb_db.to_data_model(graph=graph)
+        self.assertEqual(num_listeners, len(lb.listeners))
+        for listener in lb.listeners:
+            self.assertEqual(num_members, len(listener.default_pool.members))
+        return len(self.statements)
+
+    def test_full_graph_query_count_is_constant(self):
+        small = self._count_full_graph_queries(1, 1)
+        large = self._count_full_graph_queries(3, 20)
+        self.assertEqual(small, large)
+
+    def test_full_graph_query_count_is_constant_for_graph_conversion(self):
+        small = self._count_full_graph_queries(1, 1, graph=True)
+        large = self._count_full_graph_queries(3, 20, graph=True)
+        self.assertEqual(small, large)
+
+    def test_listener_full_graph(self):
+        lb_id = self._create_graph(1, 10)
+        listener_id = self.session.query(models.Listener).filter_by(
+            load_balancer_id=lb_id).one().id
+        self.session.expunge_all()
+        del self.statements[:]
+        listener_db = load_profiles.query(
+            self.session, models.Listener,
+            load_profiles.FULL_GRAPH).filter_by(id=listener_id).one()
+        listener = listener_db.to_data_model()
+        num_queries = len(self.statements)
+        self.assertEqual(10, len(listener.default_pool.members))
+        self.assertIsNotNone(listener.load_balancer.vip)
+        self.assertIsNotNone(listener.default_pool.health_monitor)
+        self.assertEqual(num_queries, len(self.statements))
+
+    def test_status_only(self):
+        lb_id = self._create_graph(2, 10)
+        del self.statements[:]
+        lb_db = load_profiles.query(
+            self.session, models.LoadBalancer,
+            load_profiles.STATUS_ONLY).filter_by(id=lb_id).one()
+        num_queries = len(self.statements)
+        self.assertEqual(constants.ACTIVE, lb_db.provisioning_status)
+        for listener in lb_db.listeners:
+            self.assertEqual(constants.ONLINE, listener.operating_status)
+            self.assertEqual(constants.ONLINE,
+                             listener.default_pool.operating_status)
+            for member in listener.default_pool.members:
+                self.assertEqual(constants.ONLINE, member.operating_status)
+        self.assertEqual(num_queries, len(self.statements))
+
+    def test_unknown_profile(self):
+        self.assertRaises(ValueError, load_profiles.get_options,
+                          models.Member, load_profiles.FULL_GRAPH)
@@ -600,6 +600,43 @@ class DataModelConversionTest(base.OctaviaDBTestBase, ModelTestMixin):
             id=self.member.id).first()
         self.check_member(member_db.to_data_model())
 
+    def test_conversion_plan_is_cached_per_class(self):
+        plan = models.Pool._get_conversion_plan()
+        self.assertIs(plan, models.Pool._get_conversion_plan())
+        self.assertIsNot(plan, models.Member._get_conversion_plan())
+        self.assertIn('lb_algorithm', plan.columns)
+        self.assertIn(('members', True), plan.relationships)
+        self.assertIn(('health_monitor', False), plan.relationships)
+        self.assertEqual(('id',), plan.primary_key)
+
+    def test_load_balancer_graph(self):
+        self.associate_amphora(self.lb, self.create_amphora(self.session))
+        lb_db = self.session.query(models.LoadBalancer).filter_by(
+            id=self.lb.id).first()
+        lb = lb_db.to_data_model(graph=True)
+        self.check_load_balancer(lb)
+        listener = lb.listeners[0]
+        pool = listener.default_pool
+        self.assertIs(lb, listener.load_balancer)
+        self.assertIs(lb, lb.vip.load_balancer)
+        self.assertIs(lb, lb.amphorae[0].load_balancer)
+        self.assertIs(listener, pool.listener)
+        self.assertIs(listener, listener.stats.listener)
+        self.assertIs(listener, listener.sni_containers[0].listener)
+        self.assertIs(pool, pool.members[0].pool)
+        self.assertIs(pool, pool.health_monitor.pool)
+        self.assertIs(pool, pool.session_persistence.pool)
+
+    def test_member_graph(self):
+        member_db = self.session.query(models.Member).filter_by(
+            id=self.member.id).first()
+        member = member_db.to_data_model(graph=True)
+        self.check_member(member)
+        self.assertIs(member, member.pool.members[0])
+        self.assertIs(member.pool,
+                      member.pool.listener.load_balancer.listeners[
+                          0].default_pool)
+
     def check_load_balancer(self, lb, check_listeners=True,
                             check_amphorae=True, check_vip=True):
         self.assertIsInstance(lb, data_models.LoadBalancer)
@@ -0,0 +1,366 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+from sqlalchemy import orm
+
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.common import exceptions
+from octavia.db import models
+from octavia.db import repositories as repo
+from octavia.openstack.common import timeutils
+from octavia.openstack.common import uuidutils
+from octavia.tests.unit.db import base
+from octavia.tests.unit.db import test_models
+
+
+class BaseRepositoryTest(base.OctaviaDBTestBase, test_models.ModelTestMixin):
+
+    def setUp(self):
+        super(BaseRepositoryTest, self).setUp()
+        self.pool = self.create_pool(self.session)
+
+
+class MemberRepositoryTest(BaseRepositoryTest):
+
+    def setUp(self):
+        super(MemberRepositoryTest, self).setUp()
+        self.member_repo = repo.MemberRepository()
+
+    def _member_kwargs(self, count, start=0):
+        return [{'tenant_id': self.FAKE_UUID_1,
+                 'pool_id': self.pool.id,
+                 'ip_address': '10.0.%d.%d' % divmod(i, 256),
+                 'protocol_port': 80,
+                 'weight': 1,
+                 'operating_status': constants.ONLINE,
+                 'enabled': True} for i in range(start, start + count)]
+
+    def _get_members(self):
+        return self.session.query(models.Member).filter_by(
+            pool_id=self.pool.id).all()
+
+    def test_create_get_update_delete(self):
+        member = self.member_repo.create(self.session,
+                                         **self._member_kwargs(1)[0])
+        self.assertIsInstance(member, data_models.Member)
+        self.member_repo.update(self.session, member.id, weight=5)
+        self.assertEqual(5, self.member_repo.get(self.session,
+                                                 id=member.id).weight)
+        self.member_repo.delete(self.session, id=member.id)
+        self.assertIsNone(self.member_repo.get(self.session, id=member.id))
+
+    def test_create_batch(self):
+        member_ids = self.member_repo.create_batch(
+            self.session, self._member_kwargs(1200))
+        self.assertEqual(1200, len(member_ids))
+        self.assertEqual(1200, len(set(member_ids)))
+        self.assertEqual(set(member_ids),
+                         set(m.id for m in self._get_members()))
+
+    def test_create_batch_keeps_given_id(self):
+        kwargs = self._member_kwargs(1)
+        kwargs[0]['id'] = self.FAKE_UUID_2
+        self.assertEqual([self.FAKE_UUID_2],
+                         self.member_repo.create_batch(self.session, kwargs))
+
+    def test_create_batch_duplicate_in_batch(self):
+        kwargs = self._member_kwargs(3) + self._member_kwargs(1)
+        self.assertRaises(exceptions.DuplicateMemberEntry,
+                          self.member_repo.create_batch, self.session, kwargs)
+        self.assertEqual([], self._get_members())
+
+    def test_create_batch_duplicate_existing(self):
+        self.member_repo.create_batch(self.session, self._member_kwargs(2))
+        self.assertRaises(exceptions.DuplicateMemberEntry,
+                          self.member_repo.create_batch, self.session,
+                          self._member_kwargs(3, start=1))
+        self.assertEqual(2, len(self._get_members()))
+
+    def test_create_batch_same_address_other_port(self):
+        self.member_repo.create_batch(self.session, self._member_kwargs(2))
+        kwargs = self._member_kwargs(2)
+        for member in kwargs:
+            member['protocol_port'] = 81
+        self.member_repo.create_batch(self.session, kwargs)
+        self.assertEqual(4, len(self._get_members()))
+
+    def test_update_batch(self):
+        member_ids = self.member_repo.create_batch(
+            self.session, self._member_kwargs(600))
+        updates = dict((member_id, {'weight': 10})
+                       for member_id in member_ids[:550])
+        updates[member_ids[-1]] = {'weight': 3, 'enabled': False}
+        self.member_repo.update_batch(self.session, updates)
+        self.session.expire_all()
+        members = dict((m.id, m) for m in self._get_members())
+        self.assertEqual(10, members[member_ids[0]].weight)
+        self.assertEqual(10, members[member_ids[549]].weight)
+        self.assertEqual(1, members[member_ids[550]].weight)
+        self.assertEqual(3, members[member_ids[-1]].weight)
+        self.assertFalse(members[member_ids[-1]].enabled)
+        self.assertTrue(members[member_ids[0]].enabled)
+
+    def test_update_batch_invalid_field(self):
+        member_ids = self.member_repo.create_batch(
+            self.session, self._member_kwargs(1))
+        self.assertRaises(ValueError, self.member_repo.update_batch,
+                          self.session,
+                          {member_ids[0]: {'ip_address': '10.0.0.9'}})
+
+    def test_delete_batch(self):
+        member_ids = self.member_repo.create_batch(
+            self.session, self._member_kwargs(1100))
+        deleted = self.member_repo.delete_batch(self.session,
+                                                member_ids[:1050])
+        self.assertEqual(1050, deleted)
+        self.assertEqual(set(member_ids[1050:]),
+                         set(m.id for m in self._get_members()))
+
+
+class AmphoraRepositoryTest(BaseRepositoryTest):
+
+    def setUp(self):
+        super(AmphoraRepositoryTest, self).setUp()
+        self.amphora_repo = repo.AmphoraRepository()
+        self.lb_id = self.create_load_balancer(self.session).id
+
+    def _create_spare(self, status=constants.ACTIVE, compute_flavor='small'):
+        return self.amphora_repo.create(
+            self.session, id=uuidutils.generate_uuid(),
+            host_id=self.FAKE_UUID_1, status=status,
+            compute_flavor=compute_flavor)
+
+    def test_count_spares(self):
+        self._create_spare()
+        self._create_spare()
+        self._create_spare(status=constants.PENDING_CREATE)
+        self._create_spare(compute_flavor='large')
+        self._create_spare(status=constants.ERROR)
+        allocated = self._create_spare()
+        self.amphora_repo.update(self.session, allocated.id,
+                                 load_balancer_id=self.lb_id)
+        self.assertEqual(
+            {'small': {constants.ACTIVE: 2, constants.PENDING_CREATE: 1},
+             'large': {constants.ACTIVE: 1, constants.PENDING_CREATE: 0}},
+            self.amphora_repo.count_spares(self.session))
+
+    def test_claim_spare(self):
+        spare = self._create_spare()
+        self._create_spare(status=constants.PENDING_CREATE)
+        self._create_spare(compute_flavor='large')
+        amphora = self.amphora_repo.claim_spare(self.session, self.lb_id,
+                                                'small')
+        self.assertIsInstance(amphora, data_models.Amphora)
+        self.assertEqual(spare.id, amphora.id)
+        self.assertEqual(self.lb_id, amphora.load_balancer_id)
+        self.assertIsNone(self.amphora_repo.claim_spare(
+            self.session, self.lb_id, 'small'))
+
+    def test_claim_spare_lost_race(self):
+        taken = self._create_spare()
+        spare = self._create_spare()
+        self.amphora_repo.update(self.session, taken.id,
+                                 load_balancer_id=self.lb_id)
+        statements = self.record_statements()
+        candidates = [mock.Mock(id=taken.id), mock.Mock(id=spare.id)]
+        with mock.patch.object(orm.Query, 'all',
+                               return_value=candidates):
+            amphora = self.amphora_repo.claim_spare(
+                self.session, self.lb_id, 'small')
+        self.assertEqual(spare.id, amphora.id)
+        self.assertEqual(2, len([s for s in statements
+                                 if s.startswith('UPDATE')]))
+
+
+class ControllerRepositoryTest(BaseRepositoryTest):
+
+    def setUp(self):
+        super(ControllerRepositoryTest, self).setUp()
+        self.controller_repo = repo.ControllerRepository()
+
+    def _silence(self, host, seconds):
+        # Heartbeats are stamped by the database clock, so a silent
+        # controller is simulated by moving its last heartbeat back.
+        controller = self.session.query(models.Controller).filter_by(
+            host=host).one()
+        controller.updated_at -= datetime.timedelta(seconds=seconds)
+        self.session.flush()
+
+    def test_heartbeat_and_expiry(self):
+        self.controller_repo.heartbeat(self.session, 'c2')
+        self.controller_repo.heartbeat(self.session, 'c1')
+        self.assertEqual(['c1', 'c2'], self.controller_repo.get_live_hosts(
+            self.session, 30))
+        self._silence('c2', 40)
+        self.assertEqual(['c1'], self.controller_repo.get_live_hosts(
+            self.session, 30))
+        self.assertEqual(1, self.controller_repo.purge_dead(self.session,
+                                                            30))
+        self.assertEqual(['c1'], [controller.host for controller in
+                                  self.controller_repo.get_all(
+                                      self.session)])
+
+    def test_local_clock_is_ignored(self):
+        # c1 runs five minutes behind the other controllers.
+        timeutils.set_time_override(timeutils.utcnow() -
+                                    datetime.timedelta(minutes=5))
+        self.addCleanup(timeutils.clear_time_override)
+        self.controller_repo.heartbeat(self.session, 'c1')
+        timeutils.clear_time_override()
+        self.assertEqual(['c1'], self.controller_repo.get_live_hosts(
+            self.session, 30))
+        self.controller_repo.heartbeat(self.session, 'c2')
+        self.assertEqual(0, self.controller_repo.purge_dead(self.session,
+                                                            30))
+
+
+class DistributedLockRepositoryTest(BaseRepositoryTest):
+
+    def setUp(self):
+        super(DistributedLockRepositoryTest, self).setUp()
+        self.lock_repo = repo.DistributedLockRepository()
+
+    def _freeze_database_clock(self):
+        self.database_now = datetime.datetime(2014, 1, 1)
+        patcher = mock.patch.object(repo, '_database_now',
+                                    lambda session: self.database_now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_acquire_release(self):
+        self.assertTrue(self.lock_repo.acquire(self.session, 'lb1', 'c1', 60))
+        self.assertFalse(self.lock_repo.acquire(self.session, 'lb1', 'c2',
+                                                60))
+        self.assertTrue(self.lock_repo.acquire(self.session, 'lb1', 'c1', 60))
+        self.assertFalse(self.lock_repo.release(self.session, 'lb1', 'c2'))
+        self.assertTrue(self.lock_repo.release(self.session, 'lb1', 'c1'))
+        self.assertIsNone(self.lock_repo.get(self.session, name='lb1'))
+
+    def test_expired_lock_is_taken_over(self):
+        self._freeze_database_clock()
+        self.lock_repo.acquire(self.session, 'lb1', 'c1', 60)
+        self.database_now += datetime.timedelta(seconds=61)
+        self.assertTrue(self.lock_repo.acquire(self.session, 'lb1', 'c2',
+                                               60))
+        self.assertEqual('c2', self.lock_repo.get(self.session,
+                                                  name='lb1').owner)
+
+    def test_local_clock_is_ignored(self):
+        self.assertTrue(self.lock_repo.acquire(self.session, 'lb1', 'c1', 60))
+        # c2 runs five minutes ahead of c1.
+        timeutils.set_time_override(timeutils.utcnow() +
+                                    datetime.timedelta(minutes=5))
+        self.addCleanup(timeutils.clear_time_override)
+        self.assertFalse(self.lock_repo.acquire(self.session, 'lb1', 'c2',
+                                                60))
+
+
+class HealthStatusRepositoryTest(BaseRepositoryTest):
+
+    def setUp(self):
+        super(HealthStatusRepositoryTest, self).setUp()
+        self.health_repo = repo.HealthStatusRepository()
+        self.lb = self.create_load_balancer(self.session)
+        self.listener = self.create_listener(
+            self.session, load_balancer_id=self.lb.id,
+            default_pool_id=self.pool.id)
+        self.member_ids = repo.MemberRepository().create_batch(
+            self.session,
+            [{'pool_id': self.pool.id, 'ip_address': '10.0.0.%d' % i,
+              'protocol_port': 80, 'operating_status': constants.ONLINE,
+              'enabled': True} for i in range(10)])
+        self.statements = self.record_statements()
+
+    def _operating_status(self, model_cls, entity_id):
+        self.session.expire_all()
+        return self.session.query(model_cls).filter_by(
+            id=entity_id).one().operating_status
+
+    def _health(self, lb_status, listener_status, members, pools=None):
+        listener = {constants.HEALTH_LISTENER_STATUS: listener_status,
+                    constants.HEALTH_NODES: members}
+        if pools:
+            listener[constants.HEALTH_POOLS] = pools
+        return {constants.HEALTH_LOADBALANCERS: {
+            self.lb.id: {constants.HEALTH_LOADBALANCER_STATUS: lb_status,
+                         constants.HEALTH_LISTENERS: {
+                             self.listener.id: listener}}}}
+
+    def test_flatten(self):
+        members = {self.member_ids[0]: constants.OFFLINE}
+        pools = {self.pool.id: {constants.HEALTH_POOL_STATUS:
+                                constants.DEGRADED,
+                                constants.HEALTH_NODES: {
+                                    self.member_ids[1]: constants.ERROR}}}
+        flat = self.health_repo.flatten(self._health(
+            constants.ONLINE, constants.DEGRADED, members, pools))
+        self.assertEqual(({self.lb.id: constants.ONLINE},
+                          {self.listener.id: constants.DEGRADED},
+                          {self.pool.id: constants.DEGRADED},
+                          {self.member_ids[0]: constants.OFFLINE,
+                           self.member_ids[1]: constants.ERROR}), flat)
+
+    def test_update_health_groups_by_status(self):
+        members = dict((member_id, constants.OFFLINE)
+                       for member_id in self.member_ids[:5])
+        members.update((member_id, constants.ERROR)
+                       for member_id in self.member_ids[5:])
+        pools = {self.pool.id: {constants.HEALTH_POOL_STATUS:
+                                constants.OFFLINE}}
+        del self.statements[:]
+        changed = self.health_repo.update_health(self.session, self._health(
+            constants.DEGRADED, constants.DEGRADED, members, pools))
+        self.assertEqual(13, changed)
+        updates = [s for s in self.statements if s.startswith('UPDATE')]
+        # One UPDATE per entity type and target status.
+        self.assertEqual(5, len(updates))
+        self.assertEqual(constants.DEGRADED,
+                         self._operating_status(models.LoadBalancer,
+                                                self.lb.id))
+        self.assertEqual(constants.DEGRADED,
+                         self._operating_status(models.Listener,
+                                                self.listener.id))
+        self.assertEqual(constants.OFFLINE,
+                         self._operating_status(models.Pool, self.pool.id))
+        self.assertEqual(constants.OFFLINE,
+                         self._operating_status(models.Member,
+                                                self.member_ids[0]))
+        self.assertEqual(constants.ERROR,
+                         self._operating_status(models.Member,
+                                                self.member_ids[-1]))
+
+    def test_update_health_writes_only_changes(self):
+        members = dict((member_id, constants.ONLINE)
+                       for member_id in self.member_ids)
+        members[self.member_ids[0]] = constants.OFFLINE
+        changed = self.health_repo.update_health(self.session, self._health(
+            constants.ONLINE, constants.ONLINE, members))
+        self.assertEqual(1, changed)
+        changed = self.health_repo.update_health(self.session, self._health(
+            constants.ONLINE, constants.ONLINE, members))
+        self.assertEqual(0, changed)
+
+    def test_update_provisioning_status_batch(self):
+        changed = repo.LoadBalancerRepository().update_status_batch(
+            self.session, 'provisioning_status',
+            {self.lb.id: constants.PENDING_UPDATE})
+        self.assertEqual(1, changed)
+        self.session.expire_all()
+        self.assertEqual(constants.PENDING_UPDATE,
+                         self.session.query(models.LoadBalancer).filter_by(
+                             id=self.lb.id).one().provisioning_status)
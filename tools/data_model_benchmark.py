@@ -0,0 +1,86 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures memory, construction and comparison cost of data models.
+
+The resident memory of many Members is read from /proc/self/statm, so
+that figure is only printed on Linux.
+
+Usage: python tools/data_model_benchmark.py [members]
+"""
+
+import gc
+import os
+import sys
+import timeit
+
+from octavia.common import constants
+from octavia.common import data_models
+
+STATM = '/proc/self/statm'
+
+
+def _rss_kb():
+    with open(STATM) as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def _member(member_id):
+    return data_models.Member(
+        id=member_id, tenant_id='tenant-1', pool_id='pool-1',
+        ip_address='10.0.0.1', protocol_port=80, weight=1, enabled=True,
+        subnet_id='subnet-1', operating_status=constants.ONLINE)
+
+
+def _pool(members):
+    pool = data_models.Pool(id='pool-1', members=[
+        _member('member-%d' % i) for i in range(members)])
+    for member in pool.members:
+        member.pool = pool
+    return pool
+
+
+def _time(name, func, number):
+    elapsed = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print('%-28s %9.2f us' % (name, elapsed * 1e6))
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 200000
+    member = _member('member-1')
+    size = sys.getsizeof(member)
+    if hasattr(member, '__dict__'):
+        size += sys.getsizeof(member.__dict__)
+    print('%-28s %9d bytes' % ('Member object', size))
+    if os.path.exists(STATM):
+        ids = ['member-%d' % i for i in range(count)]
+        gc.collect()
+        before = _rss_kb()
+        members = [_member(member_id) for member_id in ids]
+        gc.collect()
+        used = _rss_kb() - before
+        print('%-28s %9.1f MB, %.0f bytes each' % (
+            '%d Members resident' % len(members), used / 1024.0,
+            used * 1024.0 / count))
+        del members
+    _time('Member()', lambda: _member('member-1'), 100000)
+    other = _member('member-1')
+    _time('Member == Member', lambda: member == other, 100000)
+    mine, theirs = _pool(50), _pool(50)
+    _time('Pool(50 members) == Pool', lambda: mine == theirs, 2000)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,124 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures to_data_model conversion of a load balancer graph.
+
+A load balancer with listeners, each with a pool of members, is stored in
+an in-memory sqlite database and converted with to_data_model(), with
+to_data_model(graph=True) and with the dir() based conversion that the
+per-class conversion plan replaced.  The graph is converted once before
+timing, so relationships are already loaded and only conversion is
+measured.
+
+Usage: python tools/data_model_conversion_benchmark.py [listeners] [members]
+"""
+
+import sys
+import timeit
+
+import sqlalchemy as sa
+from sqlalchemy import orm
+from sqlalchemy.orm import collections
+
+from octavia.common import constants
+from octavia.db import base_models
+from octavia.db import models
+
+LOOKUP_TABLES = [
+    (constants.SUPPORTED_PROVISIONING_STATUSES, models.ProvisioningStatus),
+    (constants.SUPPORTED_OPERATING_STATUSES, models.OperatingStatus),
+    (constants.SUPPORTED_PROTOCOLS, models.Protocol),
+    (constants.SUPPORTED_LB_ALGORITHMS, models.Algorithm),
+]
+
+
+def _session():
+    engine = sa.create_engine('sqlite://')
+    base_models.BASE.metadata.create_all(bind=engine)
+    session = orm.sessionmaker(bind=engine)()
+    for names, model_cls in LOOKUP_TABLES:
+        session.add_all([model_cls(name=name) for name in names])
+    session.commit()
+    return session
+
+
+def _load_balancer(session, listeners, members):
+    lb = models.LoadBalancer(
+        id='lb-1', tenant_id='tenant-1', name='lb',
+        provisioning_status=constants.ACTIVE,
+        operating_status=constants.ONLINE, enabled=True)
+    session.add(lb)
+    for i in range(listeners):
+        pool = models.Pool(
+            id='pool-%d' % i, tenant_id='tenant-1', name='pool',
+            protocol=constants.PROTOCOL_HTTP,
+            lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN,
+            operating_status=constants.ONLINE, enabled=True)
+        session.add(pool)
+        session.add(models.Listener(
+            id='listener-%d' % i, tenant_id='tenant-1', name='listener',
+            protocol=constants.PROTOCOL_HTTP, protocol_port=80 + i,
+            load_balancer_id=lb.id, default_pool_id=pool.id,
+            provisioning_status=constants.ACTIVE,
+            operating_status=constants.ONLINE, enabled=True))
+        session.add_all([models.Member(
+            id='member-%d-%d' % (i, j), tenant_id='tenant-1',
+            pool_id=pool.id, subnet_id='subnet-1',
+            ip_address='10.%d.%d.%d' % (i, j >> 8, j & 255),
+            protocol_port=8080, weight=1, operating_status=constants.ONLINE,
+            enabled=True) for j in range(members)])
+    session.commit()
+    return session.query(models.LoadBalancer).get('lb-1')
+
+
+def _to_data_model_dir(row, calling_cls=None):
+    # The conversion to_data_model did before it had a conversion plan.
+    dm_kwargs = {}
+    for column in row.__table__.columns:
+        dm_kwargs[column.name] = getattr(row, column.name)
+    for attr_name in dir(row):
+        if attr_name.startswith('_'):
+            continue
+        attr = getattr(row, attr_name)
+        if isinstance(attr, base_models.OctaviaBase):
+            if attr.__class__ != calling_cls:
+                dm_kwargs[attr_name] = _to_data_model_dir(
+                    attr, calling_cls=row.__class__)
+        elif isinstance(attr, collections.InstrumentedList):
+            dm_kwargs[attr_name] = [
+                _to_data_model_dir(item, calling_cls=row.__class__)
+                for item in attr]
+    return row.__data_model__(**dm_kwargs)
+
+
+def main(argv):
+    listeners = int(argv[0]) if len(argv) > 0 else 1
+    members = int(argv[1]) if len(argv) > 1 else 5000
+    lb = _load_balancer(_session(), listeners, members)
+    lb.to_data_model(graph=True)
+    cases = [
+        ('dir() walk', lambda: _to_data_model_dir(lb)),
+        ('to_data_model()', lambda: lb.to_data_model()),
+        ('to_data_model(graph=True)', lambda: lb.to_data_model(graph=True)),
+    ]
+    print('%d listeners x %d members' % (listeners, members))
+    number = max(20000 // (listeners * members), 1)
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=number, repeat=5)) / number
+        print('  %-28s %8.2f ms' % (name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures FanoutExecutor pushing configurations to a fake amphora agent.
+
+The agent is a local eventlet.wsgi server answering every request after
+a delay.  Each push uploads a configuration and reloads the listener
+through AmphoraAPIClient, serially and then at several concurrencies.
+
+Usage: python tools/fanout_benchmark.py [pushes] [delay ms]
+"""
+
+import eventlet
+eventlet.monkey_patch()
+
+import sys
+import time
+
+from eventlet import wsgi
+
+from octavia.amphorae.drivers import fanout
+from octavia.amphorae.drivers.haproxy_simple import connection_pool
+from octavia.amphorae.drivers.haproxy_simple import rest_client
+from octavia.common import data_models
+
+CONFIG = 'x' * 4096
+
+
+class _NullLog(object):
+
+    def write(self, message):
+        pass
+
+
+def _agent(delay):
+    def application(environ, start_response):
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        if length:
+            environ['wsgi.input'].read(length)
+        eventlet.sleep(delay)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return ['']
+    return application
+
+
+def _push(api, amphora):
+    api.upload_config(amphora, amphora.id, CONFIG)
+    api.reload_listener(amphora, amphora.id)
+
+
+def main(argv):
+    pushes = int(argv[0]) if len(argv) > 0 else 2000
+    delay = (float(argv[1]) if len(argv) > 1 else 20) / 1000.0
+    sock = eventlet.listen(('127.0.0.1', 0), backlog=1024)
+    eventlet.spawn_n(wsgi.server, sock, _agent(delay), log=_NullLog(),
+                     max_size=10000)
+    amphorae = [data_models.Amphora(id='amphora-%d' % i,
+                                    lb_network_ip='127.0.0.1')
+                for i in range(pushes)]
+    print('%d pushes, agent delay %.0f ms' % (pushes, delay * 1000))
+    for concurrency in (1, 10, 50, 200):
+        pool = connection_pool.ConnectionPool(
+            max_connections=concurrency, max_idle_per_amphora=concurrency,
+            idle_timeout=60, connect_timeout=5, use_ssl=False)
+        api = rest_client.AmphoraAPIClient(pool, port=sock.getsockname()[1])
+        executor = fanout.FanoutExecutor(concurrency=concurrency, timeout=30)
+        # Serial pushes are slow; time fewer of them.
+        items = amphorae[:100] if concurrency == 1 else amphorae
+        start = time.time()
+        results = executor.map(lambda amphora: _push(api, amphora), items)
+        elapsed = time.time() - start
+        print('  concurrency %-4d %8.0f pushes/s  %d failed  %d timed out'
+              % (concurrency, len(items) / elapsed, len(results.failed),
+                 len(results.timed_out)))
+        pool.close_all()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,78 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures haproxy configuration rendering of JinjaTemplater on large pools.
+
+Each pool size is rendered cold, again unchanged and again after changing
+the weight of one member.
+
+Usage: python tools/haproxy_config_benchmark.py [members ...]
+"""
+
+import sys
+import time
+
+from octavia.amphorae.drivers.haproxy_simple import jinja_cfg
+from octavia.common import constants
+from octavia.common import data_models
+
+
+def _listener(count):
+    monitor = data_models.HealthMonitor(
+        type=constants.HEALTH_MONITOR_HTTP, delay=5, timeout=3,
+        fall_threshold=2, rise_threshold=3, http_method='GET',
+        url_path='/healthcheck', expected_codes='200-204', enabled=True)
+    members = [data_models.Member(
+        id='member-%d' % i,
+        ip_address='10.%d.%d.%d' % (i >> 16, (i >> 8) & 255, i & 255),
+        protocol_port=8080, weight=1 + i % 10, enabled=bool(i % 50))
+        for i in range(count)]
+    pool = data_models.Pool(
+        id='pool-1', protocol=constants.PROTOCOL_HTTP,
+        lb_algorithm=constants.LB_ALGORITHM_LEAST_CONNECTIONS, enabled=True,
+        members=members, health_monitor=monitor,
+        session_persistence=data_models.SessionPersistence(
+            type=constants.SESSION_PERSISTENCE_HTTP_COOKIE))
+    return data_models.Listener(
+        id='listener-1', protocol=constants.PROTOCOL_HTTP, protocol_port=80,
+        connection_limit=10000, enabled=True, default_pool_id=pool.id,
+        default_pool=pool)
+
+
+def _run(name, templater, listener, vip):
+    rendered = templater.fragments_rendered
+    start = time.time()
+    config = templater.build_config(listener, vip)
+    elapsed = time.time() - start
+    print('  %-22s %9.1f ms %7d fragments rendered %9d bytes' % (
+        name, elapsed * 1000, templater.fragments_rendered - rendered,
+        len(config)))
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [1000, 10000, 50000]
+    vip = data_models.Vip(ip_address='192.0.2.10')
+    for count in sizes:
+        print('%d members' % count)
+        listener = _listener(count)
+        templater = jinja_cfg.JinjaTemplater(base_path='/var/lib/octavia')
+        _run('cold', templater, listener, vip)
+        _run('unchanged', templater, listener, vip)
+        listener.default_pool.members[count // 2].weight += 1
+        _run('one member changed', templater, listener, vip)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,132 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Drives UDPHeartbeatReceiver with heartbeats sent from local sockets.
+
+Sender processes each send heartbeats of a share of the amphorae to a
+receiver bound on localhost whose handlers only count their calls.  With
+a rate, heartbeats are sent in bursts every 10 ms; without one senders
+run as fast as they can and may overrun the socket receive buffer, which
+the kernel caps at net.core.rmem_max.
+
+Usage: python tools/heartbeat_load_generator.py [senders] [seconds]
+                                                [amphorae] [rate]
+"""
+
+import multiprocessing
+import socket
+import sys
+import time
+
+import eventlet
+
+from octavia.amphorae.drivers.health import heartbeat_udp
+from octavia.common import constants
+from octavia.openstack.common import jsonutils
+
+BATCH_SIZE = 256
+RCVBUF = 4 * 1024 * 1024
+BURST_INTERVAL = 0.01
+
+
+class _CountingHandler(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def update_health(self, health):
+        self.calls += 1
+
+    def update_stats(self, stats):
+        self.calls += 1
+
+
+def _heartbeat(index):
+    amp_id = 'amphora-%d' % index
+    listener_id = 'listener-%d' % index
+    return jsonutils.dumps({
+        'id': amp_id,
+        'health': {
+            constants.HEALTH_AMPHORA_STATUS: constants.ONLINE,
+            constants.HEALTH_LOADBALANCERS: {'lb-%d' % index: {
+                constants.HEALTH_LOADBALANCER_STATUS: constants.ONLINE,
+                constants.HEALTH_LISTENERS: {listener_id: {
+                    constants.HEALTH_LISTENER_STATUS: constants.ONLINE,
+                    constants.HEALTH_NODES: dict(
+                        ('member-%d-%d' % (index, i), constants.ONLINE)
+                        for i in range(10))}}}}},
+        'stats': {'lb-%d' % index: {listener_id: {
+            'bytes_in': 1000, 'bytes_out': 4000, 'total_connections': 3,
+            'active_connections': 7}}}})
+
+
+def _send(address, amphorae, seconds, rate, sent):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payloads = [_heartbeat(index) for index in amphorae]
+    burst = max(int(rate * BURST_INTERVAL), 1) if rate else len(payloads)
+    count = 0
+    deadline = time.time() + seconds
+    next_burst = time.time()
+    while time.time() < deadline:
+        for i in range(burst):
+            sock.sendto(payloads[(count + i) % len(payloads)], address)
+        count += burst
+        if rate:
+            next_burst += BURST_INTERVAL
+            time.sleep(max(next_burst - time.time(), 0))
+    sent.put(count)
+
+
+def main(argv):
+    senders = int(argv[0]) if len(argv) > 0 else 2
+    seconds = float(argv[1]) if len(argv) > 1 else 5
+    amphorae = int(argv[2]) if len(argv) > 2 else 1000
+    rate = float(argv[3]) if len(argv) > 3 else 0
+    handler = _CountingHandler()
+    receiver = heartbeat_udp.UDPHeartbeatReceiver(
+        handler, handler, ip='127.0.0.1', port=0, batch_size=BATCH_SIZE,
+        rcvbuf=RCVBUF)
+    receiver.bind()
+    sent = multiprocessing.Queue()
+    processes = []
+    for i in range(senders):
+        processes.append(multiprocessing.Process(
+            target=_send, args=(receiver.address, range(i, amphorae, senders),
+                                seconds, rate / senders, sent)))
+    receiver.start()
+    start = time.time()
+    for process in processes:
+        process.start()
+    total = 0
+    for process in processes:
+        while process.is_alive():
+            eventlet.sleep(0.1)
+        total += sent.get()
+    # Let the receiver drain what is still queued on the socket.
+    eventlet.sleep(0.5)
+    elapsed = time.time() - start - 0.5
+    receiver.stop()
+    print('senders %d, amphorae %d, %.1f s' % (senders, amphorae, elapsed))
+    print('sent        %9d heartbeats %9.0f/s' % (total, total / elapsed))
+    print('received    %9d heartbeats %9.0f/s' % (
+        receiver.packets_received, receiver.packets_received / elapsed))
+    print('lost        %9d heartbeats' % (total - receiver.packets_received))
+    print('dispatched  %9d batches, %.1f heartbeats per batch' % (
+        receiver.batches_dispatched,
+        receiver.packets_received / float(receiver.batches_dispatched or 1)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
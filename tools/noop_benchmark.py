@@ -0,0 +1,211 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Drives simulated load balancers through the noop amphora driver.
+
+Usage: python tools/noop_benchmark.py --help
+"""
+
+import argparse
+import math
+import sys
+import time
+
+from octavia.amphorae.drivers import circuit_breaker
+from octavia.amphorae.drivers import fanout
+from octavia.amphorae.drivers import noop_driver
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.openstack.common import uuidutils
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+PHASES = (CREATE, UPDATE, DELETE)
+
+
+def build_load_balancers(count, amphorae=1, listeners=1, members=10):
+    """Builds count load balancer graphs with one pool per listener."""
+    load_balancers = []
+    for i in range(count):
+        lb_id = uuidutils.generate_uuid()
+        load_balancer = data_models.LoadBalancer(
+            id=lb_id, enabled=True,
+            provisioning_status=constants.PENDING_CREATE)
+        load_balancer.vip = data_models.Vip(
+            load_balancer_id=lb_id,
+            ip_address='10.%d.%d.%d' % (i >> 16 & 255, i >> 8 & 255, i & 255),
+            load_balancer=load_balancer)
+        load_balancer.amphorae = [
+            data_models.Amphora(id=uuidutils.generate_uuid(),
+                                load_balancer_id=lb_id,
+                                status=constants.ACTIVE,
+                                load_balancer=load_balancer)
+            for _i in range(amphorae)]
+        load_balancer.listeners = []
+        for port in range(listeners):
+            listener = data_models.Listener(
+                id=uuidutils.generate_uuid(), load_balancer_id=lb_id,
+                protocol=constants.PROTOCOL_HTTP, protocol_port=80 + port,
+                enabled=True, load_balancer=load_balancer)
+            pool = data_models.Pool(
+                id=uuidutils.generate_uuid(),
+                protocol=constants.PROTOCOL_HTTP,
+                lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN,
+                enabled=True, listener=listener)
+            pool.members = [
+                data_models.Member(id=uuidutils.generate_uuid(),
+                                   pool_id=pool.id,
+                                   ip_address='192.168.%d.%d' % (m >> 8 & 255,
+                                                                 m & 255),
+                                   protocol_port=8080, weight=1,
+                                   enabled=True, pool=pool)
+                for m in range(members)]
+            listener.default_pool = pool
+            listener.default_pool_id = pool.id
+            load_balancer.listeners.append(listener)
+        load_balancers.append(load_balancer)
+    return load_balancers
+
+
+def percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(index, 0)]
+
+
+class PhaseResult(object):
+    """Outcome of one phase of a benchmark run."""
+
+    def __init__(self, phase, results, latencies):
+        self.phase = phase
+        self.calls = len(results)
+        self.succeeded = len(results.succeeded)
+        self.failed = len(results.failed)
+        self.timed_out = len(results.timed_out)
+        self.elapsed = results.elapsed
+        self.latencies = latencies
+
+    @property
+    def throughput(self):
+        return self.calls / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self):
+        return {'phase': self.phase,
+                'calls': self.calls,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+                'elapsed': self.elapsed,
+                'throughput': self.throughput,
+                'p50': percentile(self.latencies, 50),
+                'p99': percentile(self.latencies, 99)}
+
+
+class Benchmark(object):
+    """Creates, updates and deletes every listener of many load balancers.
+
+    Each phase pushes all listeners through executor, a FanoutExecutor, to
+    driver; the update phase first changes the weight of one member per
+    pool.  Latencies are measured around each successful driver call.
+    """
+
+    def __init__(self, driver, executor):
+        self.driver = driver
+        self.executor = executor
+
+    def _timed(self, latencies, method):
+        def call(listener, vip):
+            start = time.time()
+            result = method(listener, vip)
+            latencies.append(time.time() - start)
+            return result
+        return call
+
+    def run_phase(self, phase, load_balancers):
+        if phase == UPDATE:
+            for load_balancer in load_balancers:
+                for listener in load_balancer.listeners:
+                    member = listener.default_pool.members[0]
+                    member.weight = member.weight % 256 + 1
+        method = self.driver.update if phase != DELETE else self.driver.delete
+        latencies = []
+        call = self._timed(latencies, method)
+        results = self.executor.execute(
+            (listener.id, call, (listener, load_balancer.vip))
+            for load_balancer in load_balancers
+            for listener in load_balancer.listeners)
+        return PhaseResult(phase, results, latencies)
+
+    def run(self, load_balancers, phases=PHASES):
+        return [self.run_phase(phase, load_balancers) for phase in phases]
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Load test the controller side of amphora calls with '
+                    'simulated amphorae.')
+    parser.add_argument('--load-balancers', type=int, default=1000)
+    parser.add_argument('--amphorae', type=int, default=1,
+                        help='amphorae per load balancer')
+    parser.add_argument('--listeners', type=int, default=1,
+                        help='listeners per load balancer')
+    parser.add_argument('--members', type=int, default=10,
+                        help='members per pool')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='per call timeout in seconds')
+    parser.add_argument('--latency', type=noop_driver.Latency.parse,
+                        default=noop_driver.Latency(),
+                        help='kind[:a[:b]], e.g. lognormal:-3:0.5 or '
+                             'uniform:0.01:0.05')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--hang-time', type=float, default=0.0,
+                        help='seconds a timed out call hangs')
+    parser.add_argument('--breaker', action='store_true',
+                        help='wrap the driver in a CircuitBreakerDriver')
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    driver = noop_driver.NoopAmphoraLoadBalancerDriver(
+        noop_driver.Behavior(args.latency, args.failure_rate,
+                             args.timeout_rate, args.hang_time),
+        seed=args.seed)
+    if args.breaker:
+        driver = circuit_breaker.CircuitBreakerDriver(
+            driver, failure_threshold=5, reset_timeout=30, percentile=99.0,
+            multiplier=3.0, min_timeout=0.01, max_timeout=args.timeout)
+    benchmark = Benchmark(driver, fanout.FanoutExecutor(args.concurrency,
+                                                        args.timeout))
+    load_balancers = build_load_balancers(args.load_balancers, args.amphorae,
+                                          args.listeners, args.members)
+    for result in benchmark.run(load_balancers):
+        summary = result.to_dict()
+        for key in ('p50', 'p99'):
+            summary[key] = (summary[key] or 0.0) * 1000
+        print('%(phase)-7s calls=%(calls)d ok=%(succeeded)d '
+              'failed=%(failed)d timed_out=%(timed_out)d '
+              'elapsed=%(elapsed).2fs rate=%(throughput).0f/s '
+              'p50=%(p50).1fms p99=%(p99).1fms' % summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures policy enforce() throughput of Enforcer and CachingEnforcer.
+
+Usage: python tools/policy_benchmark.py [calls]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from octavia.common import policy
+from octavia.openstack.common import policy as common_policy
+
+RULES = {
+    'context_is_admin': 'role:admin',
+    'admin_or_owner': 'rule:context_is_admin or tenant_id:%(tenant_id)s',
+    'admin_only': 'rule:context_is_admin',
+    'regular_user': '',
+    'default': 'rule:admin_or_owner',
+    'create_loadbalancer': 'rule:admin_or_owner and not role:readonly',
+    'get_loadbalancer': 'rule:admin_or_owner',
+    'update_loadbalancer': 'rule:admin_or_owner and not role:readonly',
+    'delete_loadbalancer': '(rule:context_is_admin or '
+                           '(tenant_id:%(tenant_id)s and role:lb_admin)) '
+                           'and not role:readonly',
+    'create_member': 'rule:admin_or_owner',
+    'get_member': 'rule:admin_or_owner',
+}
+
+# Rules built on each other several levels deep, as in larger deployments.
+LAYERED_RULES = dict(RULES, **{
+    'cloud_admin': 'role:admin and (domain_id:default or '
+                   'project_name:admin or user_id:%(admin_user_id)s)',
+    'service_role': 'role:service or role:octavia or role:neutron',
+    'context_is_admin': 'rule:cloud_admin or rule:service_role',
+    'project_reader': 'role:reader or role:member or role:lb_admin',
+    'project_member': 'rule:project_reader and not role:readonly and '
+                      '(project_id:%(project_id)s or '
+                      'tenant_id:%(tenant_id)s)',
+    'admin_or_owner': 'rule:context_is_admin or rule:project_member',
+})
+
+
+def _requests(count):
+    actions = sorted(RULES)
+    for i in range(count):
+        tenant = 'tenant-%d' % (i % 50)
+        yield (actions[i % len(actions)],
+               {'tenant_id': tenant, 'id': 'lb-%d' % i},
+               {'roles': ['Member', 'lb_admin'] if i % 7 else ['admin'],
+                'tenant_id': tenant, 'project_id': tenant,
+                'user_id': 'user-%d' % (i % 200)})
+
+
+def _run(name, enforcer, requests):
+    start = time.time()
+    for rule, target, creds in requests:
+        enforcer.enforce(rule, target, creds)
+    elapsed = time.time() - start
+    print('%-34s %8.0f calls/s' % (name, len(requests) / elapsed))
+
+
+def _compare(rules, requests):
+    fd, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(rules, f)
+    try:
+        enforcer = common_policy.Enforcer(policy_file=path,
+                                          default_rule='default')
+        enforcer.policy_path = path
+        _run('Enforcer', enforcer, requests)
+        for name, cache_size in (('CachingEnforcer, no cache', 0),
+                                 ('CachingEnforcer', 10000)):
+            enforcer = policy.CachingEnforcer(
+                policy_file=path, default_rule='default',
+                cache_size=cache_size, reload_interval=5)
+            enforcer.policy_path = path
+            _run(name, enforcer, requests)
+    finally:
+        os.remove(path)
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 100000
+    requests = list(_requests(count))
+    for name, rules in (('simple rules', RULES),
+                        ('layered rules', LAYERED_RULES)):
+        print(name)
+        _compare(rules, requests)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,118 @@
+#    Copyright 2014 Rackspace
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures JSON encoding of a full load balancer graph.
+
+A load balancer with its vip, amphorae and listeners, each listener with
+statistics and a pool with a health monitor, session persistence and
+members, is encoded with to_dict() extended to relationships and with
+serializer.dumps.  jsonutils.to_primitive is left out: it only converts
+objects with a __dict__, which data models no longer have.
+
+Usage: python tools/serializer_benchmark.py [listeners] [members]
+"""
+
+import json
+import sys
+import timeit
+
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.common import serializer
+
+
+def _load_balancer(listeners, members):
+    lb = data_models.LoadBalancer(
+        id='lb-1', tenant_id='tenant-1', name='lb', description='',
+        provisioning_status=constants.ACTIVE,
+        operating_status=constants.ONLINE, enabled=True)
+    lb.vip = data_models.Vip(load_balancer_id=lb.id, ip_address='10.0.0.10',
+                             load_balancer=lb)
+    lb.amphorae = [data_models.Amphora(
+        id='amphora-%d' % i, load_balancer_id=lb.id, status=constants.ACTIVE,
+        lb_network_ip='192.168.0.%d' % i, load_balancer=lb)
+        for i in range(2)]
+    for i in range(listeners):
+        listener = data_models.Listener(
+            id='listener-%d' % i, tenant_id='tenant-1', name='listener',
+            load_balancer_id=lb.id, protocol=constants.PROTOCOL_HTTP,
+            protocol_port=80 + i, connection_limit=1000, enabled=True,
+            provisioning_status=constants.ACTIVE,
+            operating_status=constants.ONLINE, load_balancer=lb)
+        listener.stats = data_models.ListenerStatistics(
+            listener_id=listener.id, bytes_in=10 ** 9, bytes_out=10 ** 10,
+            active_connections=5, total_connections=1000, listener=listener)
+        pool = data_models.Pool(
+            id='pool-%d' % i, tenant_id='tenant-1', name='pool',
+            protocol=constants.PROTOCOL_HTTP,
+            lb_algorithm=constants.LB_ALGORITHM_ROUND_ROBIN, enabled=True,
+            operating_status=constants.ONLINE, listener=listener)
+        pool.health_monitor = data_models.HealthMonitor(
+            id='hm-%d' % i, pool_id=pool.id,
+            type=constants.HEALTH_MONITOR_HTTP, delay=5, timeout=5,
+            fall_threshold=3, rise_threshold=2, http_method='GET',
+            url_path='/', expected_codes='200', enabled=True, pool=pool)
+        pool.session_persistence = data_models.SessionPersistence(
+            pool_id=pool.id, type=constants.SESSION_PERSISTENCE_HTTP_COOKIE,
+            pool=pool)
+        pool.members = [data_models.Member(
+            id='member-%d-%d' % (i, j), tenant_id='tenant-1',
+            pool_id=pool.id, ip_address='10.1.%d.%d' % (i, j % 256),
+            protocol_port=8080, weight=1, enabled=True, subnet_id='subnet-1',
+            operating_status=constants.ONLINE, pool=pool)
+            for j in range(members)]
+        listener.default_pool = pool
+        listener.default_pool_id = pool.id
+        lb.listeners.append(listener)
+    return lb
+
+
+def _to_dict_walk(value, path):
+    # to_dict() extended to relationships, the obvious alternative.
+    if isinstance(value, data_models.BaseDataModel):
+        if id(value) in path:
+            return None
+        path.add(id(value))
+        ret = dict((field, _to_dict_walk(getattr(value, field), path))
+                   for field in value._get_fields())
+        path.discard(id(value))
+        return ret
+    if isinstance(value, list):
+        return [_to_dict_walk(item, path) for item in value]
+    return value
+
+
+def main(argv):
+    listeners = int(argv[0]) if len(argv) > 0 else 5
+    members = int(argv[1]) if len(argv) > 1 else 50
+    lb = _load_balancer(listeners, members)
+    assert (json.loads(serializer.dumps(lb)) ==
+            json.loads(json.dumps(_to_dict_walk(lb, set()))))
+    cases = [
+        ('to_dict walk + json.dumps',
+         lambda: json.dumps(_to_dict_walk(lb, set()))),
+        ('serializer.dumps', lambda: serializer.dumps(lb)),
+    ]
+    print('%d listeners x %d members, %d bytes of JSON' % (
+        listeners, members, len(serializer.dumps(lb))))
+    number = max(2000 // (listeners * members), 5)
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('  %-28s %8.2f ms %9d bytes' % (name, elapsed * 1000,
+                                              len(func())))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])